@@ -0,0 +1,56 @@
+"""Compare traversal speed and memory of dict and compact FamPlex graphs.
+
+Builds a FamplexGraph with each backend and reports the memory retained by
+the graph, as traced by tracemalloc, after construction and after a sweep of
+traversals. The sweep traverses up and down from every term, once following
+both isa and partof edges and once following isa edges only, so that it
+also counts the memory of any per relation indexes built by traverse. A
+graph is built and discarded first so that memory shared by both backends,
+such as parsed resource files, is not counted for either. The time of the
+sweep is the best of repeats alternating between the backends.
+
+Usage: python benchmarks/compact_traversal.py
+"""
+import time
+import tracemalloc
+
+from famplex.graph import FamplexGraph
+
+RELATION_TYPES = [('isa', 'partof'), ('isa',)]
+
+
+def _terms(graph):
+    return sorted(set(graph._graph) | set(graph._reverse_graph))
+
+
+def _sweep(graph, terms):
+    for relation_types in RELATION_TYPES:
+        for direction in ['up', 'down']:
+            for term in terms:
+                for _ in graph.traverse(term, relation_types, direction):
+                    pass
+
+
+if __name__ == '__main__':
+    FamplexGraph()
+    graphs = {}
+    for name, compact in [('dict', False), ('compact', True)]:
+        tracemalloc.start()
+        graph = FamplexGraph(compact=compact)
+        built = tracemalloc.get_traced_memory()[0]
+        terms = _terms(graph)
+        start = tracemalloc.get_traced_memory()[0]
+        _sweep(graph, terms)
+        swept = built + tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+        graphs[name] = (graph, terms, built, swept, [])
+    for _ in range(20):
+        for graph, terms, _, _, times in graphs.values():
+            start = time.perf_counter()
+            _sweep(graph, terms)
+            times.append(time.perf_counter() - start)
+    for name, (graph, terms, built, swept, times) in graphs.items():
+        print('%-7s graph: %.2f MiB built, %.2f MiB after sweep, '
+              'sweep of %d traversals in %.1f ms' %
+              (name, built / 2 ** 20, swept / 2 ** 20, 4 * len(terms),
+               min(times) * 1000))
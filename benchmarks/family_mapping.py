@@ -0,0 +1,86 @@
+"""Measure time to map external families to FamPlex with MemberIndex.
+
+Indexes FamPlex entities by their HGNC members and maps a synthetic set of
+external families the size of the human part of InterPro onto them. The
+synthetic families draw members from a universe of 20000 genes that
+includes all FamPlex genes, with sizes following a heavy tailed
+distribution, and include a perturbed copy of every FamPlex family so that
+some pairs match. Reports the time to build the index and to map all
+families with and without a Jaccard cutoff, and compares with comparing
+every pair of families as the import scripts used to, extrapolated from a
+sample.
+
+Usage: python benchmarks/family_mapping.py
+"""
+import random
+import time
+
+from famplex.api import individual_members, in_famplex
+from famplex.load import load_entities
+from famplex.similarity import MemberIndex
+
+
+def _fplx_families():
+    families = {}
+    for fplx_id in load_entities():
+        if in_famplex('FPLX', fplx_id):
+            families[fplx_id] = sorted(
+                id_ for ns, id_ in individual_members('FPLX', fplx_id)
+                if ns == 'HGNC')
+    return families
+
+
+def _external_families(fplx_families, rng, num_families=30000):
+    universe = sorted({member for members in fplx_families.values()
+                       for member in members})
+    universe += ['GENE%d' % k for k in range(20000 - len(universe))]
+    families = {}
+    for k in range(num_families):
+        size = min(int(rng.paretovariate(1.2)), 2000)
+        families['EXT%d' % k] = rng.sample(universe, size)
+    for fplx_id, members in fplx_families.items():
+        members = list(members)
+        if members and rng.random() < 0.5:
+            members.pop(rng.randrange(len(members)))
+        families['COPY_%s' % fplx_id] = members + \
+            rng.sample(universe, rng.randint(0, 1))
+    return families
+
+
+def _brute_force(fplx_families, families, jaccard_cutoff):
+    fplx_sets = [(fplx_id, set(members))
+                 for fplx_id, members in fplx_families.items() if members]
+    matches = 0
+    for members in families.values():
+        query = set(members)
+        if not query:
+            continue
+        for fplx_id, fplx_set in fplx_sets:
+            jaccard = len(query & fplx_set) / float(len(query | fplx_set))
+            if jaccard and jaccard >= jaccard_cutoff:
+                matches += 1
+    return matches
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    fplx_families = _fplx_families()
+    families = _external_families(fplx_families, rng)
+    start = time.perf_counter()
+    index = MemberIndex(fplx_families)
+    print('Indexed %d FamPlex families in %.3f s' %
+          (len(index), time.perf_counter() - start))
+    sample = dict(rng.sample(sorted(families.items()), 1000))
+    for jaccard_cutoff in [0.0, 0.5, 1.0]:
+        start = time.perf_counter()
+        mappings = index.match_many(families, min_jaccard=jaccard_cutoff)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        _brute_force(fplx_families, sample, jaccard_cutoff)
+        brute_force = (time.perf_counter() - start) * len(families) / \
+            len(sample)
+        print('min_jaccard=%.1f: %d families mapped to %d pairs in %.2f s, '
+              'all pairs estimated at %.1f s' %
+              (jaccard_cutoff, len(families),
+               sum(len(matches) for matches in mappings.values()), elapsed,
+               brute_force))
@@ -0,0 +1,68 @@
+"""Measure latency of approximate grounding with GroundingIndex.ground_fuzzy.
+
+Builds a GroundingIndex on the FamPlex grounding map and on a synthetic map
+100 times its size, made by adding numbered variants of every text. Queries
+are texts of the map with one random character edit, so that they miss the
+exact and normalized lookups and go through the trigram index. Reports the
+time to build the trigram index and the mean, median and 99th percentile
+query latency for edit distances 1 and 2.
+
+Usage: python benchmarks/fuzzy_grounding.py
+"""
+import random
+import string
+import time
+
+from famplex.grounding import GroundingIndex
+from famplex.load import load_grounding_map
+
+
+def _edit(text, rng):
+    i = rng.randrange(len(text) + 1)
+    char = rng.choice(string.ascii_lowercase)
+    operation = rng.choice(['insert', 'delete', 'substitute'])
+    if operation == 'insert' or not text:
+        return text[:i] + char + text[i:]
+    i = min(i, len(text) - 1)
+    if operation == 'delete':
+        return text[:i] + text[i + 1:]
+    return text[:i] + char + text[i + 1:]
+
+
+def run(name, grounding_map, num_queries=2000):
+    rng = random.Random(0)
+    index = GroundingIndex(grounding_map)
+    texts = [text for text, db_refs in grounding_map.items() if db_refs]
+    queries = [_edit(rng.choice(texts), rng) for _ in range(num_queries)]
+    start = time.perf_counter()
+    index.ground_fuzzy('\x00')
+    build_time = time.perf_counter() - start
+    print('%s: %d texts, trigram index built in %.2f s' %
+          (name, len(grounding_map), build_time))
+    for max_distance in [1, 2]:
+        latencies = []
+        found = 0
+        for query in queries:
+            start = time.perf_counter()
+            candidates = index.ground_fuzzy(query, max_distance)
+            latencies.append(time.perf_counter() - start)
+            found += bool(candidates)
+        latencies.sort()
+        print('  max_distance=%d: mean %.3f ms, median %.3f ms, '
+              'p99 %.3f ms, %.0f%% of queries with candidates' %
+              (max_distance, 1000 * sum(latencies) / len(latencies),
+               1000 * latencies[len(latencies) // 2],
+               1000 * latencies[int(0.99 * len(latencies))],
+               100 * found / len(queries)))
+
+
+if __name__ == '__main__':
+    grounding_map = load_grounding_map()
+    run('FamPlex grounding map', grounding_map)
+    scaled_map = {}
+    for k in range(100):
+        for text, db_refs in grounding_map.items():
+            variant = '%s v%d' % (text, k) if k else text
+            scaled_map[variant] = None if db_refs is None else \
+                dict(db_refs, TEXT=variant)
+    run('100x synthetic grounding map', scaled_map)
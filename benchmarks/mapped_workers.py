@@ -0,0 +1,86 @@
+"""Compare per-worker memory of built and memory mapped FamPlex graphs.
+
+Starts pools of 1, 8 and 32 worker processes. Each worker either builds its
+own FamplexGraph from the resource files or opens a shared memory mapped
+graph file, runs a traversal from every term so that all of the graph is
+touched, and reports its memory use while all workers of the pool are still
+alive. RSS counts shared pages in full in every process, so the
+proportional set size (PSS), which divides shared pages between the
+processes that map them, is also reported on Linux.
+
+Usage: python benchmarks/mapped_workers.py
+"""
+import os
+import sys
+import tempfile
+import multiprocessing
+
+from famplex.graph import FamplexGraph
+
+
+def _memory():
+    """Return (RSS, PSS) of this process in KiB, PSS is None if unknown"""
+    rss = pss = None
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Rss:'):
+                    rss = int(line.split()[1])
+                elif line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            rss //= 1024
+    return rss, pss
+
+
+def _worker(mapped_path, barrier, results):
+    rss_before, pss_before = _memory()
+    if mapped_path is None:
+        graph = FamplexGraph()
+    else:
+        graph = FamplexGraph(mapped_path=mapped_path)
+    for root in graph.root_classes:
+        for _ in graph.traverse(root, ['isa', 'partof'], 'down'):
+            pass
+    barrier.wait()
+    rss_after, pss_after = _memory()
+    results.put((rss_after - rss_before,
+                 None if pss_after is None else pss_after - pss_before))
+    barrier.wait()
+
+
+def run(num_workers, mapped_path):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(num_workers + 1)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker,
+                           args=(mapped_path, barrier, results))
+               for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    measurements = [results.get() for _ in range(num_workers)]
+    barrier.wait()
+    for worker in workers:
+        worker.join()
+    rss = sum(m[0] for m in measurements) / num_workers
+    pss = None if measurements[0][1] is None else \
+        sum(m[1] for m in measurements) / num_workers
+    return rss, pss
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        mapped_path = os.path.join(directory, 'famplex.graph')
+        FamplexGraph().write_mapped(mapped_path)
+        print('%-8s %8s %16s %16s' % ('mode', 'workers',
+                                      'RSS/worker KiB', 'PSS/worker KiB'))
+        for mode, path in [('built', None), ('mapped', mapped_path)]:
+            for num_workers in [1, 8, 32]:
+                rss, pss = run(num_workers, path)
+                print('%-8s %8d %16.0f %16s' %
+                      (mode, num_workers, rss,
+                       'n/a' if pss is None else '%.0f' % pss))
@@ -0,0 +1,97 @@
+"""Load test the FamPlex query server on localhost.
+
+Starts ``python -m famplex.serve`` on a free port, opens a number of
+concurrent keep-alive connections and sends batched ancestral_terms and
+ground requests from each for a fixed duration. Reports requests and
+queried items per second and the median and 99th percentile request
+latency for each combination of concurrency and batch size.
+
+Usage: python benchmarks/serve_load.py [--duration SECONDS]
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+from famplex.load import load_grounding_map, load_relations
+
+
+async def _client(host, port, bodies, deadline, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            path, body = random.choice(bodies)
+            request = ('POST %s HTTP/1.1\r\nHost: %s\r\n'
+                       'Content-Type: application/json\r\n'
+                       'Content-Length: %d\r\n\r\n' %
+                       (path, host, len(body))).encode('ascii') + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            length = None
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _run(host, port, bodies, concurrency, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[_client(host, port, bodies, deadline, latencies)
+                           for _ in range(concurrency)])
+    return latencies
+
+
+def _bodies(batch_size, rng):
+    terms = sorted({(ns, id_) for ns1, id1, _, ns2, id2 in load_relations()
+                    for ns, id_ in [(ns1, id1), (ns2, id2)]})
+    texts = sorted(load_grounding_map())
+    bodies = []
+    for _ in range(50):
+        bodies.append(('/ancestral_terms', json.dumps(
+            {'terms': rng.sample(terms, batch_size)}).encode('utf-8')))
+        bodies.append(('/ground', json.dumps(
+            {'texts': rng.sample(texts, batch_size)}).encode('utf-8')))
+    return bodies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    server = subprocess.Popen([sys.executable, '-m', 'famplex.serve',
+                               '--port', '0'], stdout=subprocess.PIPE,
+                              universal_newlines=True)
+    try:
+        address = server.stdout.readline().split()[-1]
+        host, port = address.rsplit(':', 1)
+        rng = random.Random(0)
+        print('concurrency  batch  requests/s  items/s  p50 ms  p99 ms')
+        for batch_size in [1, 100]:
+            bodies = _bodies(batch_size, rng)
+            for concurrency in [1, 16, 64]:
+                latencies = asyncio.run(_run(host, int(port), bodies,
+                                             concurrency, args.duration))
+                latencies.sort()
+                rate = len(latencies) / args.duration
+                print('%11d  %5d  %10.0f  %7.0f  %6.2f  %6.2f' %
+                      (concurrency, batch_size, rate, rate * batch_size,
+                       1000 * latencies[len(latencies) // 2],
+                       1000 * latencies[int(0.99 * len(latencies))]))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Family expansion to UniProt IDs needs a mapping of the HGNC symbols used
+in relations.csv to UniProt IDs. This script generates that mapping from the
+HGNC complete set so that it can be shipped with FamPlex and used without
+INDRA or network access. Curated symbols that have since been renamed are
+resolved through their previous symbols. The complete set is downloaded
+unless the path of a local copy is given as an argument, which may also be
+an HGNC custom download with the HGNC ID, Approved symbol, Previous symbols
+and UniProt ID columns, such as the hgnc_entries.tsv file shipped with INDRA.
+
+Usage: python export/hgnc_uniprot.py [hgnc_complete_set.txt]
+"""
+
+import os
+import csv
+import sys
+from urllib.request import urlopen
+
+HGNC_URL = ('https://storage.googleapis.com/public-download-files/hgnc/tsv/'
+            'tsv/hgnc_complete_set.txt')
+
+# Columns of HGNC custom downloads and the complete set columns they match
+CUSTOM_COLUMNS = {'HGNC ID': 'hgnc_id', 'Approved symbol': 'symbol',
+                  'Previous symbols': 'prev_symbol',
+                  'UniProt ID(supplied by UniProt)': 'uniprot_ids'}
+
+
+def read_hgnc_complete_set(path=None):
+    """Return rows of the HGNC complete set as dictionaries"""
+    if path is None:
+        with urlopen(HGNC_URL) as response:
+            lines = response.read().decode('utf-8').splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as fh:
+            lines = fh.read().splitlines()
+    rows = list(csv.DictReader(lines, delimiter='\t'))
+    if rows and 'symbol' not in rows[0]:
+        # Custom downloads separate multiple values with commas rather than
+        # pipes
+        rows = [{CUSTOM_COLUMNS[key]: '|'.join(value.split(', '))
+                 for key, value in row.items() if key in CUSTOM_COLUMNS}
+                for row in rows]
+    return rows
+
+
+if __name__ == '__main__':
+    path_this = os.path.dirname(os.path.abspath(__file__))
+    hgnc_symbols = set()
+    # Gather all HGNC symbols from relations.csv
+    relations_file = os.path.join(path_this, os.pardir, 'relations.csv')
+    with open(relations_file, 'r') as f:
+        csvreader = csv.reader(f, delimiter=str(u','), lineterminator='\r\n',
+                               quoting=csv.QUOTE_MINIMAL,
+                               quotechar=str(u'"'))
+        for row in csvreader:
+            ns1, id1, rel, ns2, id2 = row
+            if ns1 == 'HGNC':
+                hgnc_symbols.add(id1)
+            if ns2 == 'HGNC':
+                hgnc_symbols.add(id2)
+
+    rows = read_hgnc_complete_set(sys.argv[1] if len(sys.argv) > 1 else None)
+    by_symbol = {row['symbol']: row for row in rows}
+    by_prev_symbol = {}
+    for row in rows:
+        for prev_symbol in row['prev_symbol'].strip('"').split('|'):
+            if prev_symbol:
+                by_prev_symbol.setdefault(prev_symbol, []).append(row)
+
+    # Create output file
+    out_file = os.path.join(path_this, 'hgnc_uniprot_map.csv')
+    with open(out_file, 'w') as fh:
+        for hgnc_symbol in sorted(hgnc_symbols):
+            row = by_symbol.get(hgnc_symbol)
+            if row is None and len(by_prev_symbol.get(hgnc_symbol, [])) == 1:
+                row = by_prev_symbol[hgnc_symbol][0]
+            if row is None:
+                print('No HGNC entry for %s' % hgnc_symbol)
+                continue
+            hgnc_id = row['hgnc_id'].replace('HGNC:', '')
+            up_ids = row['uniprot_ids'].strip('"')
+            fh.write('%s,%s,%s\r\n' % (hgnc_symbol, hgnc_id, up_ids))
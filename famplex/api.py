@@ -19,25 +19,312 @@ partof edges from X to Y. We also say that Y is an ancestor of X.
 X is then below Y in the FamPlex ontology and we also say X is a descendant
 of Y.
 """
+import json
+import logging
+import multiprocessing
+import threading
 import warnings
-from typing import Container, Dict, List, Optional, Tuple
+from collections import deque
+from functools import lru_cache
+from typing import Any, Container, Dict, Generator, Iterable, List, \
+    Optional, Sequence, Tuple
 
-from famplex.graph import FamplexGraph
+from famplex.graph import FamplexGraph, _relation_key
+from famplex.grounding import GroundingIndex
+from famplex.load import load_entities, load_grounding_map, \
+    load_hgnc_uniprot_map, resource_registry
+from famplex.prefixes import GenePrefixStripper
 
 __all__ = ['in_famplex', 'parent_terms', 'child_terms', 'root_terms',
            'ancestral_terms', 'descendant_terms', 'individual_members', 'isa',
            'partof', 'refinement_of', 'dict_representation', 'equivalences',
-           'reverse_equivalences', 'all_root_terms']
+           'reverse_equivalences', 'all_root_terms', 'warm_up', 'isa_many',
+           'partof_many', 'refinement_of_many', 'traversal_cache_info',
+           'clear_traversal_cache', 'set_traversal_cache_size',
+           'iter_json_representation', 'common_ancestors',
+           'lowest_common_ancestors', 'refinement_pairs', 'enable_hot_reload',
+           'disable_hot_reload', 'ground', 'ground_many', 'ground_fuzzy',
+           'strip_gene_prefix', 'strip_gene_prefixes', 'grounding_texts',
+           'translate', 'translate_many', 'expand_to', 'child_map']
+
+
+logger = logging.getLogger(__name__)
+
+
+# The graph is constructed on first use rather than at import time so that
+# importing famplex for the resource loaders alone stays cheap. It is loaded
+# from a snapshot of a previous build when the resource files are unchanged.
+_famplex_graph: Optional[FamplexGraph] = None
+_famplex_graph_lock = threading.Lock()
+
+
+def _get_graph() -> FamplexGraph:
+    """Return the shared FamplexGraph, constructing it if necessary"""
+    global _famplex_graph
+    graph = _famplex_graph
+    if graph is not None:
+        return graph
+    with _famplex_graph_lock:
+        if _famplex_graph is None:
+            try:
+                _famplex_graph = FamplexGraph(cache=True)
+            except FileNotFoundError:
+                warnings.warn(
+                    "Resource files are unavailable. If you've cloned this "
+                    "repository, run the script \"update_resources.py\" at "
+                    "the top level to move the resources into the package. "
+                    "See the README for more info.",
+                    Warning)
+                raise
+        return _famplex_graph
+
+
+def warm_up(closure: bool = False, grounding: bool = False) -> None:
+    """Construct the FamPlex graph used by this module ahead of time
+
+    The graph is otherwise built lazily on the first call to a function
+    that needs it. Long running processes can call this at startup to
+    avoid paying the construction cost while serving a request.
 
+    Parameters
+    ----------
+    closure : Optional[bool]
+        If True, also build the transitive closure index used to answer
+        :func:`isa`, :func:`partof` and :func:`refinement_of` with a
+        single lookup. Default: False
+    grounding : Optional[bool]
+        If True, also build the index used by :func:`ground` and
+        :func:`ground_many`. Default: False
+    """
+    graph = _get_graph()
+    if closure and graph.closure_stats is None:
+        with _famplex_graph_lock:
+            if graph.closure_stats is None:
+                graph.build_closure()
+    if grounding:
+        _get_grounding_index()
+
+
+def _traverse_terms(namespace: str, id_: str, relation_types: Tuple[str, ...],
+                    direction: str) -> Tuple[Tuple[str, str], ...]:
+    """Return terms reached by traversal from a term, excluding the term"""
+    return tuple(_get_graph().traverse((namespace, id_), relation_types,
+                                       direction))[1:]
+
+
+# Results of ancestral_terms and descendant_terms are memoized in a bounded
+# LRU cache keyed by term, relation types and direction. Cached values are
+# tuples and callers receive fresh lists, so cached results cannot be
+# modified through a returned value.
+_DEFAULT_TRAVERSAL_CACHE_SIZE = 4096
+_cached_traverse_terms = \
+    lru_cache(maxsize=_DEFAULT_TRAVERSAL_CACHE_SIZE)(_traverse_terms)
+
+
+def traversal_cache_info():
+    """Return statistics for the ancestral and descendant terms cache
+
+    Returns
+    -------
+    functools._CacheInfo
+        Named tuple with fields hits, misses, maxsize and currsize.
+    """
+    return _cached_traverse_terms.cache_info()
+
+
+def clear_traversal_cache() -> None:
+    """Clear the ancestral and descendant terms cache and its statistics
+
+    Must be called if the resource files are reloaded.
+    """
+    _cached_traverse_terms.cache_clear()
 
-try:
-    _famplex_graph = FamplexGraph()
-except FileNotFoundError:
-    warnings.warn(
-        "Resource files are unavailable. If you've cloned this repository, "
-        "run the script \"update_resources.py\" at the top level to move the "
-        "resources into the package. See the README for more info.",
-        Warning)
+
+def set_traversal_cache_size(maxsize: Optional[int]) -> None:
+    """Set the maximum number of cached ancestral and descendant results
+
+    The cache is cleared when its size is changed.
+
+    Parameters
+    ----------
+    maxsize : int or None
+        Maximum number of cached results. If 0, results are not cached. If
+        None, the cache is unbounded. Default size is 4096.
+    """
+    global _cached_traverse_terms
+    _cached_traverse_terms = lru_cache(maxsize=maxsize)(_traverse_terms)
+
+
+# The grounding index is also built on first use.
+_grounding_index: Optional[GroundingIndex] = None
+_grounding_index_lock = threading.Lock()
+
+
+def _get_grounding_index() -> GroundingIndex:
+    """Return the shared GroundingIndex, constructing it if necessary"""
+    global _grounding_index
+    index = _grounding_index
+    if index is not None:
+        return index
+    with _grounding_index_lock:
+        if _grounding_index is None:
+            _grounding_index = GroundingIndex(load_grounding_map())
+        return _grounding_index
+
+
+_gene_prefix_stripper: Optional[GenePrefixStripper] = None
+
+
+def _get_gene_prefix_stripper() -> GenePrefixStripper:
+    """Return the shared GenePrefixStripper, constructing it if necessary"""
+    global _gene_prefix_stripper
+    stripper = _gene_prefix_stripper
+    if stripper is None:
+        # Construction is cheap, so concurrent first calls may each build
+        # one instead of waiting for a lock.
+        stripper = _gene_prefix_stripper = GenePrefixStripper()
+    return stripper
+
+
+# Maps from FamPlex IDs to the sorted ids of their individual members in
+# each of the namespaces supported by expand_to, built on first use
+_child_maps: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+_child_maps_lock = threading.Lock()
+
+
+def _get_child_map(namespace_target: str) -> Dict[str, Tuple[str, ...]]:
+    """Return the shared child map for a namespace, building it if needed"""
+    child_map = _child_maps.get(namespace_target)
+    if child_map is not None:
+        return child_map
+    if namespace_target not in ('HGNC', 'UP'):
+        raise ValueError("namespace_target must be 'HGNC' or 'UP', not %s."
+                         % namespace_target)
+    with _child_maps_lock:
+        if namespace_target not in _child_maps:
+            _child_maps[namespace_target] = \
+                _build_child_map(namespace_target)
+        return _child_maps[namespace_target]
+
+
+def _build_child_map(namespace_target: str) -> Dict[str, Tuple[str, ...]]:
+    """Map every FamPlex entity to the ids of its members in a namespace"""
+    up_ids = load_hgnc_uniprot_map(cached=True)
+    if namespace_target == 'UP':
+        convert = {'HGNC': lambda id_: up_ids.get(id_, ()),
+                   'UP': lambda id_: (id_,)}
+    else:
+        hgnc_symbols: Dict[str, List[str]] = {}
+        for symbol, ids in up_ids.items():
+            for up_id in ids:
+                hgnc_symbols.setdefault(up_id, []).append(symbol)
+        convert = {'HGNC': lambda id_: (id_,),
+                   'UP': lambda id_: hgnc_symbols.get(id_, ())}
+    graph = _get_graph()
+    child_map = {}
+    for fplx_id in load_entities():
+        if not graph.in_famplex('FPLX', fplx_id):
+            child_map[fplx_id] = ()
+            continue
+        # Members are found with lookups into the graph's leaf member
+        # index, which is built in a single pass over the graph.
+        members = graph.individual_members('FPLX', fplx_id,
+                                           ['isa', 'partof'])
+        child_map[fplx_id] = tuple(sorted({
+            target for ns, id_ in members if ns in convert
+            for target in convert[ns](id_)}))
+    return child_map
+
+
+# Resources from which the graph is built
+_GRAPH_RESOURCES = {'relations', 'entities', 'equivalences'}
+_hot_reload_stop: Optional[threading.Event] = None
+
+
+def _on_resources_changed(changed: List[str]) -> None:
+    """Rebuild shared structures built from resources that changed
+
+    If the graph cannot be rebuilt, for example because a relation was
+    edited into a cycle, the error propagates to the resource registry,
+    which logs it and reports the change again on its next check. The
+    previous graph is kept in the meantime.
+    """
+    global _famplex_graph, _grounding_index, _gene_prefix_stripper
+    if 'grounding_map' in changed:
+        with _grounding_index_lock:
+            _grounding_index = None
+    # Known names used by the stripper come from relations and entities
+    if {'gene_prefixes', 'relations', 'entities'} & set(changed):
+        _gene_prefix_stripper = None
+    if 'hgnc_uniprot_map' in changed:
+        with _child_maps_lock:
+            _child_maps.clear()
+    if not _GRAPH_RESOURCES & set(changed):
+        return
+    with _famplex_graph_lock:
+        old_graph = _famplex_graph
+        # A graph that was never loaded is built from the new files on
+        # first use.
+        if old_graph is not None:
+            _famplex_graph = FamplexGraph(
+                closure=old_graph.closure_stats is not None, cache=True)
+        clear_traversal_cache()
+    with _child_maps_lock:
+        _child_maps.clear()
+
+
+def enable_hot_reload(interval: Optional[float] = None) -> None:
+    """Rebuild the graph used by this module when resource files change
+
+    Registers a listener on :data:`famplex.load.resource_registry` which
+    rebuilds the graph and clears the traversal cache and the members
+    computed by :func:`expand_to` whenever the relations, entities or
+    equivalences files are found to have changed, and rebuilds the
+    structures used by :func:`ground` and :func:`strip_gene_prefix` when
+    the grounding map or gene prefixes changed.
+    Changes are detected on calls to resource_registry.refresh() or, if an
+    interval is given, by a background thread checking the files
+    periodically. Resources loaded with cached=True are reloaded in any
+    case.
+
+    Parameters
+    ----------
+    interval : Optional[float]
+        Number of seconds between checks for changed files by a background
+        daemon thread. If None, no thread is started. Default: None
+    """
+    global _hot_reload_stop
+    disable_hot_reload()
+    # Record the current state of all files so that later changes are seen
+    resource_registry.refresh()
+    resource_registry.add_listener(_on_resources_changed)
+    if interval is not None:
+        stop = threading.Event()
+
+        def poll() -> None:
+            while not stop.wait(interval):
+                # Errors reading a file must not end the thread, so that
+                # later changes are still picked up.
+                try:
+                    resource_registry.refresh()
+                except Exception:
+                    logger.warning('Checking resource files failed.',
+                                   exc_info=True)
+        threading.Thread(target=poll, name='famplex-hot-reload',
+                         daemon=True).start()
+        _hot_reload_stop = stop
+    else:
+        _hot_reload_stop = threading.Event()
+
+
+def disable_hot_reload() -> None:
+    """Stop rebuilding the graph when resource files change"""
+    global _hot_reload_stop
+    if _hot_reload_stop is None:
+        return
+    _hot_reload_stop.set()
+    _hot_reload_stop = None
+    resource_registry.remove_listener(_on_resources_changed)
 
 
 def in_famplex(namespace: str, id_: str) -> bool:
@@ -55,7 +342,7 @@ def in_famplex(namespace: str, id_: str) -> bool:
     -------
     bool
     """
-    return _famplex_graph.in_famplex(namespace, id_)
+    return _get_graph().in_famplex(namespace, id_)
 
 
 def parent_terms(namespace: str, id_: str,
@@ -91,7 +378,7 @@ def parent_terms(namespace: str, id_: str,
     """
     if relation_types is None:
         relation_types = ['isa', 'partof']
-    edges = _famplex_graph.parent_edges(namespace, id_)
+    edges = _get_graph().parent_edges(namespace, id_)
     return [(ns2, id2) for ns2, id2, rel in edges if rel in relation_types]
 
 
@@ -128,7 +415,7 @@ def child_terms(namespace: str, id_: str,
     """
     if relation_types is None:
         relation_types = ['isa', 'partof']
-    edges = _famplex_graph.child_edges(namespace, id_)
+    edges = _get_graph().child_edges(namespace, id_)
     return [(ns2, id2) for ns2, id2, rel in edges if rel in relation_types]
 
 
@@ -156,7 +443,7 @@ def root_terms(namespace: str, id_: str) -> List[Tuple[str, str]]:
     ValueError
         If (namespace, id_) does not correspond to a term in FamPlex.
     """
-    return _famplex_graph.root_terms(namespace, id_)
+    return _get_graph().root_terms(namespace, id_)
 
 
 def ancestral_terms(namespace: str, id_: str,
@@ -194,14 +481,11 @@ def ancestral_terms(namespace: str, id_: str,
     ValueError
         If (namespace, id_) does not correspond to a term in FamPlex.
     """
-    _famplex_graph.raise_value_error_if_not_in_famplex(namespace, id_)
+    _get_graph().raise_value_error_if_not_in_famplex(namespace, id_)
     if relation_types is None:
         relation_types = ['isa', 'partof']
-    output = []
-    for ns2, id2 in _famplex_graph.traverse((namespace, id_),
-                                            relation_types, 'up'):
-        output.append((ns2, id2))
-    return output[1:]
+    return list(_cached_traverse_terms(namespace, id_,
+                                       _relation_key(relation_types), 'up'))
 
 
 def descendant_terms(namespace: str, id_: str,
@@ -239,14 +523,12 @@ def descendant_terms(namespace: str, id_: str,
     ValueError
         If (namespace, id_) does not correspond to a term in FamPlex.
     """
-    _famplex_graph.raise_value_error_if_not_in_famplex(namespace, id_)
+    _get_graph().raise_value_error_if_not_in_famplex(namespace, id_)
     if relation_types is None:
         relation_types = ['isa', 'partof']
-    output = []
-    for ns2, id2 in _famplex_graph.traverse((namespace, id_),
-                                            relation_types, 'down'):
-        output.append((ns2, id2))
-    return output[1:]
+    return list(_cached_traverse_terms(namespace, id_,
+                                       _relation_key(relation_types),
+                                       'down'))
 
 
 def individual_members(namespace: str, id_: str,
@@ -290,11 +572,67 @@ def individual_members(namespace: str, id_: str,
     """
     if relation_types is None:
         relation_types = ['isa', 'partof']
-    output = []
-    for ns2, id2 in descendant_terms(namespace, id_, relation_types):
-        if not child_terms(ns2, id2, relation_types=relation_types):
-            output.append((ns2, id2))
-    return sorted(output, key=lambda x: (x[0].lower(), x[1].lower()))
+    return _get_graph().individual_members(namespace, id_, relation_types)
+
+
+def expand_to(namespace_target: str, fplx_id: str) -> List[str]:
+    """Return the ids in a namespace of the genes in a family or complex
+
+    The genes and proteins among the individual members of the FamPlex
+    entity, as returned by :func:`individual_members` following both isa
+    and partof relations, are translated into namespace_target. HGNC
+    symbols are mapped to UniProt IDs and back with the table in the
+    hgnc_uniprot_map.csv export, so no network access is needed. The first
+    call for a namespace computes the members of all FamPlex entities at
+    once. Subsequent calls are lookups.
+
+    Parameters
+    ----------
+    namespace_target : str
+        Namespace to return ids in, either 'UP' for UniProt IDs or 'HGNC'
+        for HGNC symbols.
+    fplx_id : str
+        ID of a FamPlex family or complex.
+
+    Returns
+    -------
+    list
+        Sorted list of ids without duplicates. Members that cannot be
+        translated into namespace_target are left out.
+
+    Raises
+    ------
+    ValueError
+        If fplx_id is not an ID in the FamPlex ontology or namespace_target
+        is not supported.
+    """
+    child_map = _get_child_map(namespace_target)
+    _get_graph().raise_value_error_if_not_in_famplex('FPLX', fplx_id)
+    return list(child_map.get(fplx_id, ()))
+
+
+def child_map(namespace_target: str = 'UP') -> Dict[str, List[str]]:
+    """Return the ids in a namespace of the members of all FamPlex entities
+
+    Parameters
+    ----------
+    namespace_target : Optional[str]
+        Namespace to return ids in, either 'UP' or 'HGNC'. Default: 'UP'
+
+    Returns
+    -------
+    dict
+        Dictionary mapping each FamPlex ID in entities.csv to the list
+        returned by :func:`expand_to` for it. Entities without relations
+        map to an empty list.
+
+    Raises
+    ------
+    ValueError
+        If namespace_target is not supported.
+    """
+    return {fplx_id: list(ids)
+            for fplx_id, ids in _get_child_map(namespace_target).items()}
 
 
 def isa(namespace1: str, id1: str, namespace2: str, id2: str) -> bool:
@@ -321,7 +659,7 @@ def isa(namespace1: str, id1: str, namespace2: str, id2: str) -> bool:
         either of (namespace1, id1) or (namespace2, id2) is not in the
         FamPlex ontology.
     """
-    return _famplex_graph.relation(namespace1, id1, namespace2, id2, ['isa'])
+    return _get_graph().relation(namespace1, id1, namespace2, id2, ['isa'])
 
 
 def partof(namespace1: str, id1: str, namespace2: str, id2: str) -> bool:
@@ -348,8 +686,8 @@ def partof(namespace1: str, id1: str, namespace2: str, id2: str) -> bool:
         False if either of (namespace1, id1) or (namespace2, id2) is not in
         the FamPlex ontology.
     """
-    return _famplex_graph.relation(namespace1, id1,
-                                   namespace2, id2, ['partof'])
+    return _get_graph().relation(namespace1, id1,
+                                 namespace2, id2, ['partof'])
 
 
 def refinement_of(namespace: str, id1: str, namespace2: str, id2: str) -> bool:
@@ -376,13 +714,208 @@ def refinement_of(namespace: str, id1: str, namespace2: str, id2: str) -> bool:
         return False if either of (namespace1, id1) or (namespace2, id2) is
         not in the FamPlex ontology.
     """
-    return _famplex_graph.relation(namespace, id1,
-                                   namespace2, id2, ['isa', 'partof'])
+    return _get_graph().relation(namespace, id1,
+                                 namespace2, id2, ['isa', 'partof'])
+
+
+def common_ancestors(terms: Iterable[Tuple[str, str]],
+                     relation_types: Optional[Container[str]] = None) -> \
+        List[Tuple[str, str]]:
+    """Return all terms at or above every one of the given terms
+
+    Parameters
+    ----------
+    terms : iterable
+        Terms of the form (namespace, id). At least one term must be given.
+    relation_types : Optional[list]
+        Restrict edges to relation types in this list. The valid relation
+        types are the strings 'isa' and 'partof'.
+        If argument is None then both isa and partof relations are
+        included. Default: None
+
+    Returns
+    -------
+    list
+        List of terms that are equal to or above each of the input terms,
+        so an input term above all of the others is included. Sorted from
+        most to least specific: by decreasing depth below the top level,
+        then in case insensitive alphabetical order, first by namespace and
+        then by id.
+
+    Raises
+    ------
+    ValueError
+        If no terms are given or a term is not in FamPlex.
+    """
+    if relation_types is None:
+        relation_types = ['isa', 'partof']
+    return _get_graph().common_ancestors(terms, relation_types)
+
+
+def lowest_common_ancestors(terms: Iterable[Tuple[str, str]],
+                            relation_types:
+                            Optional[Container[str]] = None) -> \
+        List[Tuple[str, str]]:
+    """Return the most specific terms at or above all of the given terms
+
+    For example, the lowest common ancestor of ('HGNC', 'HRAS') and
+    ('HGNC', 'KRAS') is [('FPLX', 'RAS')].
+
+    Parameters
+    ----------
+    terms : iterable
+        Terms of the form (namespace, id). At least one term must be given.
+    relation_types : Optional[list]
+        Restrict edges to relation types in this list. The valid relation
+        types are the strings 'isa' and 'partof'.
+        If argument is None then both isa and partof relations are
+        included. Default: None
+
+    Returns
+    -------
+    list
+        Terms from :func:`common_ancestors` that are not above any other
+        common ancestor. Families and complexes can overlap so there may be
+        more than one. Sorted as in :func:`common_ancestors`.
+
+    Raises
+    ------
+    ValueError
+        If no terms are given or a term is not in FamPlex.
+    """
+    if relation_types is None:
+        relation_types = ['isa', 'partof']
+    return _get_graph().lowest_common_ancestors(terms, relation_types)
+
+
+def isa_many(pairs: Iterable[Tuple[Tuple[str, str], Tuple[str, str]]]) -> \
+        List[bool]:
+    """Return whether isa holds for each of many pairs of terms
+
+    Parameters
+    ----------
+    pairs : iterable
+        Pairs of terms of the form ((namespace1, id1), (namespace2, id2)).
+        A NumPy array of shape (n, 2, 2) may also be given.
+
+    Returns
+    -------
+    list
+        List of booleans with the value of :func:`isa` for each pair. Work
+        is shared between pairs with the same first term, so grouping pairs
+        by first term is not necessary. Use numpy.asarray on the result to
+        obtain a boolean array.
+    """
+    return _get_graph().relation_many(pairs, ['isa'])
+
+
+def partof_many(pairs: Iterable[Tuple[Tuple[str, str],
+                                      Tuple[str, str]]]) -> List[bool]:
+    """Return whether partof holds for each of many pairs of terms
+
+    Parameters
+    ----------
+    pairs : iterable
+        Pairs of terms of the form ((namespace1, id1), (namespace2, id2)).
+        A NumPy array of shape (n, 2, 2) may also be given.
+
+    Returns
+    -------
+    list
+        List of booleans with the value of :func:`partof` for each pair.
+    """
+    return _get_graph().relation_many(pairs, ['partof'])
+
+
+def refinement_of_many(pairs: Iterable[Tuple[Tuple[str, str],
+                                             Tuple[str, str]]]) -> \
+        List[bool]:
+    """Return whether isa or partof holds for each of many pairs of terms
+
+    Parameters
+    ----------
+    pairs : iterable
+        Pairs of terms of the form ((namespace1, id1), (namespace2, id2)).
+        A NumPy array of shape (n, 2, 2) may also be given.
+
+    Returns
+    -------
+    list
+        List of booleans with the value of :func:`refinement_of` for each
+        pair.
+    """
+    return _get_graph().relation_many(pairs, ['isa', 'partof'])
 
 
-def dict_representation(namespace: str,
-                        id_: str) -> Dict[Tuple[str, str],
-                                          List[Tuple[dict, str]]]:
+def refinement_pairs(terms: Sequence[Tuple[str, str]],
+                     relation_types: Optional[Container[str]] = None,
+                     processes: Optional[int] = None) -> \
+        List[Tuple[int, int]]:
+    """Return all pairs of terms in a list where one refines the other
+
+    This computes the full relation given by :func:`refinement_of` among a
+    list of terms without testing every pair. See
+    :meth:`famplex.graph.FamplexGraph.refinement_pairs`.
+
+    Parameters
+    ----------
+    terms : sequence
+        Terms of the form (namespace, id). Terms not in FamPlex are allowed
+        and are not related to any term.
+    relation_types : Optional[list]
+        Restrict edges to relation types in this list. The valid relation
+        types are the strings 'isa' and 'partof'.
+        If argument is None then both isa and partof relations are
+        included, giving :func:`refinement_of`. Default: None
+    processes : Optional[int]
+        If greater than 1, the work is divided between this many worker
+        processes. This pays off only when computing ancestors dominates,
+        since the pairs found have to be sent back from the workers.
+        Default: None
+
+    Returns
+    -------
+    list
+        Sorted list of pairs of positions (i, j) with i != j such that
+        terms[i] is a refinement of terms[j]. Positions holding equal terms
+        are refinements of each other. This is the sparse representation
+        of the boolean matrix of the relation; for example,
+        scipy.sparse.coo_matrix((numpy.ones(len(pairs), dtype=bool),
+        tuple(zip(*pairs))), shape=(len(terms), len(terms))) constructs the
+        matrix itself.
+    """
+    if relation_types is None:
+        relation_types = ['isa', 'partof']
+    terms = [tuple(term) for term in terms]
+    if processes is None or processes <= 1 or len(terms) < 2:
+        return _get_graph().refinement_pairs(terms, relation_types)
+    # Interleave rows so that chunks are similar in cost. Results are merged
+    # and sorted at the end.
+    chunks = [range(k, len(terms), processes) for k in range(processes)]
+    with multiprocessing.Pool(processes, initializer=_init_pairs_worker,
+                              initargs=(terms, relation_types)) as pool:
+        results = pool.map(_refinement_pairs_chunk, chunks)
+    return sorted(pair for result in results for pair in result)
+
+
+_pairs_worker_args: Tuple[List[Tuple[str, str]], Container[str]] = ([], [])
+
+
+def _init_pairs_worker(terms: List[Tuple[str, str]],
+                       relation_types: Container[str]) -> None:
+    global _pairs_worker_args
+    _pairs_worker_args = (terms, relation_types)
+
+
+def _refinement_pairs_chunk(rows: Iterable[int]) -> List[Tuple[int, int]]:
+    terms, relation_types = _pairs_worker_args
+    return _get_graph().refinement_pairs(terms, relation_types, rows=rows)
+
+
+def dict_representation(namespace: str, id_: str,
+                        max_depth: Optional[int] = None,
+                        max_nodes: Optional[int] = None) -> \
+        Dict[Tuple[str, str], Optional[List[Tuple[dict, str]]]]:
     """Return a nested dictionary representation of a FamPlex term
 
     Parameters
@@ -392,6 +925,13 @@ def dict_representation(namespace: str,
         FamPlex, or 'UP' for Uniprot.
     id_ : str
         Identifier for a term within namespace.
+    max_depth : Optional[int]
+        If given, terms more than max_depth edges below the input term are
+        not included. Default: None
+    max_nodes : Optional[int]
+        If given, terms are expanded in breadth first order only as long as
+        the number of distinct subtrees in the representation stays at most
+        max_nodes. Default: None
 
     Returns
     -------
@@ -406,20 +946,165 @@ def dict_representation(namespace: str,
         {('FPLX', 'ESR'): [({('HGNC', 'ESR1'): []}, 'isa'),
                            ({('HGNC', 'ESR2'): []}, 'isa')]}
 
+        The value is None instead of a list for terms that have children
+        which were left out because of max_depth or max_nodes. Each subtree
+        is built only once: a term appearing below several others, such as
+        a subunit shared by several complexes, is represented by the same
+        dictionary object in each place. The returned structure should
+        therefore not be modified.
+
+    Raises
+    ------
+    ValueError
+        If (namespace, id_) does not correspond to a term in FamPlex.
+    """
+    root, plan = _expansion_plan(namespace, id_, max_depth, max_nodes)
+    built: Dict[Tuple[Tuple[str, str], int], dict] = {}
+    # Iterative post-order traversal so that each subtree is built after,
+    # and from, the subtrees of its children.
+    stack = [(root, False)]
+    while stack:
+        state, expanded = stack.pop()
+        if state in built:
+            continue
+        children = plan[state]
+        if children is None:
+            built[state] = {state[0]: None}
+        elif expanded:
+            built[state] = {state[0]: [(built[child], relation)
+                                       for child, relation in children]}
+        else:
+            stack.append((state, True))
+            stack.extend((child, False) for child, _ in children
+                         if child not in built)
+    return built[root]
+
+
+def iter_json_representation(namespace: str, id_: str,
+                             max_depth: Optional[int] = None,
+                             max_nodes: Optional[int] = None) -> \
+        Generator[str, None, None]:
+    """Stream a JSON representation of the structure of a FamPlex term
+
+    Produces the same tree as :func:`dict_representation` as JSON text in
+    small chunks, without building the nested structure in memory. Each
+    term is an object of the form
+
+    {"namespace": "FPLX", "id": "ESR", "children": [...]}
+
+    where each child object additionally has a "relation" key. "children"
+    is null for terms whose children were left out because of max_depth or
+    max_nodes.
+
+    Parameters
+    ----------
+    namespace : str
+        Namespace for a term. This should be one of 'HGNC', 'FPLX' for
+        FamPlex, or 'UP' for Uniprot.
+    id_ : str
+        Identifier for a term within namespace.
+    max_depth : Optional[int]
+        As in :func:`dict_representation`. Default: None
+    max_nodes : Optional[int]
+        As in :func:`dict_representation`. Default: None
+
+    Returns
+    -------
+    generator
+        Generator of strings which concatenate to a JSON document. For
+        example, ''.join(iter_json_representation('FPLX', 'ESR')) or
+        write each chunk to a file or socket.
+
     Raises
     ------
     ValueError
         If (namespace, id_) does not correspond to a term in FamPlex.
     """
-    out: Dict[Tuple[str, str], List[Tuple[dict, str]]] = \
-        {(namespace, id_): []}
-    edges = _famplex_graph.child_edges(namespace, id_)
-    if not edges:
-        return out
-    for namespace2, id2, relation in edges:
-        out[(namespace, id_)].\
-            append((dict_representation(namespace2, id2), relation))
-    return out
+    root, plan = _expansion_plan(namespace, id_, max_depth, max_nodes)
+    # Stack of iterators over the children still to be written for each
+    # open term. Strings on the stack are closing brackets.
+    stack: List[Any] = [iter([(root, None)])]
+    first = True
+    while stack:
+        top = stack[-1]
+        if isinstance(top, str):
+            stack.pop()
+            yield top
+            continue
+        item = next(top, None)
+        if item is None:
+            stack.pop()
+            continue
+        state, relation = item
+        (ns, id2), children = state[0], plan[state]
+        chunk = '' if first else ', '
+        first = False
+        chunk += '{"namespace": %s, "id": %s' % (json.dumps(ns),
+                                                 json.dumps(id2))
+        if relation is not None:
+            chunk += ', "relation": %s' % json.dumps(relation)
+        if children is None:
+            yield chunk + ', "children": null}'
+        elif not children:
+            yield chunk + ', "children": []}'
+        else:
+            yield chunk + ', "children": ['
+            first = True
+            stack.append(']}')
+            stack.append(iter(children))
+
+
+def _expansion_plan(namespace: str, id_: str, max_depth: Optional[int],
+                    max_nodes: Optional[int]) -> \
+        Tuple[Tuple[Tuple[str, str], int],
+              Dict[Tuple[Tuple[str, str], int],
+                   Optional[List[Tuple[Tuple[Tuple[str, str], int], str]]]]]:
+    """Decide which terms to expand in a tree representation of a term
+
+    States are tuples of a term and its depth below the input term. Depth is
+    only tracked when max_depth is given, otherwise it is always 0 so that
+    all occurrences of a term share a single state.
+
+    Returns
+    -------
+    root : tuple
+        State of the input term.
+    plan : dict
+        Maps every state in the tree to a list of (child state, relation)
+        tuples, or to None if the term has children which are not included.
+    """
+    graph = _get_graph()
+    root = ((namespace, id_), 0)
+    plan: Dict[Tuple[Tuple[str, str], int],
+               Optional[List[Tuple[Tuple[Tuple[str, str], int], str]]]] = {}
+    included = {root}
+    queue = deque([root])
+    while queue:
+        state = queue.popleft()
+        node, depth = state
+        edges = graph.child_edges(*node)
+        if not edges:
+            plan[state] = []
+            continue
+        if max_depth is not None and depth >= max_depth:
+            plan[state] = None
+            continue
+        child_depth = depth + 1 if max_depth is not None else 0
+        children = [(((ns, id2), child_depth), relation)
+                    for ns, id2, relation in edges]
+        new_states = {child for child, _ in children
+                      if child not in included}
+        if max_nodes is not None and \
+                len(included) + len(new_states) > max_nodes:
+            plan[state] = None
+            continue
+        plan[state] = children
+        for child, _ in children:
+            if child in new_states:
+                queue.append(child)
+                new_states.discard(child)
+                included.add(child)
+    return root, plan
 
 
 def equivalences(fplx_id: str,
@@ -448,7 +1133,7 @@ def equivalences(fplx_id: str,
     ValueError
         If fplx_id an ID in the FamPlex ontology.
     """
-    equivs = _famplex_graph.equivalences(fplx_id)
+    equivs = _get_graph().equivalences(fplx_id)
     if namespaces is not None:
         equivs = [(namespace, id_) for namespace, id_ in equivs
                   if namespace in namespaces]
@@ -471,7 +1156,56 @@ def reverse_equivalences(namespace: str, id_: str) -> List[str]:
         List of FamPlex IDs for families or complexes equivalent to the
         term given by (namespace, id_)
     """
-    return _famplex_graph.reverse_equivalences(namespace, id_)
+    return _get_graph().reverse_equivalences(namespace, id_)
+
+
+def translate(namespace_from: str, id_: str, namespace_to: str) -> List[str]:
+    """Translate an identifier into equivalent identifiers in a namespace
+
+    Two terms are equivalent if they are equivalent to the same FamPlex
+    entity, so that for example a BEL family can be translated directly to
+    an HGNC gene group. Use 'FPLX' as either namespace to translate from or
+    to FamPlex itself.
+
+    Parameters
+    ----------
+    namespace_from : str
+        Namespace of the term to translate, for example 'BEL'.
+    id_ : str
+        Identifier of the term within namespace_from.
+    namespace_to : str
+        Namespace to translate into, for example 'HGNC_GROUP'.
+
+    Returns
+    -------
+    list
+        Identifiers of equivalent terms in namespace_to. Empty if there are
+        none, including when the term is not known to FamPlex.
+    """
+    return _get_graph().translate(namespace_from, id_, namespace_to)
+
+
+def translate_many(namespace_from: str, ids: Iterable[str],
+                   namespace_to: str) -> List[List[str]]:
+    """Translate many identifiers into equivalent identifiers in a namespace
+
+    Parameters
+    ----------
+    namespace_from : str
+        Namespace of the terms to translate.
+    ids : iterable of str
+        Identifiers of terms within namespace_from, for example a column of
+        a table.
+    namespace_to : str
+        Namespace to translate into.
+
+    Returns
+    -------
+    list
+        For each identifier, the list of identifiers returned by
+        :func:`translate`.
+    """
+    return _get_graph().translate_many(namespace_from, ids, namespace_to)
 
 
 def all_root_terms() -> List[Tuple[str, str]]:
@@ -484,4 +1218,132 @@ def all_root_terms() -> List[Tuple[str, str]]:
         top level families and complexes in FamPlex. List is in alphabetical
         order by id.
     """
-    return _famplex_graph.root_classes
+    return _get_graph().root_classes
+
+
+def ground(text: str) -> Optional[Dict[str, str]]:
+    """Return grounding of an agent text from the FamPlex grounding map
+
+    Texts not in the grounding map are matched ignoring case, hyphens,
+    spaces and underscores and whether Greek letters are spelled out. See
+    :class:`famplex.grounding.GroundingIndex`.
+
+    Parameters
+    ----------
+    text : str
+        An agent text.
+
+    Returns
+    -------
+    dict or None
+        INDRA style db_refs dictionary of the matching grounding map entry,
+        or None if there is no unambiguous match or the matching entry is
+        explicitly ungrounded. The dictionary is shared and must not be
+        modified.
+    """
+    return _get_grounding_index().ground(text)
+
+
+def ground_many(texts: Iterable[str]) -> List[Optional[Dict[str, str]]]:
+    """Return groundings of many agent texts
+
+    Parameters
+    ----------
+    texts : iterable of str
+        Agent texts.
+
+    Returns
+    -------
+    list
+        Grounding of each text as returned by :func:`ground`.
+    """
+    return _get_grounding_index().ground_many(texts)
+
+
+def ground_fuzzy(text: str, max_distance: int = 1,
+                 limit: Optional[int] = 10) -> \
+        List[Tuple[Dict[str, str], int]]:
+    """Return groundings of grounding map texts similar to an agent text
+
+    See :meth:`famplex.grounding.GroundingIndex.ground_fuzzy`.
+
+    Parameters
+    ----------
+    text : str
+        An agent text.
+    max_distance : Optional[int]
+        Largest edit distance between normalized texts. Default: 1
+    limit : Optional[int]
+        Largest number of candidates returned. If None, all are returned.
+        Default: 10
+
+    Returns
+    -------
+    list
+        List of tuples (db_refs, distance) sorted by distance. A text found
+        by :func:`ground` is the only candidate, at distance 0.
+    """
+    return _get_grounding_index().ground_fuzzy(text, max_distance, limit)
+
+
+def grounding_texts(namespace: str, id_: str) -> List[str]:
+    """Return the texts in the FamPlex grounding map that ground to a term
+
+    This is the reverse of :func:`ground`, useful for example to expand a
+    query for a term to all of its synonyms.
+
+    Parameters
+    ----------
+    namespace : str
+        Namespace of a term, for example 'FPLX', 'HGNC' or 'UP'.
+    id_ : str
+        Identifier of a term within namespace.
+
+    Returns
+    -------
+    list
+        Texts whose groundings include (namespace, id_), in the order of
+        the grounding map. Empty if there are none.
+    """
+    return _get_grounding_index().texts(namespace, id_)
+
+
+def strip_gene_prefix(text: str) -> Tuple[str, Optional[str]]:
+    """Remove a prefix or suffix listed in gene_prefixes.csv from a text
+
+    See :class:`famplex.prefixes.GenePrefixStripper`.
+
+    Parameters
+    ----------
+    text : str
+        A text, for example an agent text found by named entity
+        recognition such as 'GST-AKT1' or 'AKT1 siRNA'.
+
+    Returns
+    -------
+    core : str
+        Text with the affix removed, or the text itself if it matches no
+        pattern.
+    category : str or None
+        Category of the matching pattern, for example 'experimental
+        context' or 'protein state', or None if no pattern matches.
+    """
+    return _get_gene_prefix_stripper().strip(text)
+
+
+def strip_gene_prefixes(texts: Iterable[str]) -> \
+        List[Tuple[str, Optional[str]]]:
+    """Remove prefixes and suffixes listed in gene_prefixes.csv from texts
+
+    Parameters
+    ----------
+    texts : iterable of str
+        Texts to strip.
+
+    Returns
+    -------
+    list
+        Tuples (core, category) as returned by :func:`strip_gene_prefix`
+        for each text.
+    """
+    return _get_gene_prefix_stripper().strip_many(texts)
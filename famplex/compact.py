@@ -0,0 +1,222 @@
+"""Compact array backed adjacency structures for the FamPlex graph."""
+from array import array
+from typing import Any, Container, Dict, Generator, Iterator, List, \
+    Optional, Sequence, Tuple
+
+
+__all__ = ['CompactAdjacency', 'RELATION_TYPES', 'intern_nodes']
+
+
+# Relation types are stored as small integer codes giving the position of
+# the relation in this tuple.
+RELATION_TYPES = ('isa', 'partof')
+
+
+def intern_nodes(*graphs: Dict[Tuple[str, str],
+                               List[Tuple[str, str, str]]]) -> \
+        Tuple[List[Tuple[str, str]], Dict[Tuple[str, str], int]]:
+    """Assign an integer to every node appearing in the given graphs
+
+    Parameters
+    ----------
+    *graphs : dict
+        Graphs in the adjacency list representation used by
+        :class:`famplex.graph.FamplexGraph`.
+
+    Returns
+    -------
+    nodes : list
+        List of (namespace, id) tuples. The integer assigned to a node is its
+        position in this list.
+    index : dict
+        Dictionary mapping (namespace, id) tuples to their integers.
+    """
+    nodes: List[Tuple[str, str]] = []
+    index: Dict[Tuple[str, str], int] = {}
+    for graph in graphs:
+        for node, edges in graph.items():
+            for term in [node] + [(ns, id_) for ns, id_, _ in edges]:
+                if term not in index:
+                    index[term] = len(nodes)
+                    nodes.append(term)
+    return nodes, index
+
+
+class CompactAdjacency(object):
+    """Read only adjacency list stored in compressed sparse row form
+
+    The edges leaving node i are stored at positions offsets[i] through
+    offsets[i + 1] of the targets and relations arrays. Targets are integer
+    node ids and relations are indices into :data:`RELATION_TYPES`. Node ids
+    are shared between the forward and reverse graphs so that a single
+    interned node table is needed.
+
+    Instances support the subset of the mapping interface used by
+    :class:`famplex.graph.FamplexGraph`. Edge lists are materialized as lists
+    of (namespace, id, relation_type) tuples on access, preserving the order
+    in which they were given. A node is considered present in the graph
+    if it has at least one edge, matching the dictionary representation in
+    which nodes without edges have no key.
+
+    Parameters
+    ----------
+    nodes : sequence
+        Interned node table. The (namespace, id) tuple of node i is nodes[i].
+    index : mapping
+        Mapping from nodes to integers supporting get.
+    offsets : sequence of int
+        Array of length len(nodes) + 1 of offsets into targets and relations.
+    targets : sequence of int
+        Target node ids of all edges.
+    relations : sequence of int
+        Relation type codes of all edges.
+    """
+    def __init__(self, nodes: Sequence[Tuple[str, str]],
+                 index: Any,
+                 offsets: Sequence[int], targets: Sequence[int],
+                 relations: Sequence[int]):
+        self._nodes = nodes
+        self._index = index
+        self._offsets = offsets
+        self._targets = targets
+        self._relations = relations
+        # traverse uses offsets and targets restricted to the requested
+        # relation types. Each restriction is built the first time a
+        # traversal with its relation types is made.
+        self._partitions: Dict[Tuple[bool, ...],
+                               Tuple[Sequence[int], Sequence[int]]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_partitions']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._partitions = {}
+
+    @classmethod
+    def from_graph(cls, graph: Dict[Tuple[str, str],
+                                    List[Tuple[str, str, str]]],
+                   nodes: List[Tuple[str, str]],
+                   index: Dict[Tuple[str, str], int]) -> 'CompactAdjacency':
+        """Build from a graph in the dictionary representation
+
+        Parameters
+        ----------
+        graph : dict
+            Graph in the adjacency list representation used by
+            :class:`famplex.graph.FamplexGraph`.
+        nodes : list
+            Interned node table as returned by :func:`intern_nodes`.
+        index : dict
+            Mapping from nodes to integers as returned by
+            :func:`intern_nodes`.
+
+        Returns
+        -------
+        CompactAdjacency
+        """
+        offsets = array('l', [0] * (len(nodes) + 1))
+        targets = array('l')
+        relations = array('B')
+        for i, node in enumerate(nodes):
+            for ns, id_, rel in graph.get(node, []):
+                targets.append(index[(ns, id_)])
+                relations.append(RELATION_TYPES.index(rel))
+            offsets[i + 1] = len(targets)
+        return cls(nodes, index, offsets, targets, relations)
+
+    def _edges(self, i: int) -> List[Tuple[str, str, str]]:
+        nodes, targets, relations = self._nodes, self._targets, \
+            self._relations
+        return [nodes[targets[j]] + (RELATION_TYPES[relations[j]],)
+                for j in range(self._offsets[i], self._offsets[i + 1])]
+
+    def _has_edges(self, i: int) -> bool:
+        return self._offsets[i + 1] > self._offsets[i]
+
+    def get(self, node: Tuple[str, str],
+            default: Optional[List[Tuple[str, str, str]]] = None) -> \
+            Optional[List[Tuple[str, str, str]]]:
+        i = self._index.get(node)
+        if i is None or not self._has_edges(i):
+            return default
+        return self._edges(i)
+
+    def __getitem__(self, node: Tuple[str, str]) -> \
+            List[Tuple[str, str, str]]:
+        edges = self.get(node)
+        if edges is None:
+            raise KeyError(node)
+        return edges
+
+    def __contains__(self, node: object) -> bool:
+        i = self._index.get(node)  # type: ignore
+        return i is not None and self._has_edges(i)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        for i, node in enumerate(self._nodes):
+            if self._has_edges(i):
+                yield node
+
+    def __len__(self) -> int:
+        return sum(1 for i in range(len(self._nodes)) if self._has_edges(i))
+
+    def items(self) -> Iterator[Tuple[Tuple[str, str],
+                                      List[Tuple[str, str, str]]]]:
+        for i, node in enumerate(self._nodes):
+            if self._has_edges(i):
+                yield node, self._edges(i)
+
+    def traverse(self, source: Tuple[str, str],
+                 relation_types: Container[str]) -> \
+            Generator[Tuple[str, str], None, None]:
+        """Breadth first traversal over integer node ids
+
+        Visits nodes in exactly the same order as
+        :meth:`famplex.graph.FamplexGraph.traverse` does on the equivalent
+        dictionary backed graph. The traversal is completed when the first
+        node is requested.
+        """
+        start = self._index.get(source)
+        if start is None:
+            yield source
+            return
+        offsets, targets = self._partition(relation_types)
+        # Traversals typically reach few nodes, so a set of visited nodes
+        # is cheaper than a flag for every node in the graph. The queue
+        # keeps every node reached, in breadth first order, and the nodes
+        # are yielded once it is complete, which is faster than suspending
+        # the traversal at every node.
+        visited = {start}
+        queue = [start]
+        for i in queue:
+            for target in targets[offsets[i]:offsets[i + 1]]:
+                if target not in visited:
+                    queue.append(target)
+                    visited.add(target)
+        nodes = self._nodes
+        for i in queue:
+            yield nodes[i]
+
+    def _partition(self, relation_types: Container[str]) -> \
+            Tuple[Sequence[int], Sequence[int]]:
+        """Return offsets and targets of the edges of some relation types"""
+        allowed = ('isa' in relation_types, 'partof' in relation_types)
+        if allowed == (True, True):
+            return self._offsets, self._targets
+        partition = self._partitions.get(allowed)
+        if partition is None:
+            offsets, targets, relations = self._offsets, self._targets, \
+                self._relations
+            new_offsets = array('l', [0] * len(offsets))
+            new_targets = array('l')
+            for i in range(len(offsets) - 1):
+                for j in range(offsets[i], offsets[i + 1]):
+                    if allowed[relations[j]]:
+                        new_targets.append(targets[j])
+                new_offsets[i + 1] = len(new_targets)
+            partition = self._partitions[allowed] = (new_offsets,
+                                                     new_targets)
+        return partition
@@ -1,9 +1,21 @@
 """Work with the graph of FamPlex entities and relations."""
-from typing import Container, Dict, Generator, List, Tuple
+import sys
+import time
+from typing import Container, Dict, FrozenSet, Generator, Iterable, List, \
+    Optional, Sequence, Set, Tuple, Union
 
 from collections import defaultdict, deque
 
-from famplex.load import load_entities, load_equivalences, load_relations
+from famplex.compact import CompactAdjacency, intern_nodes
+from famplex.load import iter_entities, iter_equivalences, iter_relations
+from famplex.mapped import load_mapped_state, write_mapped_graph
+from famplex.snapshot import load_snapshot, resources_hash, save_snapshot
+
+
+# Attributes written to and restored from graph snapshots
+_SNAPSHOT_ATTRIBUTES = ['_graph', '_reverse_graph', 'root_classes',
+                        '_root_class_mapping', '_equivalences',
+                        '_reverse_equivalences']
 
 
 class FamplexGraph(object):
@@ -37,8 +49,81 @@ class FamplexGraph(object):
     ----------
     root_classes : set
         Set of top level families and complexes in the FamPlex ontology
+    closure_stats : dict or None
+        Build time in seconds, approximate memory use in bytes and number of
+        stored (term, ancestor) pairs for the transitive closure index. None
+        if the closure index has not been built.
+
+    Parameters
+    ----------
+    closure : Optional[bool]
+        If True, precompute the transitive closure of the isa, partof and
+        combined isa/partof relations at construction time so that
+        :meth:`relation` answers with a single set lookup instead of a
+        traversal. The index can also be built later with
+        :meth:`build_closure`. Default: False
+    compact : Optional[bool]
+        If True, store the forward and reverse graphs as integer interned
+        :class:`famplex.compact.CompactAdjacency` arrays in compressed sparse
+        row form instead of dictionaries of lists of tuples. This uses
+        considerably less memory and speeds up traversal. Results of all
+        methods are identical for both representations. Default: False
+    cache : Optional[bool]
+        If True, load the constructed graph from a binary snapshot in
+        :data:`famplex.locations.CACHE_PATH` when one exists for the current
+        contents of the resource files, and write such a snapshot after
+        building the graph otherwise. See :mod:`famplex.snapshot`.
+        Default: False
+    mapped_path : Optional[str]
+        Path to a file written by :meth:`write_mapped`. If given, the graph
+        is opened from this file with a memory map instead of being built
+        from the resource files. Processes opening the same file share one
+        physical copy of the ontology. Takes precedence over compact and
+        cache. Default: None
     """
-    def __init__(self):
+    def __init__(self, closure: bool = False, compact: bool = False,
+                 cache: bool = False, mapped_path: Optional[str] = None):
+        self.__error_message = 'Given input is not in the FamPlex ontology.'
+        state = None
+        if mapped_path is not None:
+            state = load_mapped_state(mapped_path)
+        elif cache:
+            key = resources_hash()
+            state = load_snapshot(key, compact)
+        if state is None:
+            self._build(compact)
+            if cache:
+                save_snapshot(key, compact, {name: getattr(self, name)
+                                             for name in _SNAPSHOT_ATTRIBUTES})
+        else:
+            self.__dict__.update(state)
+
+        self._closure: Optional[Dict[Tuple[str, ...],
+                                     Dict[Tuple[str, str],
+                                          FrozenSet[Tuple[str, str]]]]] = None
+        self.closure_stats: Optional[Dict[str, float]] = None
+        if closure:
+            self.build_closure()
+        # Depths of terms below the top level are computed on first use.
+        self._depths: Optional[Dict[Tuple[str, str], int]] = None
+        # For the dictionary representation, traverse uses neighbor lists
+        # restricted to the requested relation types. Each is built the
+        # first time a traversal in its direction with its relation types
+        # is made, so that loading a snapshot stays cheap.
+        self._neighbors: Dict[Tuple[str, Tuple[str, ...]],
+                              Dict[Tuple[str, str],
+                                   List[Tuple[str, str]]]] = {}
+        # Leaf member indexes are built on demand, one for each combination
+        # of relation types. See individual_members.
+        self._leaf_members: Dict[Tuple[str, ...],
+                                 Dict[Tuple[str, str],
+                                      Tuple[Tuple[str, str], ...]]] = {}
+        # Cross reference indexes are built on demand, one for each pair of
+        # source and target namespaces. See translate.
+        self._xrefs: Dict[Tuple[str, str], Dict[str, Tuple[str, ...]]] = {}
+
+    def _build(self, compact: bool) -> None:
+        """Construct graph and indexes from the FamPlex resource files"""
         # Graphs are stored internally as a dictionary mapping tuples of
         # the form (namespace, id) to a list of tuples of the form
         # (namespace, id, relation_type). This is a variant of the adjacency
@@ -48,14 +133,13 @@ class FamplexGraph(object):
         graph = defaultdict(list)
         # Contains reversed isa and partof relationships
         reverse_graph = defaultdict(list)
-        relations = load_relations()
         left_set = set()
         right_set = set()
         # Loop through table populating edges of the above graphs.
         # By looking at the set of all terms that appear on the right in the
         # relations.csv table which do not appear on the left we can identify
         # the top level families and complexes within famplex.
-        for namespace1, id1, relation, namespace2, id2 in relations:
+        for namespace1, id1, relation, namespace2, id2 in iter_relations():
             graph[(namespace1, id1)].append((namespace2, id2, relation))
             reverse_graph[(namespace2, id2)].\
                 append((namespace1, id1, relation))
@@ -71,33 +155,24 @@ class FamplexGraph(object):
             reverse_graph[node] = sorted(edges,
                                          key=lambda x: (x[0].lower(),
                                                         x[1].lower()))
-        self._graph: Dict[Tuple[str, str], List[Tuple[str, str, str]]] = graph
+        self._graph: Union[Dict[Tuple[str, str],
+                                List[Tuple[str, str, str]]],
+                           CompactAdjacency] = graph
 
-        self._reverse_graph: Dict[Tuple[str, str],
-                                  List[Tuple[str, str, str]]] = reverse_graph
-        root_class_mapping = defaultdict(list)
+        self._reverse_graph: Union[Dict[Tuple[str, str],
+                                        List[Tuple[str, str, str]]],
+                                   CompactAdjacency] = reverse_graph
         root_classes = sorted(right_set - left_set, key=lambda x: x[1].lower())
-        # Build up an dictionary mapping terms to the top level families
-        # or complexes to which they belong. Families and complexes can overlap
-        # so there can be multiple top level terms above a given term.
-        for entry in root_classes:
-            for node in self.traverse(entry, ['isa', 'partof'],
-                                      direction='down'):
-                root_class_mapping[node].append(entry)
-        root_class_mapping = dict(root_class_mapping)
-        entities = load_entities()
-        for entity in entities:
+        root_class_mapping = _root_class_mapping(reverse_graph, graph,
+                                                 root_classes)
+        for entity in iter_entities():
             entry = ('FPLX', entity)
             if entry not in root_class_mapping:
                 root_class_mapping[entry] = [entry]
-        for node, roots in root_class_mapping.items():
-            root_class_mapping[node] = sorted(roots,
-                                              key=lambda x: (x[0].lower(),
-                                                             x[1].lower()))
 
         equivalences = defaultdict(list)
         reverse_equivalences = defaultdict(list)
-        for ns, id_, fplx_id in load_equivalences():
+        for ns, id_, fplx_id in iter_equivalences():
             equivalences[fplx_id].append((ns, id_))
             reverse_equivalences[(ns, id_)].append(fplx_id)
         equivalences = dict(equivalences)
@@ -112,7 +187,12 @@ class FamplexGraph(object):
         self._equivalences: Dict[str, List[Tuple[str, str]]] = equivalences
         self._reverse_equivalences: Dict[Tuple[str, str], List[str]] = \
             reverse_equivalences
-        self.__error_message = 'Given input is not in the FamPlex ontology.'
+
+        if compact:
+            nodes, index = intern_nodes(graph, reverse_graph)
+            self._graph = CompactAdjacency.from_graph(graph, nodes, index)
+            self._reverse_graph = \
+                CompactAdjacency.from_graph(reverse_graph, nodes, index)
 
     def in_famplex(self, namespace: str, id_: str) -> bool:
         """Returns True if input term is a member of the FamPlex ontology.
@@ -294,6 +374,78 @@ class FamplexGraph(object):
         equiv = [] if equiv is None else equiv
         return equiv
 
+    def translate(self, namespace_from: str, id_: str,
+                  namespace_to: str) -> List[str]:
+        """Translate an identifier to equivalent identifiers in a namespace
+
+        Two terms are equivalent if they are listed as equivalent to the
+        same FamPlex entity. A FamPlex entity is equivalent to the terms
+        listed as equivalent to it and to itself.
+
+        Parameters
+        ----------
+        namespace_from : str
+            Namespace of the term to translate, for example 'BEL' or 'FPLX'.
+        id_ : str
+            Identifier of the term within namespace_from.
+        namespace_to : str
+            Namespace to translate into, for example 'HGNC_GROUP'.
+
+        Returns
+        -------
+        list
+            Identifiers of equivalent terms in namespace_to, without
+            duplicates. Empty if there are none, including when the input
+            term is not known to FamPlex.
+        """
+        if namespace_from == namespace_to == 'FPLX':
+            return [id_] if self.in_famplex('FPLX', id_) else []
+        index = self._xref_index(namespace_from, namespace_to)
+        return list(index.get(id_, ()))
+
+    def translate_many(self, namespace_from: str, ids: Iterable[str],
+                       namespace_to: str) -> List[List[str]]:
+        """Translate identifiers to equivalent identifiers in a namespace
+
+        Parameters
+        ----------
+        namespace_from : str
+            Namespace of the terms to translate.
+        ids : iterable of str
+            Identifiers of terms within namespace_from.
+        namespace_to : str
+            Namespace to translate into.
+
+        Returns
+        -------
+        list
+            For each identifier, the list returned by :meth:`translate`.
+        """
+        if namespace_from == namespace_to == 'FPLX':
+            return [self.translate('FPLX', id_, 'FPLX') for id_ in ids]
+        index = self._xref_index(namespace_from, namespace_to)
+        return [list(index.get(id_, ())) for id_ in ids]
+
+    def _xref_index(self, namespace_from: str,
+                    namespace_to: str) -> Dict[str, Tuple[str, ...]]:
+        """Map ids in one namespace to equivalent ids in another"""
+        key = (namespace_from, namespace_to)
+        index = self._xrefs.get(key)
+        if index is not None:
+            return index
+        targets_of: Dict[str, List[str]] = defaultdict(list)
+        for fplx_id, equivs in self._equivalences.items():
+            sources = [fplx_id] if namespace_from == 'FPLX' else \
+                [id_ for ns, id_ in equivs if ns == namespace_from]
+            targets = [fplx_id] if namespace_to == 'FPLX' else \
+                [id_ for ns, id_ in equivs if ns == namespace_to]
+            for source in sources:
+                targets_of[source].extend(targets)
+        index = {source: tuple(dict.fromkeys(targets))
+                 for source, targets in targets_of.items() if targets}
+        self._xrefs[key] = index
+        return index
+
     def relation(self, namespace1: str, id1: str,
                  namespace2: str, id2: str,
                  relation_types: Container[str]) -> bool:
@@ -328,6 +480,12 @@ class FamplexGraph(object):
         roots2 = self._root_class_mapping.get((namespace2, id2))
         if roots1 is None or roots2 is None:
             return False
+        if self._closure is not None:
+            node1, node2 = (namespace1, id1), (namespace2, id2)
+            if node1 == node2:
+                return True
+            ancestors = self._closure.get(_relation_key(relation_types), {})
+            return node2 in ancestors.get(node1, ())
         if set(roots1) & set(roots2):
             node1, node2 = (namespace1, id1), (namespace2, id2)
             for node in self.traverse(node1, relation_types,
@@ -336,6 +494,388 @@ class FamplexGraph(object):
                     return True
         return False
 
+    def individual_members(self, namespace: str, id_: str,
+                           relation_types: Container[str]) -> \
+            List[Tuple[str, str]]:
+        """Returns terms beneath the input that have no children themselves
+
+        The first call for a given combination of relation types builds an
+        index of the members of every term in a single bottom up pass over
+        the graph. Subsequent calls are lookups.
+
+        Parameters
+        ----------
+        namespace : str
+            Namespace for a term. This should be one of 'HGNC', 'FPLX' for
+            FamPlex, or 'UP' for Uniprot.
+        id_ : str
+            Identifier for a term within namespace. See the FamplexGraph
+            class Docstring for more info.
+        relation_types : container
+            Only edges with these relation types are followed, and a term is
+            considered to have no children if it has no children through
+            these relation types.
+
+        Returns
+        -------
+        list
+            List of terms sorted in case insensitive alphabetical order,
+            first by namespace and then by id.
+
+        Raises
+        ------
+        ValueError
+            If (namespace, id_) does not correspond to a term in FamPlex.
+        """
+        self.raise_value_error_if_not_in_famplex(namespace, id_)
+        key = _relation_key(relation_types)
+        index = self._leaf_members.get(key)
+        if index is None:
+            index = self._leaf_member_index(key)
+            self._leaf_members[key] = index
+        return list(index.get((namespace, id_), ()))
+
+    def _leaf_member_index(self, relation_types: Container[str]) -> \
+            Dict[Tuple[str, str], Tuple[Tuple[str, str], ...]]:
+        """Map each term with children to its sorted tuple of leaf members"""
+        reverse_graph = self._reverse_graph
+        members: Dict[Tuple[str, str], FrozenSet[Tuple[str, str]]] = {}
+        for start in reverse_graph:
+            if start in members:
+                continue
+            # Iterative post-order depth first search downwards. A term's
+            # members are its childless children together with the members
+            # of its other children.
+            stack = [(start, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if node in members:
+                    continue
+                children = [(ns, id_) for ns, id_, rel
+                            in reverse_graph.get(node, [])
+                            if rel in relation_types]
+                if expanded:
+                    result = set()
+                    for child in children:
+                        child_members = members.get(child)
+                        if child_members:
+                            result |= child_members
+                        else:
+                            result.add(child)
+                    members[node] = frozenset(result)
+                else:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in children
+                                 if child not in members)
+        return {node: tuple(sorted(leaves, key=lambda x: (x[0].lower(),
+                                                          x[1].lower())))
+                for node, leaves in members.items() if leaves}
+
+    def relation_many(self, pairs: Iterable[Tuple[Tuple[str, str],
+                                                  Tuple[str, str]]],
+                      relation_types: Container[str]) -> List[bool]:
+        """Determine if relations hold for many pairs of terms
+
+        Equivalent to calling :meth:`relation` for each pair, but the set of
+        terms above each distinct first term is computed only once and
+        reused for all pairs sharing that first term.
+
+        Parameters
+        ----------
+        pairs : iterable
+            Pairs of terms of the form ((namespace1, id1), (namespace2,
+            id2)). A NumPy array of shape (n, 2, 2) may also be given.
+        relation_types : container
+            Relation types as in :meth:`relation`.
+
+        Returns
+        -------
+        list
+            List of booleans, one for each input pair, which is True if the
+            first term of the pair has one of the specified relations with
+            the second.
+        """
+        ancestor_sets: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+        output = []
+        for source, target in pairs:
+            source, target = tuple(source), tuple(target)
+            ancestors = ancestor_sets.get(source)
+            if ancestors is None:
+                if not self.in_famplex(*source):
+                    ancestors = set()
+                else:
+                    ancestors = self._ancestor_set(source, relation_types)
+                ancestor_sets[source] = ancestors
+            output.append(target in ancestors)
+        return output
+
+    def refinement_pairs(self, terms: Sequence[Tuple[str, str]],
+                         relation_types: Container[str],
+                         rows: Optional[Iterable[int]] = None) -> \
+            List[Tuple[int, int]]:
+        """Returns all pairs of positions of terms related to each other
+
+        Rather than testing all pairs, the set of terms above each distinct
+        input term is computed once and looked up in an index from terms to
+        the positions at which they occur in the input. The cost is
+        therefore proportional to the number of input terms times the
+        number of terms above them, plus the size of the output.
+
+        Parameters
+        ----------
+        terms : sequence
+            Terms of the form (namespace, id). Terms not in FamPlex are
+            allowed and are not related to any term.
+        relation_types : container
+            Relation types as in :meth:`relation`.
+        rows : Optional[iterable]
+            If given, only pairs whose first position is in rows are
+            returned. Used to split work between processes. Default: None
+
+        Returns
+        -------
+        list
+            Sorted list of pairs (i, j) with i != j such that
+            :meth:`relation` holds from terms[i] to terms[j]. Positions
+            holding equal terms are related to each other.
+        """
+        terms = [tuple(term) for term in terms]
+        positions: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for j, term in enumerate(terms):
+            positions[term].append(j)
+        ancestor_sets: Dict[Tuple[str, str], List[int]] = {}
+        output = []
+        for i in (range(len(terms)) if rows is None else rows):
+            term = terms[i]
+            related = ancestor_sets.get(term)
+            if related is None:
+                related = []
+                if self.in_famplex(*term):
+                    for ancestor in self._ancestor_set(term,
+                                                       relation_types):
+                        related.extend(positions.get(ancestor, ()))
+                related.sort()
+                ancestor_sets[term] = related
+            output.extend((i, j) for j in related if j != i)
+        return output
+
+    def _ancestor_set(self, node: Tuple[str, str],
+                      relation_types: Container[str]) -> Set[Tuple[str, str]]:
+        """Return set of terms above a term in FamPlex, including the term"""
+        if self._closure is not None:
+            ancestors = set(self._closure.get(_relation_key(relation_types),
+                                              {}).get(node, ()))
+            ancestors.add(node)
+            return ancestors
+        return set(self.traverse(node, relation_types, direction='up'))
+
+    def depth(self, namespace: str, id_: str) -> int:
+        """Returns the level of a term in the FamPlex ontology
+
+        Parameters
+        ----------
+        namespace : str
+            Namespace for a term. This should be one of 'HGNC', 'FPLX' for
+            FamPlex, or 'UP' for Uniprot.
+        id_ : str
+            Identifier for a term within namespace. See the FamplexGraph
+            class Docstring for more info.
+
+        Returns
+        -------
+        int
+            Length of the longest path of isa and partof edges from the term
+            up to a top level term. Top level terms have depth 0. The depths
+            of all terms are computed together on first use.
+
+        Raises
+        ------
+        ValueError
+            If (namespace, id_) does not correspond to a term in FamPlex.
+        """
+        self.raise_value_error_if_not_in_famplex(namespace, id_)
+        if self._depths is None:
+            self._depths = self._depth_index()
+        return self._depths.get((namespace, id_), 0)
+
+    def _depth_index(self) -> Dict[Tuple[str, str], int]:
+        """Map each term with parents to its depth below the top level"""
+        graph = self._graph
+        depths: Dict[Tuple[str, str], int] = {}
+        for start in graph:
+            if start in depths:
+                continue
+            stack = [(start, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if node in depths:
+                    continue
+                parents = [(ns, id_) for ns, id_, _ in graph.get(node, [])]
+                if expanded:
+                    depths[node] = max((depths.get(parent, 0) + 1
+                                        for parent in parents), default=0)
+                else:
+                    stack.append((node, True))
+                    stack.extend((parent, False) for parent in parents
+                                 if parent not in depths)
+        return depths
+
+    def common_ancestors(self, terms: Iterable[Tuple[str, str]],
+                         relation_types: Container[str]) -> \
+            List[Tuple[str, str]]:
+        """Returns terms at or above every one of the given terms
+
+        Parameters
+        ----------
+        terms : iterable
+            Terms of the form (namespace, id). At least one term must be
+            given.
+        relation_types : container
+            Relation types to follow upward as in :meth:`traverse`.
+
+        Returns
+        -------
+        list
+            List of terms that are equal to or above each input term. An
+            input term that is above all other input terms is therefore
+            included. Terms are sorted from most to least specific, by
+            decreasing :meth:`depth` and then in case insensitive
+            alphabetical order, first by namespace and then by id.
+
+        Raises
+        ------
+        ValueError
+            If no terms are given or any term is not in FamPlex.
+        """
+        common = self._common_ancestor_set(terms, relation_types)
+        return self._sorted_by_depth(common)
+
+    def lowest_common_ancestors(self, terms: Iterable[Tuple[str, str]],
+                                relation_types: Container[str]) -> \
+            List[Tuple[str, str]]:
+        """Returns the most specific terms at or above all given terms
+
+        Parameters
+        ----------
+        terms : iterable
+            Terms of the form (namespace, id). At least one term must be
+            given.
+        relation_types : container
+            Relation types to follow upward as in :meth:`traverse`.
+
+        Returns
+        -------
+        list
+            Terms from :meth:`common_ancestors` that are not above any other
+            common ancestor. There can be more than one such term because
+            families and complexes can overlap. Sorted as in
+            :meth:`common_ancestors`.
+
+        Raises
+        ------
+        ValueError
+            If no terms are given or any term is not in FamPlex.
+        """
+        common = self._common_ancestor_set(terms, relation_types)
+        not_lowest: Set[Tuple[str, str]] = set()
+        for term in common:
+            ancestors = self._ancestor_set(term, relation_types)
+            ancestors.discard(term)
+            not_lowest |= ancestors
+        return self._sorted_by_depth(common - not_lowest)
+
+    def _common_ancestor_set(self, terms: Iterable[Tuple[str, str]],
+                             relation_types: Container[str]) -> \
+            Set[Tuple[str, str]]:
+        common: Optional[Set[Tuple[str, str]]] = None
+        for term in set(tuple(term) for term in terms):
+            self.raise_value_error_if_not_in_famplex(*term)
+            ancestors = self._ancestor_set(term, relation_types)
+            common = ancestors if common is None else common & ancestors
+        if common is None:
+            raise ValueError('At least one term must be given.')
+        return common
+
+    def _sorted_by_depth(self, terms: Iterable[Tuple[str, str]]) -> \
+            List[Tuple[str, str]]:
+        return sorted(terms, key=lambda x: (-self.depth(*x), x[0].lower(),
+                                            x[1].lower()))
+
+    def write_mapped(self, path: str) -> None:
+        """Write graph to a memory mappable file
+
+        The file can be opened with ``FamplexGraph(mapped_path=path)``. See
+        :mod:`famplex.mapped` for a description of the format.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file to write.
+        """
+        write_mapped_graph(self, path)
+
+    def build_closure(self) -> Dict[str, float]:
+        """Precompute transitive closures used to answer :meth:`relation`
+
+        One closure is built for each combination of relation types: isa
+        only, partof only, and both isa and partof. Each maps a term to the
+        frozenset of all terms above it. Calling this method again rebuilds
+        the index.
+
+        Returns
+        -------
+        dict
+            Dictionary with keys 'build_time' (seconds), 'memory'
+            (approximate size in bytes of the index containers, not counting
+            the term tuples which are shared with the graph) and 'num_pairs'
+            (total number of stored (term, ancestor) pairs). The same
+            dictionary is available afterwards as :attr:`closure_stats`.
+        """
+        start = time.perf_counter()
+        closure = {key: self._ancestor_closure(key)
+                   for key in [('isa',), ('partof',), ('isa', 'partof')]}
+        build_time = time.perf_counter() - start
+        memory = sys.getsizeof(closure)
+        num_pairs = 0
+        for ancestors in closure.values():
+            memory += sys.getsizeof(ancestors)
+            for ancestor_set in ancestors.values():
+                memory += sys.getsizeof(ancestor_set)
+                num_pairs += len(ancestor_set)
+        self._closure = closure
+        self.closure_stats = {'build_time': build_time, 'memory': memory,
+                              'num_pairs': num_pairs}
+        return self.closure_stats
+
+    def _ancestor_closure(self, relation_types: Container[str]) -> \
+            Dict[Tuple[str, str], FrozenSet[Tuple[str, str]]]:
+        """Map each term with parents to the frozenset of its ancestors"""
+        graph = self._graph
+        ancestors: Dict[Tuple[str, str], FrozenSet[Tuple[str, str]]] = {}
+        empty: FrozenSet[Tuple[str, str]] = frozenset()
+        for start in graph:
+            if start in ancestors:
+                continue
+            # Iterative post-order depth first search. A node is finalized
+            # once the ancestor sets of all of its parents are known.
+            stack = [(start, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if node in ancestors:
+                    continue
+                parents = [(ns, id_) for ns, id_, rel in graph.get(node, [])
+                           if rel in relation_types]
+                if expanded:
+                    result = set(parents)
+                    for parent in parents:
+                        result |= ancestors.get(parent, empty)
+                    ancestors[node] = frozenset(result)
+                else:
+                    stack.append((node, True))
+                    stack.extend((parent, False) for parent in parents
+                                 if parent not in ancestors)
+        return {node: anc for node, anc in ancestors.items() if anc}
+
     def traverse(self, source: Tuple[str, str],
                  relation_types: Container[str],
                  direction: str) -> Generator[Tuple[str, str], None, None]:
@@ -361,6 +901,11 @@ class FamplexGraph(object):
         generator
             Generator iterating through nodes in the traversal. The source node
             is included in the traversal.
+
+        Raises
+        ------
+        ValueError
+            If direction is not 'up' or 'down'.
         """
         if direction == 'down':
             graph = self._reverse_graph
@@ -368,16 +913,123 @@ class FamplexGraph(object):
             graph = self._graph
         else:
             raise ValueError
-        visited = {source}
-        queue = deque([source])
-        while queue:
-            node = queue.pop()
-            try:
-                children = graph[node]
-            except KeyError:
-                children = []
-            for ns, id_, rel in children:
-                if (ns, id_) not in visited and rel in relation_types:
-                    queue.appendleft((ns, id_))
-                    visited.add((ns, id_))
-            yield node
+        if isinstance(graph, CompactAdjacency):
+            return graph.traverse(source, relation_types)
+        # Use the partition holding exactly the edges of the requested
+        # relation types so that edges need not be filtered one by one.
+        key = (direction, _relation_key(relation_types))
+        neighbors = self._neighbors.get(key)
+        if neighbors is None:
+            neighbors = self._neighbors[key] = \
+                _partition_neighbors(graph, key[1])
+        return _traverse_neighbors(neighbors, source)
+
+
+def _root_class_mapping(reverse_graph: Dict[Tuple[str, str],
+                                            List[Tuple[str, str, str]]],
+                        graph: Dict[Tuple[str, str],
+                                    List[Tuple[str, str, str]]],
+                        root_classes: List[Tuple[str, str]]) -> \
+        Dict[Tuple[str, str], List[Tuple[str, str]]]:
+    """Map every term to the top level terms above it
+
+    Families and complexes can overlap so there can be multiple top level
+    terms above a given term. The sets of top level terms are propagated
+    downward in a single pass over the graph in topological order, each
+    term being processed once all of its parents have been. Sets are
+    represented as integer bitsets over the top level terms in sorted order
+    so that decoding a bitset directly gives a sorted list.
+
+    Raises
+    ------
+    ValueError
+        If the relations contain a cycle. The message lists the terms on
+        one of the cycles.
+    """
+    ordered_roots = sorted(root_classes, key=lambda x: (x[0].lower(),
+                                                        x[1].lower()))
+    masks = {root: 1 << i for i, root in enumerate(ordered_roots)}
+    remaining_parents = {node: len(edges) for node, edges in graph.items()}
+    queue = deque(root_classes)
+    while queue:
+        node = queue.popleft()
+        mask = masks[node]
+        for ns, id_, _ in reverse_graph.get(node, []):
+            child = (ns, id_)
+            masks[child] = masks.get(child, 0) | mask
+            remaining_parents[child] -= 1
+            if not remaining_parents[child]:
+                queue.append(child)
+    unvisited = [node for node, count in remaining_parents.items() if count]
+    if unvisited:
+        cycle = _find_cycle(graph, unvisited)
+        raise ValueError('Relations contain a cycle: %s' %
+                         ' -> '.join('%s:%s' % node for node in cycle))
+    mapping = {}
+    for node, mask in masks.items():
+        roots = []
+        while mask:
+            low = mask & -mask
+            roots.append(ordered_roots[low.bit_length() - 1])
+            mask ^= low
+        mapping[node] = roots
+    return mapping
+
+
+def _find_cycle(graph: Dict[Tuple[str, str], List[Tuple[str, str, str]]],
+                candidates: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Return a cycle, given terms which are on or below some cycle
+
+    Every such term has a parent that is also on or below a cycle, so
+    following those parents upward must eventually revisit a term.
+    """
+    candidate_set = set(candidates)
+    path: List[Tuple[str, str]] = []
+    position: Dict[Tuple[str, str], int] = {}
+    node = candidates[0]
+    while node not in position:
+        position[node] = len(path)
+        path.append(node)
+        node = next((ns, id_) for ns, id_, _ in graph[node]
+                    if (ns, id_) in candidate_set)
+    return path[position[node]:] + [node]
+
+
+def _partition_neighbors(graph: Dict[Tuple[str, str],
+                                     List[Tuple[str, str, str]]],
+                         relation_types: Tuple[str, ...]) -> \
+        Dict[Tuple[str, str], List[Tuple[str, str]]]:
+    """Return neighbor lists of a graph restricted to some relation types
+
+    Neighbors keep the order of the edges in the given graph.
+    """
+    neighbors = {}
+    for node, edges in graph.items():
+        selected = [(ns, id_) for ns, id_, rel in edges
+                    if rel in relation_types]
+        if selected:
+            neighbors[node] = selected
+    return neighbors
+
+
+def _traverse_neighbors(neighbors: Dict[Tuple[str, str],
+                                         List[Tuple[str, str]]],
+                        source: Tuple[str, str]) -> \
+        Generator[Tuple[str, str], None, None]:
+    """Traverse neighbor lists in breadth first order from a node"""
+    visited = {source}
+    queue = deque([source])
+    while queue:
+        node = queue.pop()
+        for child in neighbors.get(node, ()):
+            if child not in visited:
+                queue.appendleft(child)
+                visited.add(child)
+        yield node
+
+
+def _relation_key(relation_types: Container[str]) -> Tuple[str, ...]:
+    """Return canonical key for a container of relation types"""
+    if 'isa' in relation_types:
+        return ('isa', 'partof') if 'partof' in relation_types else ('isa',)
+    return ('partof',) if 'partof' in relation_types else ()
@@ -0,0 +1,348 @@
+"""Look up agent texts in the FamPlex grounding map tolerating variants.
+
+The grounding map is keyed by exact agent texts, so texts differing from an
+entry only in letter case, in whether Greek letters are written as unicode
+characters or spelled out, or in hyphens, spaces and underscores miss it.
+:class:`GroundingIndex` precomputes a normalized key for every entry so that
+such variants resolve with a single dictionary lookup after normalizing the
+query text. A reverse index maps every (namespace, id) grounded to by the
+map back to its texts. Texts that still miss, for example because of a
+typo or a plural, can be matched approximately by edit distance using an
+inverted index of character trigrams.
+"""
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from famplex.load import load_grounding_map
+
+
+__all__ = ['GroundingIndex', 'normalize_text']
+
+
+def _greek_names() -> Dict[int, str]:
+    """Map lower case Greek letters to their spelled out names"""
+    table = {}
+    for code in range(0x3b1, 0x3ca):
+        name = unicodedata.name(chr(code), '')
+        prefix = 'GREEK SMALL LETTER '
+        if name.startswith(prefix) and ' ' not in name[len(prefix):]:
+            table[code] = name[len(prefix):].lower()
+    # Unicode spells lambda as lamda
+    table[ord('λ')] = 'lambda'
+    return table
+
+
+# Hyphens, dashes, minus sign, underscore and whitespace are folded away
+_SEPARATORS = '-_ \t\u2010\u2011\u2012\u2013\u2014\u2212'
+_TRANSLATION = _greek_names()
+_TRANSLATION.update({ord(c): None for c in _SEPARATORS})
+
+
+def normalize_text(text: str) -> str:
+    """Return normalized key of an agent text
+
+    The text is normalized to NFKC form and case folded. Greek letters are
+    replaced by their spelled out names and hyphens, dashes, spaces and
+    underscores are removed. For example 'TNF-α', 'TNF alpha' and
+    'TNFAlpha' all become 'tnfalpha'.
+
+    Parameters
+    ----------
+    text : str
+        An agent text.
+
+    Returns
+    -------
+    str
+    """
+    return unicodedata.normalize('NFKC', text).casefold().\
+        translate(_TRANSLATION)
+
+
+class GroundingIndex(object):
+    """Grounding map lookup with case, Greek letter and separator folding
+
+    A text is first looked up exactly and, if it is not in the grounding
+    map, by its key as returned by :func:`normalize_text`. Grounding map
+    entries whose keys coincide but whose groundings differ are ambiguous
+    and are only found by exact lookup.
+
+    Attributes
+    ----------
+    index_stats : dict
+        Build time in seconds, approximate memory use in bytes of the
+        normalized index and of the grounding map it is built on, number of
+        normalized keys and number of ambiguous normalized keys.
+
+    Parameters
+    ----------
+    grounding_map : Optional[dict]
+        Dictionary mapping agent texts to INDRA style db_refs dictionaries
+        or None, as returned by :func:`famplex.load.load_grounding_map`. If
+        None, the FamPlex grounding map is loaded. Default: None
+    """
+    def __init__(self, grounding_map: Optional[
+            Dict[str, Optional[Dict[str, str]]]] = None):
+        start = time.perf_counter()
+        if grounding_map is None:
+            grounding_map = load_grounding_map()
+        self._grounding_map = grounding_map
+        normalized: Dict[str, Optional[Dict[str, str]]] = {}
+        ambiguous = set()
+        reverse: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        for text, db_refs in grounding_map.items():
+            if db_refs is not None:
+                for ns, id_ in db_refs.items():
+                    if ns != 'TEXT':
+                        reverse[(ns, id_)].append(text)
+            key = normalize_text(text)
+            if key in normalized and \
+                    _groundings(normalized[key]) != _groundings(db_refs):
+                ambiguous.add(key)
+            normalized[key] = db_refs
+        for key in ambiguous:
+            del normalized[key]
+        self._normalized = normalized
+        self._reverse = {term: tuple(texts)
+                         for term, texts in reverse.items()}
+        # Built by ground_fuzzy on first use
+        self._fuzzy_index: Optional[_TrigramIndex] = None
+        build_time = time.perf_counter() - start
+        self.index_stats = {'build_time': build_time,
+                            'memory': _dict_size(normalized),
+                            'map_memory': _dict_size(grounding_map, True),
+                            'num_keys': len(normalized),
+                            'num_ambiguous': len(ambiguous)}
+
+    def ground(self, text: str) -> Optional[Dict[str, str]]:
+        """Return grounding of an agent text
+
+        Parameters
+        ----------
+        text : str
+            An agent text.
+
+        Returns
+        -------
+        dict or None
+            INDRA style db_refs dictionary of the matching grounding map
+            entry, whose 'TEXT' entry is the text as it appears in the
+            grounding map. None if there is no unambiguous match or the
+            matching entry is explicitly ungrounded. The dictionary is
+            shared and must not be modified.
+        """
+        db_refs = self._grounding_map.get(text)
+        if db_refs is not None or text in self._grounding_map:
+            return db_refs
+        return self._normalized.get(normalize_text(text))
+
+    def texts(self, namespace: str, id_: str) -> List[str]:
+        """Return the texts in the grounding map that ground to a term
+
+        Parameters
+        ----------
+        namespace : str
+            Namespace of a term, for example 'FPLX', 'HGNC' or 'UP'.
+        id_ : str
+            Identifier of a term within namespace.
+
+        Returns
+        -------
+        list
+            Texts whose db_refs contain the given namespace and id, in the
+            order of the grounding map.
+        """
+        return list(self._reverse.get((namespace, id_), ()))
+
+    def ground_many(self, texts: Iterable[str]) -> \
+            List[Optional[Dict[str, str]]]:
+        """Return groundings of many agent texts
+
+        Each distinct text is looked up only once, which pays off for the
+        highly repetitive output of named entity recognition.
+
+        Parameters
+        ----------
+        texts : iterable of str
+            Agent texts.
+
+        Returns
+        -------
+        list
+            Grounding of each text as returned by :meth:`ground`.
+        """
+        results: Dict[str, Optional[Dict[str, str]]] = {}
+        ground = self.ground
+        groundings = []
+        for text in texts:
+            try:
+                db_refs = results[text]
+            except KeyError:
+                db_refs = results[text] = ground(text)
+            groundings.append(db_refs)
+        return groundings
+
+    def ground_fuzzy(self, text: str, max_distance: int = 1,
+                     limit: Optional[int] = 10) -> \
+            List[Tuple[Dict[str, str], int]]:
+        """Return groundings of grounding map texts similar to a text
+
+        If :meth:`ground` finds the text, its grounding is the only
+        candidate. Otherwise candidates are the grounding map entries whose
+        normalized keys, see :func:`normalize_text`, are within the given
+        Levenshtein distance of the normalized text. Candidates are found
+        through an inverted index of the trigrams of normalized keys which
+        is built on first use. Ambiguous and explicitly ungrounded entries
+        are never candidates.
+
+        Parameters
+        ----------
+        text : str
+            An agent text.
+        max_distance : Optional[int]
+            Largest edit distance between normalized keys of candidates and
+            of the text. Lookups for short texts with a large distance may
+            have to compare against many keys. Default: 1
+        limit : Optional[int]
+            Largest number of candidates returned. If None, all are
+            returned. Default: 10
+
+        Returns
+        -------
+        list
+            List of tuples (db_refs, distance) sorted by distance and then
+            by the grounding map text in db_refs['TEXT'].
+        """
+        db_refs = self._grounding_map.get(text)
+        if db_refs is not None:
+            return [(db_refs, 0)]
+        if text in self._grounding_map:
+            return []
+        key = normalize_text(text)
+        db_refs = self._normalized.get(key)
+        if db_refs is not None:
+            return [(db_refs, 0)]
+        if self._fuzzy_index is None:
+            self._fuzzy_index = _TrigramIndex(
+                [key for key, db_refs in self._normalized.items()
+                 if db_refs is not None])
+        candidates = [(self._normalized[match], distance)
+                      for match, distance
+                      in self._fuzzy_index.search(key, max_distance)]
+        candidates.sort(key=lambda c: (c[1], c[0]['TEXT']))
+        return candidates if limit is None else candidates[:limit]
+
+
+class _TrigramIndex(object):
+    """Inverted index from character trigrams to strings containing them
+
+    Strings are padded with two sentinel characters on both sides. A single
+    edit removes at most three trigrams of a string, so a string within
+    edit distance d of a query lacks at most 3d of the distinct trigrams of
+    the query. If the query has more than 3d distinct trigrams, every such
+    string therefore contains one of any 3d + 1 of them. Postings are kept
+    separately for each string length, and for each length within d of the
+    length of the query, candidates are gathered from the postings of the
+    3d + 1 rarest query trigrams only. Otherwise all strings of such
+    lengths are candidates. Candidates are verified by computing their edit
+    distance with a cutoff.
+    """
+    def __init__(self, keys: List[str]):
+        self._keys = keys
+        postings: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+        by_length: Dict[int, List[int]] = defaultdict(list)
+        for i, key in enumerate(keys):
+            for gram in set(_trigrams(key)):
+                postings[(gram, len(key))].append(i)
+            by_length[len(key)].append(i)
+        self._postings = dict(postings)
+        self._by_length = dict(by_length)
+
+    def search(self, query: str, max_distance: int) -> \
+            List[Tuple[str, int]]:
+        """Return (key, distance) of keys within max_distance of query"""
+        grams = set(_trigrams(query))
+        candidates = set()
+        for length in range(len(query) - max_distance,
+                            len(query) + max_distance + 1):
+            if len(grams) > 3 * max_distance:
+                lists = sorted((self._postings.get((gram, length), [])
+                                for gram in grams), key=len)
+                for postings in lists[:3 * max_distance + 1]:
+                    candidates.update(postings)
+            else:
+                candidates.update(self._by_length.get(length, []))
+        keys = self._keys
+        results = []
+        for i in candidates:
+            key = keys[i]
+            distance = _bounded_levenshtein(query, key, max_distance)
+            if distance <= max_distance:
+                results.append((key, distance))
+        return results
+
+
+def _trigrams(text: str) -> List[str]:
+    padded = '\x00\x00' + text + '\x00\x00'
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _bounded_levenshtein(a: str, b: str, bound: int) -> int:
+    """Levenshtein distance of a and b, or bound + 1 if it exceeds bound
+
+    A common prefix and suffix are removed first, then only cells of the
+    dynamic programming table within bound of its diagonal are computed.
+    """
+    too_far = bound + 1
+    if abs(len(a) - len(b)) > bound:
+        return too_far
+    n = min(len(a), len(b))
+    start = 0
+    while start < n and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < n - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(len(a) + len(b), too_far)
+    previous = [j if j <= bound else too_far for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        current = [i if i <= bound else too_far] + [too_far] * len(b)
+        low, high = max(1, i - bound), min(len(b), i + bound)
+        for j in range(low, high + 1):
+            distance = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < distance:
+                distance = previous[j] + 1
+            if current[j - 1] + 1 < distance:
+                distance = current[j - 1] + 1
+            current[j] = distance
+        if min(current[low - 1:high + 1]) > bound:
+            return too_far
+        previous = current
+    return min(previous[-1], too_far)
+
+
+def _groundings(db_refs: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """Return db_refs without the text entry"""
+    if db_refs is None:
+        return None
+    return {ns: id_ for ns, id_ in db_refs.items() if ns != 'TEXT'}
+
+
+def _dict_size(dictionary: Dict[str, Optional[Dict[str, str]]],
+               count_values: bool = False) -> int:
+    """Approximate size in bytes of a dictionary, its keys and values
+
+    Values are shared between the grounding map and the normalized index,
+    so they are counted only for the grounding map.
+    """
+    size = sys.getsizeof(dictionary) + sum(sys.getsizeof(key)
+                                           for key in dictionary)
+    if count_values:
+        size += sum(sys.getsizeof(value) for value in dictionary.values()
+                    if value is not None)
+    return size
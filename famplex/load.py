@@ -1,16 +1,33 @@
 """Implements functions for loading resource files into datastructures."""
 import csv
-from typing import Dict, List, Optional, Tuple
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from famplex.locations import ENTITIES_PATH, EQUIVALENCES_PATH, \
-    GROUNDING_MAP_PATH, RELATIONS_PATH, GENE_PREFIXES_PATH, DESCRIPTIONS_PATH
+    GROUNDING_MAP_PATH, RELATIONS_PATH, GENE_PREFIXES_PATH, \
+    DESCRIPTIONS_PATH, HGNC_UNIPROT_PATH
+from famplex.registry import ResourceRegistry
 
 
 __all__ = ['load_grounding_map', 'load_equivalences', 'load_entities',
-           'load_relations', 'load_gene_prefixes', 'load_descriptions']
+           'load_relations', 'load_gene_prefixes', 'load_descriptions',
+           'load_hgnc_uniprot_map',
+           'iter_grounding_map', 'iter_equivalences', 'iter_entities',
+           'iter_relations', 'iter_gene_prefixes', 'iter_descriptions',
+           'Relation', 'Equivalence', 'GenePrefix', 'Description',
+           'resource_registry']
 
 
-def _load_csv(filename):
-    """Load famplex csv file as list of rows
+# Typed rows yielded by the iter_* functions
+Relation = namedtuple('Relation', ['namespace1', 'id1', 'relation',
+                                   'namespace2', 'id2'])
+Equivalence = namedtuple('Equivalence', ['namespace', 'id', 'fplx_id'])
+GenePrefix = namedtuple('GenePrefix', ['pattern', 'category', 'notes'])
+Description = namedtuple('Description', ['fplx_id', 'references',
+                                         'description'])
+
+
+def _iter_csv(filename):
+    """Iterate over rows of a famplex csv file without loading it all
 
     Parameters
     ----------
@@ -18,15 +35,29 @@ def _load_csv(filename):
 
     Returns
     -------
-    rows : list
+    rows : generator
+        Generator of rows, each a list of strings.
     """
     with open(filename) as f:
         csvreader = csv.reader(f, delimiter=str(u','),
                                lineterminator='\r\n',
                                quoting=csv.QUOTE_MINIMAL,
                                quotechar=str(u'"'))
-        rows = [row for row in csvreader]
-    return rows
+        yield from csvreader
+
+
+def _load_csv(filename):
+    """Load famplex csv file as list of rows
+
+    Parameters
+    ----------
+    filename : str
+
+    Returns
+    -------
+    rows : list
+    """
+    return list(_iter_csv(filename))
 
 
 def _construct_grounding_map(rows):
@@ -47,30 +78,56 @@ def _construct_grounding_map(rows):
         Dictionary mapping agent texts to INDRA style db_refs dicts. Each
         db_refs dict maps namespaces to ids.
     """
-    gmap = {}
+    return dict(_iter_grounding_entries(rows))
+
+
+def _iter_grounding_entries(rows):
+    """Generate (text, db_refs) pairs from rows of a grounding map csv file
+
+    See :func:`_construct_grounding_map` for the format of rows.
+    """
     for row in rows:
         text = row[0]
         db_refs = {'TEXT': text}
         db_refs.update({ns: id_ for ns, id_ in zip(row[1::2], row[2::2]) if ns})
-        gmap[text] = db_refs if len(db_refs) > 1 else None
-    return gmap
+        yield text, db_refs if len(db_refs) > 1 else None
 
 
-def load_grounding_map() -> Dict[str, Optional[Dict[str, str]]]:
+def load_grounding_map(cached: bool = False) -> \
+        Dict[str, Optional[Dict[str, str]]]:
     """Returns the FamPlex grounding map in dictionary form
 
+    Parameters
+    ----------
+    cached : Optional[bool]
+        If True, return the value parsed by a previous call from
+        :data:`resource_registry`, which parses the file again only if it
+        has changed. The returned value is then shared and must not be
+        modified. Default: False
+
     Returns
     -------
     dict
         A dictionary mapping agent texts to INDRA style db_refs dictionaries.
     """
+    if cached:
+        return resource_registry.get('grounding_map')
     rows = _load_csv(GROUNDING_MAP_PATH)
     return _construct_grounding_map(rows)
 
 
-def load_equivalences() -> List[Tuple[str, str, str]]:
+def load_equivalences(cached: bool = False) -> \
+        List[Tuple[str, str, str]]:
     """Returns FamPlex equivalences as a list of rows.
 
+    Parameters
+    ----------
+    cached : Optional[bool]
+        If True, return the value parsed by a previous call from
+        :data:`resource_registry`, which parses the file again only if it
+        has changed. The returned value is then shared and must not be
+        modified. Default: False
+
     Returns
     -------
     list
@@ -78,24 +135,45 @@ def load_equivalences() -> List[Tuple[str, str, str]]:
         contains three entries. A namespace, an ID, and a FamPlex ID. For
         example ['BEL', 'AMP Activated Protein Kinase Complex', 'AMPK'].
     """
+    if cached:
+        return resource_registry.get('equivalences')
     return _load_csv(EQUIVALENCES_PATH)
 
 
-def load_entities() -> List[str]:
+def load_entities(cached: bool = False) -> List[str]:
     """Returns list of FamPlex entities
 
+    Parameters
+    ----------
+    cached : Optional[bool]
+        If True, return the value parsed by a previous call from
+        :data:`resource_registry`, which parses the file again only if it
+        has changed. The returned value is then shared and must not be
+        modified. Default: False
+
     Returns
     -------
     list
         A list of all FamPlex unique IDs sorted in Unix standard sorted order.
     """
+    if cached:
+        return resource_registry.get('entities')
     rows = _load_csv(ENTITIES_PATH)
     return [row[0] for row in rows]
 
 
-def load_relations() -> List[Tuple[str, str, str, str, str]]:
+def load_relations(cached: bool = False) -> \
+        List[Tuple[str, str, str, str, str]]:
     """Returns FamPlex relations as a list of rows
 
+    Parameters
+    ----------
+    cached : Optional[bool]
+        If True, return the value parsed by a previous call from
+        :data:`resource_registry`, which parses the file again only if it
+        has changed. The returned value is then shared and must not be
+        modified. Default: False
+
     Returns
     -------
     list
@@ -103,21 +181,175 @@ def load_relations() -> List[Tuple[str, str, str, str, str]]:
         five columns of the form [namespace1, id1, relation, namespace2, id2].
         For example ['FPLX', 'AMPK_alpha', 'partof', 'FPLX', 'AMPK'].
     """
+    if cached:
+        return resource_registry.get('relations')
     return _load_csv(RELATIONS_PATH)
 
 
-def load_gene_prefixes() -> List[Tuple[str, str, str]]:
+def load_gene_prefixes(cached: bool = False) -> \
+        List[Tuple[str, str, str]]:
     """Returns FamPlex gene prefixes as a list of rows
 
+    Parameters
+    ----------
+    cached : Optional[bool]
+        If True, return the value parsed by a previous call from
+        :data:`resource_registry`, which parses the file again only if it
+        has changed. The returned value is then shared and must not be
+        modified. Default: False
+
     Returns
     -------
     list
         List of lists corresponding to rows in gene_prefixes.csv. Each row has
         three columns [Pattern, Category, Notes].
     """
+    if cached:
+        return resource_registry.get('gene_prefixes')
     return _load_csv(GENE_PREFIXES_PATH)
 
 
-def load_descriptions() -> List[Tuple[str, str, str]]:
-    """Returns FamPlex descriptions as a list of rows"""
+def load_descriptions(cached: bool = False) -> List[Tuple[str, str, str]]:
+    """Returns FamPlex descriptions as a list of rows
+
+    Parameters
+    ----------
+    cached : Optional[bool]
+        If True, return the value parsed by a previous call from
+        :data:`resource_registry`, which parses the file again only if it
+        has changed. The returned value is then shared and must not be
+        modified. Default: False
+    """
+    if cached:
+        return resource_registry.get('descriptions')
     return _load_csv(DESCRIPTIONS_PATH)
+
+
+def load_hgnc_uniprot_map(cached: bool = False) -> Dict[str, List[str]]:
+    """Returns the mapping of HGNC symbols to UniProt IDs
+
+    The mapping is read from the hgnc_uniprot_map.csv export, which is
+    generated from the HGNC complete set by export/hgnc_uniprot.py for the
+    HGNC symbols used in relations.csv, so that no network access is needed
+    at runtime.
+
+    Parameters
+    ----------
+    cached : Optional[bool]
+        If True, return the value parsed by a previous call from
+        :data:`resource_registry`, which parses the file again only if it
+        has changed. The returned value is then shared and must not be
+        modified. Default: False
+
+    Returns
+    -------
+    dict
+        Dictionary mapping HGNC symbols to lists of UniProt IDs. Symbols
+        without a UniProt ID map to an empty list.
+
+    Raises
+    ------
+    FileNotFoundError
+        If hgnc_uniprot_map.csv has not been generated.
+    """
+    if cached:
+        return resource_registry.get('hgnc_uniprot_map')
+    return {symbol: up_ids.split('|') if up_ids else []
+            for symbol, _, up_ids in _iter_csv(HGNC_UNIPROT_PATH)}
+
+
+def iter_grounding_map() -> Iterator[Tuple[str, Optional[Dict[str, str]]]]:
+    """Iterate over entries of the FamPlex grounding map
+
+    Returns
+    -------
+    generator
+        Generator of tuples (text, db_refs) where db_refs is an INDRA
+        style db_refs dictionary for the agent text, or None if the text
+        is explicitly ungrounded. Rows are read from the file lazily.
+    """
+    return _iter_grounding_entries(_iter_csv(GROUNDING_MAP_PATH))
+
+
+def iter_equivalences() -> Iterator[Equivalence]:
+    """Iterate over FamPlex equivalences
+
+    Returns
+    -------
+    generator
+        Generator of Equivalence named tuples with fields namespace, id
+        and fplx_id, read from equivalences.csv lazily. For example
+        Equivalence('BEL', 'AMP Activated Protein Kinase Complex', 'AMPK').
+    """
+    return (Equivalence(*row) for row in _iter_csv(EQUIVALENCES_PATH))
+
+
+def iter_entities() -> Iterator[str]:
+    """Iterate over FamPlex entities
+
+    Returns
+    -------
+    generator
+        Generator of FamPlex unique IDs in the order of entities.csv.
+    """
+    return (row[0] for row in _iter_csv(ENTITIES_PATH))
+
+
+def iter_relations() -> Iterator[Relation]:
+    """Iterate over FamPlex relations
+
+    Returns
+    -------
+    generator
+        Generator of Relation named tuples with fields namespace1, id1,
+        relation, namespace2 and id2, read from relations.csv lazily. For
+        example Relation('FPLX', 'AMPK_alpha', 'partof', 'FPLX', 'AMPK').
+    """
+    return (Relation(*row) for row in _iter_csv(RELATIONS_PATH))
+
+
+def iter_gene_prefixes() -> Iterator[GenePrefix]:
+    """Iterate over FamPlex gene prefixes
+
+    Unlike :func:`load_gene_prefixes`, the header row of gene_prefixes.csv
+    is skipped.
+
+    Returns
+    -------
+    generator
+        Generator of GenePrefix named tuples with fields pattern, category
+        and notes.
+    """
+    rows = _iter_csv(GENE_PREFIXES_PATH)
+    next(rows, None)
+    return (GenePrefix(*row) for row in rows)
+
+
+def iter_descriptions() -> Iterator[Description]:
+    """Iterate over FamPlex descriptions
+
+    Returns
+    -------
+    generator
+        Generator of Description named tuples with fields fplx_id,
+        references and description. References are pipe separated CURIEs.
+    """
+    return (Description(*row) for row in _iter_csv(DESCRIPTIONS_PATH))
+
+
+# Process wide cache of parsed resources used when loading with cached=True.
+# Paths are looked up on each access so that they can be changed at runtime.
+resource_registry = ResourceRegistry()
+resource_registry.register('grounding_map', lambda: GROUNDING_MAP_PATH,
+                           load_grounding_map)
+resource_registry.register('equivalences', lambda: EQUIVALENCES_PATH,
+                           load_equivalences)
+resource_registry.register('entities', lambda: ENTITIES_PATH, load_entities)
+resource_registry.register('relations', lambda: RELATIONS_PATH,
+                           load_relations)
+resource_registry.register('gene_prefixes', lambda: GENE_PREFIXES_PATH,
+                           load_gene_prefixes)
+resource_registry.register('descriptions', lambda: DESCRIPTIONS_PATH,
+                           load_descriptions)
+resource_registry.register('hgnc_uniprot_map', lambda: HGNC_UNIPROT_PATH,
+                           load_hgnc_uniprot_map)
@@ -17,4 +17,10 @@ DESCRIPTIONS_PATH = os.path.join(RESOURCES_PATH, 'descriptions.csv')
 BELNS_PATH = os.path.join(EXPORT_PATH, 'famplex.belns')
 OBO_PATH = os.path.join(EXPORT_PATH, 'famplex.obo')
 HGNC_IDS_PATH = os.path.join(EXPORT_PATH, 'hgnc_symbol_map.csv')
+HGNC_UNIPROT_PATH = os.path.join(EXPORT_PATH, 'hgnc_uniprot_map.csv')
 GROUNDINGS_PATH = os.path.join(EXPORT_PATH, 'famplex_groundings.tsv')
+
+# Directory for cached snapshots of built data structures. Can be overridden
+# with the FAMPLEX_CACHE_PATH environment variable.
+CACHE_PATH = os.environ.get('FAMPLEX_CACHE_PATH',
+                            os.path.join(os.path.expanduser('~'), '.famplex'))
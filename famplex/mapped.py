@@ -0,0 +1,318 @@
+"""Read only, memory mappable file format for the FamPlex graph.
+
+A mapped graph file contains everything needed by
+:class:`famplex.graph.FamplexGraph` as flat arrays: an interned string table
+of all terms together with compressed sparse row arrays for the forward and
+reverse graphs, the root class mapping and the equivalences. Opening a file
+with :func:`load_mapped_state` maps it into memory without copying, so the
+pages holding the ontology are shared through the operating system page
+cache between all processes that open the same file. Only small per-process
+objects such as decoded terms on the current query path are allocated on the
+Python heap.
+
+The file starts with an 8 byte magic string, followed by a header of
+little-endian 64 bit integers: the format version, a byte order marker,
+the number of terms and the (offset, size) pair of each section. Sections
+are stored in the native byte order of the writing machine, recorded by
+the byte order marker, and aligned to 8 bytes.
+"""
+import bisect
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, \
+    Tuple
+
+from famplex.compact import CompactAdjacency, RELATION_TYPES
+
+
+__all__ = ['MAPPED_VERSION', 'write_mapped_graph', 'load_mapped_state']
+
+
+MAPPED_VERSION = 1
+_MAGIC = b'FPLXMAP\x00'
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+# Name and array typecode of each section in the order they are stored
+_SECTIONS = [('strings', 'B'), ('string_offsets', 'q'),
+             ('graph_offsets', 'q'), ('graph_targets', 'q'),
+             ('graph_relations', 'B'),
+             ('reverse_offsets', 'q'), ('reverse_targets', 'q'),
+             ('reverse_relations', 'B'),
+             ('root_offsets', 'q'), ('root_targets', 'q'),
+             ('root_classes', 'q'),
+             ('equivalence_offsets', 'q'), ('equivalence_targets', 'q'),
+             ('reverse_equivalence_offsets', 'q'),
+             ('reverse_equivalence_targets', 'q')]
+_HEADER = struct.Struct('<%dq' % (3 + 2 * len(_SECTIONS)))
+
+
+class _NodeTable(Sequence[Tuple[str, str]]):
+    """Sorted table of (namespace, id) terms decoded from a string blob
+
+    Terms are decoded on access. Lookup of the integer id of a term is by
+    binary search, so no per-process dictionary of terms is needed.
+    """
+    def __init__(self, strings: memoryview, string_offsets: memoryview):
+        self._strings = strings
+        self._string_offsets = string_offsets
+        self._len = (len(string_offsets) - 1) // 2
+
+    def _string(self, j: int) -> str:
+        offsets = self._string_offsets
+        return str(self._strings[offsets[j]:offsets[j + 1]], 'utf-8')
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i):  # type: ignore
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._len))]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        return (self._string(2 * i), self._string(2 * i + 1))
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        for i in range(self._len):
+            yield self[i]
+
+    def get(self, node: Tuple[str, str],
+            default: Optional[int] = None) -> Optional[int]:
+        i = bisect.bisect_left(self, node)
+        if i < self._len and self[i] == node:
+            return i
+        return default
+
+
+class _GroupIndex(object):
+    """Read only mapping from terms to lists of terms stored in CSR form
+
+    Parameters
+    ----------
+    table : _NodeTable
+        Term table into which offsets and targets index.
+    offsets, targets : memoryview
+        Compressed sparse row arrays.
+    to_node : callable
+        Converts a lookup key into a (namespace, id) tuple.
+    from_node : callable
+        Converts a target (namespace, id) tuple into a returned value.
+    from_key : Optional[callable]
+        Converts a (namespace, id) tuple back into a lookup key, the inverse
+        of to_node. Default: identity
+    """
+    def __init__(self, table: _NodeTable, offsets: memoryview,
+                 targets: memoryview, to_node: Callable[[Any], Any],
+                 from_node: Callable[[Tuple[str, str]], Any],
+                 from_key: Optional[Callable[[Tuple[str, str]], Any]] = None):
+        self._table = table
+        self._offsets = offsets
+        self._targets = targets
+        self._to_node = to_node
+        self._from_node = from_node
+        self._from_key = from_key if from_key is not None else _identity
+
+    def get(self, key: Any, default: Optional[List[Any]] = None) -> \
+            Optional[List[Any]]:
+        i = self._table.get(self._to_node(key))
+        if i is None:
+            return default
+        start, end = self._offsets[i], self._offsets[i + 1]
+        if start == end:
+            return default
+        return [self._from_node(self._table[self._targets[j]])
+                for j in range(start, end)]
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: Any) -> List[Any]:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over the keys with a non-empty group"""
+        offsets, table = self._offsets, self._table
+        for i in range(len(offsets) - 1):
+            if offsets[i] < offsets[i + 1]:
+                yield self._from_key(table[i])
+
+    def items(self) -> Iterator[Tuple[Any, List[Any]]]:
+        offsets, targets, table = self._offsets, self._targets, self._table
+        for i in range(len(offsets) - 1):
+            start, end = offsets[i], offsets[i + 1]
+            if start < end:
+                yield (self._from_key(table[i]),
+                       [self._from_node(table[targets[j]])
+                        for j in range(start, end)])
+
+
+def _identity(x: Any) -> Any:
+    return x
+
+
+def _fplx_node(fplx_id: str) -> Tuple[str, str]:
+    return ('FPLX', fplx_id)
+
+
+def _node_id(node: Tuple[str, str]) -> str:
+    return node[1]
+
+
+def write_mapped_graph(graph: Any, path: str) -> None:
+    """Write a FamplexGraph to a memory mappable file
+
+    Parameters
+    ----------
+    graph : famplex.graph.FamplexGraph
+        Graph to write. Either the dictionary or the compact representation
+        may be used.
+    path : str
+        Path of the file to write. The file is written to a temporary file
+        in the same directory and atomically moved into place.
+    """
+    terms = set(graph._root_class_mapping)
+    for node, edges in graph._graph.items():
+        terms.add(node)
+        terms.update((ns, id_) for ns, id_, _ in edges)
+    for fplx_id, equivs in graph._equivalences.items():
+        terms.add(('FPLX', fplx_id))
+        terms.update(equivs)
+    terms.update(graph._reverse_equivalences)
+    nodes = sorted(terms)
+    index = {node: i for i, node in enumerate(nodes)}
+
+    sections: Dict[str, array] = {name: array(typecode)
+                                  for name, typecode in _SECTIONS}
+    strings = bytearray()
+    string_offsets = sections['string_offsets']
+    string_offsets.append(0)
+    for node in nodes:
+        for value in node:
+            strings.extend(value.encode('utf-8'))
+            string_offsets.append(len(strings))
+    sections['strings'] = array('B', strings)
+
+    def fill(prefix: str, get: Callable[[Tuple[str, str]], List[Any]],
+             encode: Callable[[Any], Tuple[int, ...]]) -> None:
+        offsets = sections[prefix + '_offsets']
+        offsets.append(0)
+        columns = [sections[prefix + '_' + suffix]
+                   for suffix in ['targets', 'relations']
+                   if prefix + '_' + suffix in sections]
+        count = 0
+        for node in nodes:
+            for entry in get(node):
+                for column, value in zip(columns, encode(entry)):
+                    column.append(value)
+                count += 1
+            offsets.append(count)
+
+    def encode_edge(edge: Tuple[str, str, str]) -> Tuple[int, int]:
+        return index[edge[:2]], RELATION_TYPES.index(edge[2])
+
+    fill('graph', lambda node: graph._graph.get(node, []), encode_edge)
+    fill('reverse', lambda node: graph._reverse_graph.get(node, []),
+         encode_edge)
+    fill('root', lambda node: graph._root_class_mapping.get(node, []),
+         lambda root: (index[root],))
+    fill('equivalence',
+         lambda node: graph._equivalences.get(node[1], [])
+         if node[0] == 'FPLX' else [],
+         lambda equiv: (index[equiv],))
+    fill('reverse_equivalence',
+         lambda node: graph._reverse_equivalences.get(node, []),
+         lambda fplx_id: (index[('FPLX', fplx_id)],))
+    sections['root_classes'].extend(index[root]
+                                    for root in graph.root_classes)
+
+    header_values = [MAPPED_VERSION, int(_LITTLE_ENDIAN), len(nodes)]
+    position = len(_MAGIC) + _HEADER.size
+    blobs = []
+    for name, _ in _SECTIONS:
+        position += -position % 8
+        blob = sections[name].tobytes()
+        header_values.extend([position, len(blob)])
+        blobs.append((position, blob))
+        position += len(blob)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(_HEADER.pack(*header_values))
+            for position, blob in blobs:
+                f.write(b'\x00' * (position - f.tell()))
+                f.write(blob)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_mapped_state(path: str) -> Dict[str, Any]:
+    """Open a mapped graph file written by :func:`write_mapped_graph`
+
+    Parameters
+    ----------
+    path : str
+        Path of the mapped graph file.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping :class:`famplex.graph.FamplexGraph` attribute
+        names to read only views backed by the memory mapped file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a mapped graph file of the current version or was
+        written on a machine with a different byte order.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    if bytes(view[:len(_MAGIC)]) != _MAGIC:
+        raise ValueError('%s is not a FamPlex mapped graph file.' % path)
+    header = _HEADER.unpack_from(buffer, len(_MAGIC))
+    version, little_endian = header[:2]
+    if version != MAPPED_VERSION:
+        raise ValueError('Mapped graph file %s has version %d, expected %d.'
+                         % (path, version, MAPPED_VERSION))
+    if bool(little_endian) != _LITTLE_ENDIAN:
+        raise ValueError('Mapped graph file %s has wrong byte order.' % path)
+    sections = {}
+    for k, (name, typecode) in enumerate(_SECTIONS):
+        offset, size = header[3 + 2 * k], header[4 + 2 * k]
+        sections[name] = view[offset:offset + size].cast(typecode)
+
+    table = _NodeTable(sections['strings'], sections['string_offsets'])
+    graph = CompactAdjacency(table, table, sections['graph_offsets'],
+                             sections['graph_targets'],
+                             sections['graph_relations'])
+    reverse_graph = CompactAdjacency(table, table,
+                                     sections['reverse_offsets'],
+                                     sections['reverse_targets'],
+                                     sections['reverse_relations'])
+    return {'_graph': graph,
+            '_reverse_graph': reverse_graph,
+            'root_classes': [table[i] for i in sections['root_classes']],
+            '_root_class_mapping':
+            _GroupIndex(table, sections['root_offsets'],
+                        sections['root_targets'], _identity, _identity),
+            '_equivalences':
+            _GroupIndex(table, sections['equivalence_offsets'],
+                        sections['equivalence_targets'], _fplx_node,
+                        _identity, _node_id),
+            '_reverse_equivalences':
+            _GroupIndex(table, sections['reverse_equivalence_offsets'],
+                        sections['reverse_equivalence_targets'], _identity,
+                        _node_id)}
@@ -0,0 +1,175 @@
+"""Strip the prefixes and suffixes listed in gene_prefixes.csv from texts.
+
+Each pattern in gene_prefixes.csv, such as 'GST-{Gene name}' or
+'{Gene name} siRNA', describes how a gene name appears in text with a tag,
+species marker, protein state or similar affix. :class:`GenePrefixStripper`
+compiles the patterns into regular expressions, so that the core gene
+text and the category of the affix are found with a single match per text.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from famplex.load import GenePrefix, iter_entities, iter_gene_prefixes, \
+    iter_relations
+
+
+__all__ = ['GenePrefixStripper']
+
+
+# Regular expressions for the placeholders used in patterns besides the
+# gene name itself
+_PLACEHOLDERS = {'{mutation}': r'[A-Z][0-9]+[A-Z*]'}
+_CORE_PLACEHOLDERS = {'{Gene name}', '{microRNA name}'}
+
+
+class GenePrefixStripper(object):
+    """Compiled matcher for the patterns of gene_prefixes.csv
+
+    Patterns are combined into one regular expression in which patterns
+    with longer affixes come first, so that for example 'shRNA-AKT1' is
+    stripped by 'shRNA-{Gene name}' rather than 'sh{Gene name}'. Only
+    patterns that can match a text given its first and last character are
+    included, and the expression for each such pair of characters is
+    compiled on first use. Matching is case sensitive, since
+    gene_prefixes.csv lists case variants explicitly.
+
+    Where an affix is attached to the gene name without a separator, as in
+    'p{Gene name}', the gene name must be at least two characters long and,
+    after a prefix, start with an upper case letter. This keeps texts such
+    as 'p53' or 'hnRNP' from being taken apart. Texts that are themselves
+    known gene or FamPlex names are never stripped, so that for example the
+    gene 'DGKD' is not read as 'DG' with the '{Gene name}KD' knockdown
+    suffix.
+
+    Parameters
+    ----------
+    gene_prefixes : Optional[iterable]
+        Rows of gene_prefixes.csv without the header, as generated by
+        :func:`famplex.load.iter_gene_prefixes`. If None, the FamPlex gene
+        prefixes are loaded. Default: None
+    known_names : Optional[iterable]
+        Names that are returned unchanged. If None, the HGNC symbols and
+        FamPlex IDs used in relations.csv and entities.csv. Default: None
+    """
+    def __init__(self, gene_prefixes: Optional[Iterable[GenePrefix]] = None,
+                 known_names: Optional[Iterable[str]] = None):
+        if gene_prefixes is None:
+            gene_prefixes = iter_gene_prefixes()
+        if known_names is None:
+            known_names = set(iter_entities())
+            for relation in iter_relations():
+                for ns, id_ in [(relation.namespace1, relation.id1),
+                                (relation.namespace2, relation.id2)]:
+                    if ns in ('HGNC', 'FPLX'):
+                        known_names.add(id_)
+        self._known_names = frozenset(known_names)
+        rows: Dict[str, str] = {}
+        for pattern, category, *_ in gene_prefixes:
+            rows.setdefault(pattern.strip(), category)
+        patterns = sorted(rows, key=lambda p: (-len(_affix_text(p)),
+                                               -p.count('{')))
+        self._categories = [rows[pattern] for pattern in patterns]
+        self._regexes = [_pattern_regex(pattern, k)
+                         for k, pattern in enumerate(patterns)]
+        # First and last characters of patterns, None for placeholders
+        self._ends = [(None if pattern.startswith('{') else pattern[0],
+                       None if pattern.endswith('}') else pattern[-1])
+                      for pattern in patterns]
+        self._matchers: Dict[Tuple[str, str], Optional[Pattern[str]]] = {}
+
+    def _matcher(self, first: str, last: str) -> Optional[Pattern[str]]:
+        """Return combined expression of patterns for first and last chars"""
+        try:
+            return self._matchers[(first, last)]
+        except KeyError:
+            pass
+        regexes = [regex for regex, (start, end)
+                   in zip(self._regexes, self._ends)
+                   if start in (None, first) and end in (None, last)]
+        matcher = re.compile('|'.join(regexes)) if regexes else None
+        self._matchers[(first, last)] = matcher
+        return matcher
+
+    def strip(self, text: str) -> Tuple[str, Optional[str]]:
+        """Return the core gene text of a text and the category of its affix
+
+        Parameters
+        ----------
+        text : str
+            A text, for example an agent text found by named entity
+            recognition.
+
+        Returns
+        -------
+        core : str
+            Text with the affix removed, or the text itself if it matches
+            no pattern.
+        category : str or None
+            Category of the matching pattern, for example 'experimental
+            context' or 'protein state', or None if no pattern matches or
+            the text is a known name.
+        """
+        if text in self._known_names:
+            return text, None
+        matcher = self._matcher(text[:1], text[-1:])
+        match = None if matcher is None else matcher.fullmatch(text)
+        if match is None:
+            return text, None
+        group = match.lastgroup
+        return match.group(group), self._categories[int(group[1:])]
+
+    def strip_many(self, texts: Iterable[str]) -> \
+            List[Tuple[str, Optional[str]]]:
+        """Strip affixes from many texts
+
+        Each distinct text is matched only once.
+
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to strip.
+
+        Returns
+        -------
+        list
+            Tuples (core, category) as returned by :meth:`strip` for each
+            text.
+        """
+        results: Dict[str, Tuple[str, Optional[str]]] = {}
+        strip = self.strip
+        stripped = []
+        for text in texts:
+            try:
+                result = results[text]
+            except KeyError:
+                result = results[text] = strip(text)
+            stripped.append(result)
+        return stripped
+
+
+def _affix_text(pattern: str) -> str:
+    """Return literal text of a pattern without placeholders"""
+    return re.sub(r'\{[^}]*\}', '', pattern)
+
+
+def _pattern_regex(pattern: str, k: int) -> str:
+    """Return regular expression of a pattern capturing the core as c<k>"""
+    parts = re.split(r'(\{[^}]*\})', pattern)
+    regex = []
+    for i, part in enumerate(parts):
+        if part in _CORE_PLACEHOLDERS:
+            before, after = parts[i - 1], ''.join(parts[i + 1:])
+            attached_before = before[-1:].isalnum()
+            attached_after = after[:1].isalnum() or after[:1] == '{'
+            if attached_before:
+                core = r'[A-Z](?:.*\S)'
+            elif attached_after:
+                core = r'\S(?:.*\S)'
+            else:
+                core = r'\S(?:.*\S)?'
+            regex.append('(?P<c%d>%s)' % (k, core))
+        elif part in _PLACEHOLDERS:
+            regex.append(_PLACEHOLDERS[part])
+        else:
+            regex.append(re.escape(part))
+    return ''.join(regex)
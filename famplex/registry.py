@@ -0,0 +1,184 @@
+"""Process wide cache of parsed resource files with change detection."""
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+__all__ = ['ResourceRegistry']
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ResourceRegistry(object):
+    """Caches parsed resources, re-parsing them only when their file changes
+
+    Each resource is registered under a name with the path of its file and a
+    function parsing it. The parsed value is kept for the lifetime of the
+    process. On each access the modification time and size of the file are
+    checked. Only if these differ from when the resource was parsed is the
+    file hashed, and it is parsed again only if its content hash changed.
+
+    Listeners can be registered to be notified when the content of a
+    resource file is found to have changed, either on access through
+    :meth:`get` or when explicitly checking all files with :meth:`refresh`.
+    An exception raised by a listener is logged and does not keep other
+    listeners from being notified. The new state of the changed files is
+    then not recorded, so that the change is reported again on the next
+    check, for example once a file that could not be processed is fixed.
+
+    Values returned by :meth:`get` are shared between all callers and must
+    not be modified.
+    """
+    def __init__(self):
+        self._resources: Dict[str, Tuple[Union[str, Callable[[], str]],
+                                         Callable[[], Any]]] = {}
+        # Maps names to [path, (mtime, size), content hash, parsed value]
+        self._states: Dict[str, List[Any]] = {}
+        self._listeners: List[Callable[[List[str]], None]] = []
+        self._lock = threading.RLock()
+
+    def register(self, name: str, path: Union[str, Callable[[], str]],
+                 loader: Callable[[], Any]) -> None:
+        """Register a resource
+
+        Parameters
+        ----------
+        name : str
+            Name under which the resource is accessed.
+        path : str or callable
+            Path to the resource file, or a function returning the path
+            which is called on each access.
+        loader : callable
+            Function without arguments returning the parsed resource.
+        """
+        with self._lock:
+            self._resources[name] = (path, loader)
+            self._states.pop(name, None)
+
+    def add_listener(self, listener: Callable[[List[str]], None]) -> None:
+        """Call listener with a list of names of changed resources"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[str]], None]) -> None:
+        """Stop calling a listener added with :meth:`add_listener`"""
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def get(self, name: str) -> Any:
+        """Return parsed resource, parsing it if it is not cached or changed
+
+        Parameters
+        ----------
+        name : str
+            Name of a registered resource.
+
+        Returns
+        -------
+        object
+            Value returned by the loader of the resource.
+
+        Raises
+        ------
+        KeyError
+            If no resource is registered under name.
+        """
+        with self._lock:
+            path, loader = self._resources[name]
+            update = self._check(name)
+            if update is None:
+                state = self._states[name]
+                if state[3] is _MISSING:
+                    state[3] = loader()
+                return state[3]
+            value = loader()
+        if self._notify([name]):
+            with self._lock:
+                self._states[name] = update + [value]
+        return value
+
+    def refresh(self) -> List[str]:
+        """Check all registered resource files for changes
+
+        Cached values of changed resources are dropped and listeners are
+        notified. The first check of a resource that has not been accessed
+        yet records its current state without reporting it as changed.
+        Resources whose file does not exist are skipped.
+
+        Returns
+        -------
+        list
+            Names of resources whose content changed.
+        """
+        with self._lock:
+            updates = {}
+            for name in list(self._resources):
+                try:
+                    update = self._check(name)
+                except FileNotFoundError:
+                    continue
+                if update is not None:
+                    updates[name] = update
+        if updates and self._notify(list(updates)):
+            with self._lock:
+                for name, update in updates.items():
+                    self._states[name] = update + [_MISSING]
+        return list(updates)
+
+    def clear(self) -> None:
+        """Drop all cached values and recorded file states"""
+        with self._lock:
+            self._states.clear()
+
+    def _check(self, name: str) -> Optional[List[Any]]:
+        """Check the state of a resource file against the recorded one
+
+        The state of a file seen for the first time, or whose modification
+        time changed but not its content, is recorded directly. If the
+        file's path or content changed, its new [path, (mtime, size),
+        content hash] is returned for the caller to record once listeners
+        have been notified. Otherwise None is returned.
+        """
+        path, _ = self._resources[name]
+        if callable(path):
+            path = path()
+        stat = os.stat(path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        state = self._states.get(name)
+        if state is not None and state[0] == path and state[1] == stat_key:
+            return None
+        digest = _file_hash(path)
+        if state is None:
+            self._states[name] = [path, stat_key, digest, _MISSING]
+            return None
+        if state[0] == path and state[2] == digest:
+            state[1] = stat_key
+            return None
+        return [path, stat_key, digest]
+
+    def _notify(self, names: List[str]) -> bool:
+        """Call all listeners, returning False if any of them failed"""
+        with self._lock:
+            listeners = list(self._listeners)
+        succeeded = True
+        for listener in listeners:
+            try:
+                listener(names)
+            except Exception:
+                logger.warning('Listener %r failed for changed resources %s.',
+                               listener, ', '.join(names), exc_info=True)
+                succeeded = False
+        return succeeded
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
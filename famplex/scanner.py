@@ -0,0 +1,238 @@
+"""Find all grounding map texts occurring in documents.
+
+:class:`GroundingScanner` compiles the texts of the FamPlex grounding map
+into an Aho-Corasick automaton, which finds every occurrence of every text
+in a document in a single pass over its characters, independently of the
+number of texts. :func:`scan_corpus` distributes the documents of a corpus
+over worker processes, streaming documents in and spans out so that the
+corpus never has to be held in memory.
+"""
+import multiprocessing
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from famplex.load import load_grounding_map
+
+
+__all__ = ['GroundingScanner', 'scan_corpus']
+
+
+Span = Tuple[int, int, str, Dict[str, str]]
+
+
+class GroundingScanner(object):
+    """Aho-Corasick automaton over the texts of a grounding map
+
+    Matching is case sensitive, as is the grounding map. Texts that are
+    explicitly ungrounded in the grounding map take part in matching, so
+    that with longest matching they keep shorter texts within them from
+    being reported, but are not themselves reported.
+
+    Parameters
+    ----------
+    grounding_map : Optional[dict]
+        Dictionary mapping agent texts to INDRA style db_refs dictionaries
+        or None, as returned by :func:`famplex.load.load_grounding_map`. If
+        None, the FamPlex grounding map is loaded. Default: None
+    """
+    def __init__(self, grounding_map: Optional[
+            Dict[str, Optional[Dict[str, str]]]] = None):
+        if grounding_map is None:
+            grounding_map = load_grounding_map()
+        self._grounding_map = grounding_map
+        self._texts = [text for text in grounding_map if text]
+        # State 0 is the root. goto holds the trie edges, output the index
+        # into texts of the text ending at a state or -1, fail the failure
+        # links and dict_link the nearest state along failure links with
+        # an output.
+        goto: List[Dict[str, int]] = [{}]
+        output = [-1]
+        for k, text in enumerate(self._texts):
+            state = 0
+            for char in text:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    output.append(-1)
+                state = next_state
+            output[state] = k
+        fail = [0] * len(goto)
+        dict_link = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                link = goto[link].get(char, 0)
+                fail[next_state] = link
+                dict_link[next_state] = link if output[link] >= 0 \
+                    else dict_link[link]
+        self._goto = goto
+        self._output = output
+        self._fail = fail
+        self._dict_link = dict_link
+
+    def _matches(self, document: str) -> Iterator[Tuple[int, int, int]]:
+        """Generate (start, end, text index) for all occurrences of texts"""
+        goto, output, fail, dict_link, texts = self._goto, self._output, \
+            self._fail, self._dict_link, self._texts
+        state = 0
+        for i, char in enumerate(document):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = state if output[state] >= 0 else dict_link[state]
+            while match:
+                k = output[match]
+                yield i + 1 - len(texts[k]), i + 1, k
+                match = dict_link[match]
+
+    def scan(self, document: str, longest: bool = True,
+             word_boundaries: bool = True) -> Iterator[Span]:
+        """Generate spans of grounding map texts occurring in a document
+
+        Parameters
+        ----------
+        document : str
+            Text to scan.
+        longest : Optional[bool]
+            If True, only the leftmost longest of overlapping matches is
+            kept, so that for example 'NF-kappaB p65' is reported instead
+            of 'NF-kappaB' within it. If False, all occurrences are reported.
+            Default: True
+        word_boundaries : Optional[bool]
+            If True, only matches not preceded or followed by a letter or
+            digit are kept. Default: True
+
+        Returns
+        -------
+        generator
+            Generator of tuples (start, end, text, db_refs) ordered by start
+            and then end, where document[start:end] == text and db_refs is
+            the entry of the grounding map for text.
+        """
+        matches = self._matches(document)
+        if word_boundaries:
+            matches = ((start, end, k) for start, end, k in matches
+                       if (start == 0 or not document[start - 1].isalnum())
+                       and (end == len(document) or
+                            not document[end].isalnum()))
+        if longest:
+            matches = _leftmost_longest(matches)
+        else:
+            matches = sorted(matches)
+        texts, grounding_map = self._texts, self._grounding_map
+        for start, end, k in matches:
+            db_refs = grounding_map[texts[k]]
+            if db_refs is not None:
+                yield start, end, texts[k], db_refs
+
+    def scan_many(self, documents: Iterable[str], longest: bool = True,
+                  word_boundaries: bool = True) -> Iterator[List[Span]]:
+        """Generate the spans found in each of many documents
+
+        Parameters
+        ----------
+        documents : iterable of str
+            Texts to scan. Consumed lazily.
+        longest : Optional[bool]
+            See :meth:`scan`. Default: True
+        word_boundaries : Optional[bool]
+            See :meth:`scan`. Default: True
+
+        Returns
+        -------
+        generator
+            Generator of lists of spans as generated by :meth:`scan`, one
+            list for each document in order.
+        """
+        for document in documents:
+            yield list(self.scan(document, longest, word_boundaries))
+
+
+def _leftmost_longest(matches: Iterable[Tuple[int, int, int]]) -> \
+        List[Tuple[int, int, int]]:
+    """Select non-overlapping matches preferring leftmost, then longest"""
+    selected = []
+    covered = 0
+    for start, end, k in sorted(matches, key=lambda m: (m[0], -m[1])):
+        if start >= covered:
+            selected.append((start, end, k))
+            covered = end
+    return selected
+
+
+_worker_scanner: Optional[GroundingScanner] = None
+
+
+def _init_scan_worker(grounding_map: Optional[
+        Dict[str, Optional[Dict[str, str]]]]) -> None:
+    global _worker_scanner
+    _worker_scanner = GroundingScanner(grounding_map)
+
+
+def _scan_chunk(args: Tuple[List[str], bool, bool]) -> List[List[Span]]:
+    documents, longest, word_boundaries = args
+    return list(_worker_scanner.scan_many(documents, longest,
+                                          word_boundaries))
+
+
+def scan_corpus(documents: Iterable[str], processes: Optional[int] = None,
+                chunksize: int = 64, longest: bool = True,
+                word_boundaries: bool = True,
+                grounding_map: Optional[
+                    Dict[str, Optional[Dict[str, str]]]] = None) -> \
+        Iterator[List[Span]]:
+    """Scan a corpus of documents in parallel worker processes
+
+    Every worker builds its own automaton once. Documents are read from the
+    iterable in chunks, with at most two chunks per worker in flight, and
+    results are returned in order as they complete, so corpora larger than
+    memory can be scanned from a stream.
+
+    Parameters
+    ----------
+    documents : iterable of str
+        Texts to scan. Consumed lazily.
+    processes : Optional[int]
+        Number of worker processes. If None, the number of CPUs is used.
+        Default: None
+    chunksize : Optional[int]
+        Number of documents sent to a worker at a time. Default: 64
+    longest : Optional[bool]
+        See :meth:`GroundingScanner.scan`. Default: True
+    word_boundaries : Optional[bool]
+        See :meth:`GroundingScanner.scan`. Default: True
+    grounding_map : Optional[dict]
+        Grounding map to scan for. If None, the FamPlex grounding map is
+        loaded by each worker. Default: None
+
+    Returns
+    -------
+    generator
+        Generator of lists of spans as generated by
+        :meth:`GroundingScanner.scan`, one list for each document in order.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    documents = iter(documents)
+    # Pool.imap would consume all documents up front when the workers fall
+    # behind, so a bounded number of chunks is submitted at a time.
+    pending: deque = deque()
+    with multiprocessing.Pool(processes, initializer=_init_scan_worker,
+                              initargs=(grounding_map,)) as pool:
+        while True:
+            while len(pending) < 2 * processes:
+                chunk = list(islice(documents, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.apply_async(
+                    _scan_chunk, ((chunk, longest, word_boundaries),)))
+            if not pending:
+                return
+            yield from pending.popleft().get()
@@ -0,0 +1,309 @@
+"""Serve FamPlex ontology and grounding queries over HTTP.
+
+Run with ``python -m famplex.serve`` to start a server that answers batched
+JSON queries from a single preloaded graph, so that services written in
+other languages share one FamPlex process instead of each starting their
+own. The server is built on asyncio streams from the standard library and
+listens on a TCP port or a Unix domain socket.
+
+Every endpoint takes a POST request whose body is a JSON object holding a
+batch of inputs and responds with a JSON object whose 'results' list has
+one entry for each input, in order. Terms are [namespace, id] pairs.
+
+========================= ============================================
+Endpoint                  Request body
+========================= ============================================
+/in_famplex               {"terms": [[ns, id], ...]}
+/ancestral_terms          {"terms": [...], "relation_types": [...]}
+/descendant_terms         {"terms": [...], "relation_types": [...]}
+/refinement_of            {"pairs": [[[ns, id], [ns, id]], ...]}
+/equivalences             {"ids": [fplx_id, ...], "namespaces": [...]}
+/ground                   {"texts": [text, ...]}
+========================= ============================================
+
+relation_types and namespaces are optional. Results of ancestral_terms,
+descendant_terms and equivalences are null for inputs not in FamPlex.
+Results of ground are db_refs objects or null. A GET request to /health
+returns {"status": "ok"}. Malformed requests are answered with status 400
+and an object with an 'error' message.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from famplex import api
+
+
+__all__ = ['RequestError', 'handle_query', 'serve', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+
+# Largest accepted request body in bytes
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class RequestError(Exception):
+    """Raised for requests that cannot be answered, with an HTTP status"""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _terms(payload: Dict[str, Any], key: str = 'terms') -> \
+        List[Tuple[str, str]]:
+    try:
+        return [(str(ns), str(id_)) for ns, id_ in payload[key]]
+    except (KeyError, TypeError, ValueError):
+        raise RequestError(400, "Expected a list of [namespace, id] pairs "
+                                "under '%s'." % key)
+
+
+def _relation_types(payload: Dict[str, Any]) -> Optional[List[str]]:
+    relation_types = payload.get('relation_types')
+    if relation_types is not None and \
+            (not isinstance(relation_types, list) or
+             not set(relation_types) <= {'isa', 'partof'}):
+        raise RequestError(400, "relation_types may only contain 'isa' and "
+                                "'partof'.")
+    return relation_types
+
+
+def _or_none(function: Callable[..., Any], *args: Any) -> Any:
+    """Return function(*args), or None if the input is not in FamPlex"""
+    try:
+        return function(*args)
+    except ValueError:
+        return None
+
+
+def _in_famplex(payload: Dict[str, Any]) -> List[Any]:
+    return [api.in_famplex(*term) for term in _terms(payload)]
+
+
+def _ancestral_terms(payload: Dict[str, Any]) -> List[Any]:
+    relation_types = _relation_types(payload)
+    return [_or_none(api.ancestral_terms, ns, id_, relation_types)
+            for ns, id_ in _terms(payload)]
+
+
+def _descendant_terms(payload: Dict[str, Any]) -> List[Any]:
+    relation_types = _relation_types(payload)
+    return [_or_none(api.descendant_terms, ns, id_, relation_types)
+            for ns, id_ in _terms(payload)]
+
+
+def _refinement_of(payload: Dict[str, Any]) -> List[Any]:
+    try:
+        pairs = [((str(ns1), str(id1)), (str(ns2), str(id2)))
+                 for (ns1, id1), (ns2, id2) in payload['pairs']]
+    except (KeyError, TypeError, ValueError):
+        raise RequestError(400, "Expected a list of pairs of [namespace, id] "
+                                "pairs under 'pairs'.")
+    return api.refinement_of_many(pairs)
+
+
+def _equivalences(payload: Dict[str, Any]) -> List[Any]:
+    ids = payload.get('ids')
+    namespaces = payload.get('namespaces')
+    if not isinstance(ids, list) or \
+            not isinstance(namespaces, (list, type(None))):
+        raise RequestError(400, "Expected a list of FamPlex ids under 'ids' "
+                                "and optionally a list under 'namespaces'.")
+    return [_or_none(api.equivalences, str(fplx_id), namespaces)
+            for fplx_id in ids]
+
+
+def _ground(payload: Dict[str, Any]) -> List[Any]:
+    texts = payload.get('texts')
+    if not isinstance(texts, list) or \
+            not all(isinstance(text, str) for text in texts):
+        raise RequestError(400, "Expected a list of strings under 'texts'.")
+    return api.ground_many(texts)
+
+
+_ENDPOINTS: Dict[str, Callable[[Dict[str, Any]], List[Any]]] = {
+    '/in_famplex': _in_famplex,
+    '/ancestral_terms': _ancestral_terms,
+    '/descendant_terms': _descendant_terms,
+    '/refinement_of': _refinement_of,
+    '/equivalences': _equivalences,
+    '/ground': _ground,
+}
+
+
+def handle_query(path: str, payload: Any) -> Dict[str, Any]:
+    """Answer a batched query for an endpoint
+
+    Parameters
+    ----------
+    path : str
+        Endpoint, for example '/ancestral_terms'.
+    payload : object
+        Decoded JSON body of the request.
+
+    Returns
+    -------
+    dict
+        Response object with a 'results' list.
+
+    Raises
+    ------
+    RequestError
+        If the endpoint does not exist or the payload is malformed.
+    """
+    endpoint = _ENDPOINTS.get(path)
+    if endpoint is None:
+        raise RequestError(404, 'Unknown endpoint %s.' % path)
+    if not isinstance(payload, dict):
+        raise RequestError(400, 'Expected a JSON object.')
+    return {'results': endpoint(payload)}
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error'}
+
+
+def _response(status: int, body: Dict[str, Any], keep_alive: bool) -> bytes:
+    content = json.dumps(body).encode('utf-8')
+    head = ('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n'
+            'Content-Length: %d\r\nConnection: %s\r\n\r\n' %
+            (status, _REASONS[status], len(content),
+             'keep-alive' if keep_alive else 'close'))
+    return head.encode('ascii') + content
+
+
+async def _read_request(reader: asyncio.StreamReader) -> \
+        Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read one request, returning None when the connection is closed"""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, path, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError(400, 'Malformed request line.')
+    headers = {'_version': version}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', '0'))
+    except ValueError:
+        raise RequestError(400, 'Malformed Content-Length.')
+    if length > MAX_BODY_SIZE:
+        raise RequestError(413, 'Request body too large.')
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+async def _handle_connection(reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+    """Answer requests on a connection until the client closes it"""
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or \
+                    (headers['_version'] == 'HTTP/1.1' and
+                     connection != 'close')
+                if method == 'GET' and path == '/health':
+                    status, response = 200, {'status': 'ok'}
+                elif method != 'POST':
+                    raise RequestError(405, 'Use POST for queries.')
+                else:
+                    try:
+                        payload = json.loads(body)
+                    except ValueError:
+                        raise RequestError(400, 'Body is not valid JSON.')
+                    status, response = 200, handle_query(path, payload)
+            except RequestError as err:
+                status, response = err.status, {'error': str(err)}
+            # An unexpected error answering one request must not take the
+            # server down. Its details are logged rather than sent to the
+            # client.
+            except Exception:
+                logger.exception('Error answering request.')
+                status, response = 500, {'error': 'Internal server error.'}
+            writer.write(_response(status, response, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765,
+                unix_path: Optional[str] = None,
+                ready: Optional[Callable[[Any], None]] = None) -> None:
+    """Run the server until cancelled
+
+    Parameters
+    ----------
+    host : Optional[str]
+        Address to listen on. Default: '127.0.0.1'
+    port : Optional[int]
+        TCP port to listen on. If 0, a free port is chosen. Default: 8765
+    unix_path : Optional[str]
+        If given, listen on a Unix domain socket at this path instead of a
+        TCP port. Default: None
+    ready : Optional[callable]
+        Called with the asyncio server once it is listening. Default: None
+    """
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(_handle_connection,
+                                                 path=unix_path)
+    else:
+        server = await asyncio.start_server(_handle_connection, host, port)
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Preload the graph and grounding index and run the server"""
+    parser = argparse.ArgumentParser(
+        prog='python -m famplex.serve',
+        description='Serve FamPlex ontology and grounding queries over '
+                    'HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH',
+                        help='Listen on a Unix domain socket at PATH.')
+    args = parser.parse_args(argv)
+    api.warm_up(closure=True, grounding=True)
+
+    def ready(server: Any) -> None:
+        address = args.unix or '%s:%d' % server.sockets[0].getsockname()[:2]
+        print('Serving FamPlex on %s' % address, flush=True)
+    # Exit cleanly on SIGTERM so that the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Find FamPlex families whose members overlap those of external families.
+
+Proposing equivalences between FamPlex and resources such as SIGNOR,
+InterPro or Reactome amounts to finding, for each external family or
+complex, the FamPlex entities with a similar set of members. Comparing every
+external family with every FamPlex entity grows with the product of their
+numbers. :class:`MemberIndex` instead indexes FamPlex entities by member, so
+that only entities sharing members with an external family are considered,
+and uses the requested score cutoffs to consider fewer still.
+"""
+import math
+from collections import namedtuple
+from typing import Dict, Iterable, List, Mapping, Optional
+
+
+__all__ = ['MemberIndex', 'FamilyMatch']
+
+
+# Similarity of an indexed family to a queried set of members. overlap is
+# the number of shared members, jaccard the size of the intersection over
+# the size of the union and containment the fraction of the queried members
+# that belong to the indexed family.
+FamilyMatch = namedtuple('FamilyMatch', ['fplx_id', 'jaccard', 'containment',
+                                         'overlap'])
+
+
+class MemberIndex(object):
+    """Inverted index from members to the families containing them
+
+    Candidates for a query are found with prefix filtering: if a query of
+    size q must share at least k members with a family to meet the cutoffs,
+    the family must contain one of any q - k + 1 of the query members.
+    Members of the query are ordered from rarest to most common in the
+    index, so that the postings read are the shortest ones, and each
+    candidate is then verified with a set intersection.
+
+    Parameters
+    ----------
+    families : Optional[mapping]
+        Dictionary mapping family IDs to iterables of member IDs. Families
+        without members are ignored. If None, FamPlex entities are indexed
+        by the ids of their members in namespace, as returned by
+        :func:`famplex.api.child_map`. Default: None
+    namespace : Optional[str]
+        Namespace of the members of FamPlex entities, either 'UP' or
+        'HGNC'. Only used if families is None. Default: 'UP'
+    """
+    def __init__(self, families: Optional[Mapping[str, Iterable[str]]] = None,
+                 namespace: str = 'UP'):
+        if families is None:
+            from famplex.api import child_map
+            families = child_map(namespace)
+        self._families: Dict[str, frozenset] = {}
+        postings: Dict[str, List[str]] = {}
+        for family_id, members in families.items():
+            members = frozenset(members)
+            if not members:
+                continue
+            self._families[family_id] = members
+            for member in members:
+                postings.setdefault(member, []).append(family_id)
+        self._postings = {member: tuple(family_ids)
+                          for member, family_ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self._families)
+
+    def match(self, members: Iterable[str], min_jaccard: float = 0.0,
+              min_containment: float = 0.0) -> List[FamilyMatch]:
+        """Return the indexed families similar to a set of members
+
+        Parameters
+        ----------
+        members : iterable of str
+            Members of an external family.
+        min_jaccard : Optional[float]
+            Only families whose Jaccard index with members is at least this
+            are returned. Default: 0.0
+        min_containment : Optional[float]
+            Only families containing at least this fraction of members are
+            returned. Default: 0.0
+
+        Returns
+        -------
+        list
+            FamilyMatch named tuples for families sharing at least one
+            member and meeting both cutoffs, sorted by decreasing Jaccard
+            index, then decreasing containment and then family ID.
+        """
+        query = set(members)
+        size = len(query)
+        if not size:
+            return []
+        # Smallest overlap with which a family can meet the cutoffs. The
+        # Jaccard index is at most overlap / size, since the union is at
+        # least as large as the query. The tolerance keeps rounding errors
+        # from excluding families exactly at a cutoff.
+        min_overlap = max(1, math.ceil(min_jaccard * size - 1e-9),
+                          math.ceil(min_containment * size - 1e-9))
+        if min_overlap > size:
+            return []
+        postings = self._postings
+        ordered = sorted(query, key=lambda member: (len(postings.get(member,
+                                                                     ())),
+                                                    member))
+        candidates = set()
+        for member in ordered[:size - min_overlap + 1]:
+            candidates.update(postings.get(member, ()))
+        matches = []
+        families = self._families
+        for family_id in candidates:
+            family = families[family_id]
+            # A family much smaller or larger than the query cannot reach
+            # min_jaccard whatever its overlap.
+            if len(family) < min_jaccard * size - 1e-9 or \
+                    min_jaccard * len(family) > size + 1e-9:
+                continue
+            overlap = len(query & family)
+            if overlap < min_overlap:
+                continue
+            jaccard = overlap / float(size + len(family) - overlap)
+            containment = overlap / float(size)
+            if jaccard >= min_jaccard and containment >= min_containment:
+                matches.append(FamilyMatch(family_id, jaccard, containment,
+                                           overlap))
+        matches.sort(key=lambda m: (-m.jaccard, -m.containment, m.fplx_id))
+        return matches
+
+    def match_many(self, families: Mapping[str, Iterable[str]],
+                   min_jaccard: float = 0.0,
+                   min_containment: float = 0.0) -> \
+            Dict[str, List[FamilyMatch]]:
+        """Return the indexed families similar to each of many families
+
+        Parameters
+        ----------
+        families : mapping
+            Dictionary mapping IDs of external families to iterables of
+            their members.
+        min_jaccard : Optional[float]
+            See :meth:`match`. Default: 0.0
+        min_containment : Optional[float]
+            See :meth:`match`. Default: 0.0
+
+        Returns
+        -------
+        dict
+            Dictionary mapping the IDs of external families with at least
+            one match to the list returned by :meth:`match`.
+        """
+        results = {}
+        for family_id, members in families.items():
+            matches = self.match(members, min_jaccard, min_containment)
+            if matches:
+                results[family_id] = matches
+        return results
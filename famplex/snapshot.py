@@ -0,0 +1,156 @@
+"""Binary snapshots of built FamPlex data structures for fast startup.
+
+Building the :class:`famplex.graph.FamplexGraph` requires parsing the
+resource files and sorting every adjacency list. Snapshots store the fully
+constructed graph as a pickle in :data:`famplex.locations.CACHE_PATH`. Each
+snapshot is keyed by a hash of the contents of the resource files so that a
+stale snapshot is never used: when any resource file changes the key
+changes, the graph is rebuilt and a new snapshot is written.
+"""
+import glob
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import warnings
+from typing import Any, Dict, Optional
+
+from famplex import load, locations
+
+
+__all__ = ['SNAPSHOT_VERSION', 'resources_hash', 'snapshot_path',
+           'load_snapshot', 'save_snapshot']
+
+
+# Increment whenever the layout of the snapshotted data structures changes
+SNAPSHOT_VERSION = 2
+
+
+def resources_hash() -> str:
+    """Return a hash of the contents of the resource files of the graph
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest over the names and contents of the
+        relations, entities and equivalences files currently used by
+        :mod:`famplex.load`.
+    """
+    digest = hashlib.sha256()
+    for path in [load.RELATIONS_PATH, load.ENTITIES_PATH,
+                 load.EQUIVALENCES_PATH]:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def snapshot_path(key: str, compact: bool) -> str:
+    """Return path to the snapshot file for a given key and representation
+
+    Parameters
+    ----------
+    key : str
+        Hash of resource files as returned by :func:`resources_hash`.
+    compact : bool
+        True for snapshots of graphs using the compact array representation.
+
+    Returns
+    -------
+    str
+    """
+    return os.path.join(locations.CACHE_PATH,
+                        _snapshot_prefix(compact) + '%s.pickle' % key)
+
+
+def load_snapshot(key: str, compact: bool) -> Optional[Dict[str, Any]]:
+    """Load a snapshot if a valid one exists for the given key
+
+    Parameters
+    ----------
+    key : str
+        Hash of resource files as returned by :func:`resources_hash`.
+    compact : bool
+        True for snapshots of graphs using the compact array representation.
+
+    Returns
+    -------
+    dict or None
+        Dictionary mapping attribute names to values, or None if there is
+        no usable snapshot.
+    """
+    try:
+        with open(snapshot_path(key, compact), 'rb') as f:
+            content = pickle.load(f)
+    # A missing, truncated or otherwise unreadable snapshot is never fatal;
+    # the caller falls back to building from the resource files.
+    except Exception:
+        return None
+    if not isinstance(content, dict) or \
+            content.get('version') != SNAPSHOT_VERSION or \
+            content.get('key') != key:
+        return None
+    return content['state']
+
+
+def save_snapshot(key: str, compact: bool, state: Dict[str, Any]) -> None:
+    """Write a snapshot and remove outdated snapshots
+
+    Snapshots of the same representation for other resource files and
+    snapshots written by other versions of FamPlex are removed.
+
+    The snapshot is written to a temporary file which is then atomically
+    renamed, so that concurrently starting processes never read a partially
+    written snapshot. Failure to write, for example because the cache
+    directory is read only, results in a warning.
+
+    Parameters
+    ----------
+    key : str
+        Hash of resource files as returned by :func:`resources_hash`.
+    compact : bool
+        True for snapshots of graphs using the compact array representation.
+    state : dict
+        Dictionary mapping attribute names to values.
+    """
+    path = snapshot_path(key, compact)
+    try:
+        os.makedirs(locations.CACHE_PATH, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=locations.CACHE_PATH,
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'version': SNAPSHOT_VERSION, 'key': key,
+                             'state': state}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except OSError as err:
+        warnings.warn('Could not write FamPlex snapshot to %s: %s' %
+                      (locations.CACHE_PATH, err), Warning)
+        return
+    for old_path in glob.glob(os.path.join(locations.CACHE_PATH,
+                                           'famplex_graph_v*_*.pickle')):
+        match = _SNAPSHOT_NAME.match(os.path.basename(old_path))
+        if old_path == path or match is None:
+            continue
+        # The current snapshot of the other representation is kept
+        if int(match.group(1)) == SNAPSHOT_VERSION and \
+                (match.group(2) == 'compact') != compact:
+            continue
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+
+
+_SNAPSHOT_NAME = re.compile(
+    r'famplex_graph_v(\d+)_(compact|dict)_\w+\.pickle$')
+
+
+def _snapshot_prefix(compact: bool) -> str:
+    return 'famplex_graph_v%d_%s_' % (SNAPSHOT_VERSION,
+                                      'compact' if compact else 'dict')
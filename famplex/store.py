@@ -0,0 +1,367 @@
+"""Indexed SQLite store of all FamPlex resources.
+
+:func:`write_store` compiles entities, relations, equivalences, the grounding
+map, gene prefixes, descriptions, the root class mapping and the transitive
+closure of the relations into a single SQLite file with an index for every
+lookup made by :class:`FamplexStore`. The store answers queries through
+indexed statements instead of loading the resources into Python
+dictionaries, and reads pages through a memory map, so that processes
+opening the same file share the operating system page cache rather than
+each holding its own copy of the resources on the heap.
+
+The store is read only once written. The version of the format is recorded
+in the SQLite user_version of the file.
+"""
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Container, Dict, List, Optional, Tuple
+
+from famplex.graph import FamplexGraph, _relation_key
+from famplex.load import iter_descriptions, iter_entities, \
+    iter_equivalences, iter_gene_prefixes, iter_grounding_map
+from famplex.snapshot import resources_hash
+
+
+__all__ = ['STORE_VERSION', 'write_store', 'FamplexStore']
+
+
+STORE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE entities (id TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE relations (
+    namespace1 TEXT, id1 TEXT, position1 INTEGER, relation TEXT,
+    namespace2 TEXT, id2 TEXT, position2 INTEGER);
+CREATE INDEX relations_parents ON relations (namespace1, id1, position1);
+CREATE INDEX relations_children ON relations (namespace2, id2, position2);
+CREATE TABLE roots (
+    namespace TEXT, id TEXT, position INTEGER, root_namespace TEXT,
+    root_id TEXT, PRIMARY KEY (namespace, id, position)) WITHOUT ROWID;
+CREATE TABLE root_classes (position INTEGER PRIMARY KEY, namespace TEXT,
+                           id TEXT);
+CREATE TABLE closure (
+    relations TEXT, namespace TEXT, id TEXT, ancestor_namespace TEXT,
+    ancestor_id TEXT,
+    PRIMARY KEY (relations, namespace, id, ancestor_namespace, ancestor_id))
+    WITHOUT ROWID;
+CREATE TABLE equivalences (position INTEGER PRIMARY KEY, namespace TEXT,
+                           id TEXT, fplx_id TEXT);
+CREATE INDEX equivalences_fplx ON equivalences (fplx_id, position);
+CREATE INDEX equivalences_reverse ON equivalences (namespace, id, position);
+CREATE TABLE grounding_map (
+    text TEXT, position INTEGER, namespace TEXT, id TEXT,
+    PRIMARY KEY (text, position)) WITHOUT ROWID;
+CREATE TABLE gene_prefixes (position INTEGER PRIMARY KEY, pattern TEXT,
+                            category TEXT, notes TEXT);
+CREATE TABLE descriptions (fplx_id TEXT PRIMARY KEY, refs TEXT,
+                           description TEXT) WITHOUT ROWID;
+"""
+
+# Statements used by FamplexStore. SQLite keeps compiled statements in a
+# per connection cache keyed by their text, so each is prepared only once.
+_IN_FAMPLEX = 'SELECT 1 FROM roots WHERE namespace = ? AND id = ? LIMIT 1'
+_PARENT_EDGES = ('SELECT namespace2, id2, relation FROM relations '
+                 'WHERE namespace1 = ? AND id1 = ? ORDER BY position1')
+_CHILD_EDGES = ('SELECT namespace1, id1, relation FROM relations '
+                'WHERE namespace2 = ? AND id2 = ? ORDER BY position2')
+_ROOT_TERMS = ('SELECT root_namespace, root_id FROM roots '
+               'WHERE namespace = ? AND id = ? ORDER BY position')
+_ANCESTOR = ('SELECT 1 FROM closure WHERE relations = ? AND namespace = ? '
+             'AND id = ? AND ancestor_namespace = ? AND ancestor_id = ?')
+_EQUIVALENCES = ('SELECT namespace, id FROM equivalences '
+                 'WHERE fplx_id = ? ORDER BY position')
+_REVERSE_EQUIVALENCES = ('SELECT fplx_id FROM equivalences '
+                         'WHERE namespace = ? AND id = ? ORDER BY position')
+_GROUNDING = ('SELECT namespace, id FROM grounding_map WHERE text = ? '
+              'ORDER BY position')
+
+
+def write_store(path: str, graph: Optional[FamplexGraph] = None) -> None:
+    """Compile all FamPlex resources into an indexed SQLite file
+
+    Parameters
+    ----------
+    path : str
+        Path of the file to write. The file is written to a temporary file
+        in the same directory and atomically moved into place.
+    graph : Optional[famplex.graph.FamplexGraph]
+        Graph built from the current resource files, from which relations,
+        root classes and the transitive closure are taken. If None, one is
+        built. Default: None
+    """
+    if graph is None:
+        graph = FamplexGraph()
+    closure = graph._closure
+    if closure is None:
+        graph.build_closure()
+        closure = graph._closure
+        graph._closure = None
+        graph.closure_stats = None
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(tmp_path)
+        try:
+            _write_tables(connection, graph, closure)
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _write_tables(connection: sqlite3.Connection, graph: FamplexGraph,
+                  closure: Any) -> None:
+    connection.executescript(_SCHEMA)
+    connection.execute('PRAGMA user_version = %d' % STORE_VERSION)
+    connection.execute('INSERT INTO metadata VALUES (?, ?)',
+                       ('resources_hash', resources_hash()))
+    connection.executemany('INSERT INTO entities VALUES (?)',
+                           ((entity,) for entity in iter_entities()))
+    # Positions preserve the order of edges in the adjacency lists of the
+    # graph in both directions.
+    child_positions = {}
+    for node, edges in graph._reverse_graph.items():
+        for position, (ns, id_, rel) in enumerate(edges):
+            child_positions[(ns, id_, rel) + node] = position
+    connection.executemany(
+        'INSERT INTO relations VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (node + (position, rel, ns, id_,
+                 child_positions[node + (rel, ns, id_)])
+         for node, edges in graph._graph.items()
+         for position, (ns, id_, rel) in enumerate(edges)))
+    connection.executemany(
+        'INSERT INTO roots VALUES (?, ?, ?, ?, ?)',
+        (node + (position,) + root
+         for node, roots in graph._root_class_mapping.items()
+         for position, root in enumerate(roots)))
+    connection.executemany('INSERT INTO root_classes VALUES (?, ?, ?)',
+                           ((position,) + root for position, root
+                            in enumerate(graph.root_classes)))
+    connection.executemany(
+        'INSERT INTO closure VALUES (?, ?, ?, ?, ?)',
+        ((','.join(key),) + node + ancestor
+         for key, ancestors in closure.items()
+         for node, ancestor_set in ancestors.items()
+         for ancestor in ancestor_set))
+    connection.executemany('INSERT INTO equivalences VALUES (?, ?, ?, ?)',
+                           ((position,) + tuple(row) for position, row
+                            in enumerate(iter_equivalences())))
+    # Later rows for the same text take precedence, as in
+    # famplex.load.load_grounding_map. Texts that are explicitly ungrounded
+    # are stored as a single row without namespace.
+    grounding_map = dict(iter_grounding_map())
+    connection.executemany(
+        'INSERT INTO grounding_map VALUES (?, ?, ?, ?)',
+        ((text, position, ns, id_)
+         for text, db_refs in grounding_map.items()
+         for position, (ns, id_)
+         in enumerate(_grounding_rows(db_refs))))
+    connection.executemany('INSERT INTO gene_prefixes VALUES (?, ?, ?, ?)',
+                           ((position,) + tuple(row) for position, row
+                            in enumerate(iter_gene_prefixes())))
+    connection.executemany('INSERT OR REPLACE INTO descriptions '
+                           'VALUES (?, ?, ?)',
+                           (tuple(row) for row in iter_descriptions()))
+    connection.commit()
+    connection.execute('ANALYZE')
+    connection.execute('VACUUM')
+
+
+def _grounding_rows(db_refs: Optional[Dict[str, str]]) -> \
+        List[Tuple[Optional[str], Optional[str]]]:
+    if db_refs is None:
+        return [(None, None)]
+    return [(ns, id_) for ns, id_ in db_refs.items() if ns != 'TEXT']
+
+
+class FamplexStore(object):
+    """Read only access to a store written by :func:`write_store`
+
+    Provides the lookup methods of :class:`famplex.graph.FamplexGraph` that
+    do not require traversal, with identical results, together with lookups
+    in the grounding map. Every method runs a single indexed query.
+
+    Each thread, and each process after a fork, opens its own read only
+    connection on first use. Connections keep compiled statements in a
+    statement cache and read the file through a memory map.
+
+    Attributes
+    ----------
+    root_classes : list
+        Top level families and complexes in the FamPlex ontology.
+
+    Parameters
+    ----------
+    path : str
+        Path to a file written by :func:`write_store`.
+    cached_statements : Optional[int]
+        Size of the statement cache of each connection. Default: 64
+
+    Raises
+    ------
+    ValueError
+        If the file is not a FamPlex store of the current version.
+    """
+    def __init__(self, path: str, cached_statements: int = 64):
+        self.__error_message = 'Given input is not in the FamPlex ontology.'
+        self._path = os.path.abspath(path)
+        self._cached_statements = cached_statements
+        self._local = threading.local()
+        try:
+            version = self._query_value('PRAGMA user_version')
+        except sqlite3.DatabaseError as err:
+            raise ValueError('%s is not a FamPlex store: %s' % (path, err))
+        if version != STORE_VERSION:
+            raise ValueError('FamPlex store %s has version %d, expected %d.'
+                             % (path, version, STORE_VERSION))
+        self.root_classes: List[Tuple[str, str]] = \
+            self._query('SELECT namespace, id FROM root_classes '
+                        'ORDER BY position', ())
+
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            uri = pathlib.Path(self._path).as_uri() + '?mode=ro'
+            connection = sqlite3.connect(
+                uri, uri=True, cached_statements=self._cached_statements)
+            connection.execute('PRAGMA mmap_size = %d' %
+                               os.path.getsize(self._path))
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def _query(self, statement: str,
+               parameters: Tuple[Any, ...]) -> List[Tuple[str, ...]]:
+        return self._connection().execute(statement, parameters).fetchall()
+
+    def _query_value(self, statement: str,
+                     parameters: Tuple[Any, ...] = ()) -> Any:
+        row = self._connection().execute(statement, parameters).fetchone()
+        return None if row is None else row[0]
+
+    def close(self) -> None:
+        """Close the connection of the calling thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.__dict__.clear()
+
+    def __enter__(self) -> 'FamplexStore':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def in_famplex(self, namespace: str, id_: str) -> bool:
+        """Returns True if input term is a member of the FamPlex ontology.
+
+        See :meth:`famplex.graph.FamplexGraph.in_famplex`.
+        """
+        return self._query_value(_IN_FAMPLEX, (namespace, id_)) is not None
+
+    def raise_value_error_if_not_in_famplex(self, namespace: str,
+                                            id_: str) -> None:
+        """Raise a value error if input is not in FamPlex ontology
+
+        Raises
+        ------
+        ValueError
+        If (namespace, id_) does not correspond to a term in FamPlex.
+        """
+        if not self.in_famplex(namespace, id_):
+            raise ValueError(self.__error_message)
+
+    def parent_edges(self, namespace: str,
+                     id_: str) -> List[Tuple[str, str, str]]:
+        """Returns node and relation type for all parents of input
+
+        See :meth:`famplex.graph.FamplexGraph.parent_edges`.
+        """
+        edges = self._query(_PARENT_EDGES, (namespace, id_))
+        if not edges:
+            self.raise_value_error_if_not_in_famplex(namespace, id_)
+        return edges
+
+    def child_edges(self, namespace: str,
+                    id_: str) -> List[Tuple[str, str, str]]:
+        """Returns node and relation type for all children of input
+
+        See :meth:`famplex.graph.FamplexGraph.child_edges`.
+        """
+        edges = self._query(_CHILD_EDGES, (namespace, id_))
+        if not edges:
+            self.raise_value_error_if_not_in_famplex(namespace, id_)
+        return edges
+
+    def root_terms(self, namespace: str, id_: str) -> List[Tuple[str, str]]:
+        """Returns top level terms above the input term
+
+        See :meth:`famplex.graph.FamplexGraph.root_terms`.
+        """
+        roots = self._query(_ROOT_TERMS, (namespace, id_))
+        if not roots:
+            raise ValueError(self.__error_message)
+        return roots
+
+    def equivalences(self, fplx_id: str) -> List[Tuple[str, str]]:
+        """Return list of equivalent terms from other namespaces.
+
+        See :meth:`famplex.graph.FamplexGraph.equivalences`.
+        """
+        self.raise_value_error_if_not_in_famplex('FPLX', fplx_id)
+        return self._query(_EQUIVALENCES, (fplx_id,))
+
+    def reverse_equivalences(self, namespace: str, id_: str) -> List[str]:
+        """Get equivalent FamPlex terms to a given term from another namespace
+
+        See :meth:`famplex.graph.FamplexGraph.reverse_equivalences`.
+        """
+        return [fplx_id for fplx_id,
+                in self._query(_REVERSE_EQUIVALENCES, (namespace, id_))]
+
+    def relation(self, namespace1: str, id1: str,
+                 namespace2: str, id2: str,
+                 relation_types: Container[str]) -> bool:
+        """General function for determining if two entities are related
+
+        Answered from the precomputed transitive closure. See
+        :meth:`famplex.graph.FamplexGraph.relation`.
+        """
+        if not self.in_famplex(namespace1, id1) or \
+                not self.in_famplex(namespace2, id2):
+            return False
+        if (namespace1, id1) == (namespace2, id2):
+            return True
+        key = ','.join(_relation_key(relation_types))
+        return self._query_value(_ANCESTOR, (key, namespace1, id1,
+                                             namespace2, id2)) is not None
+
+    def ground(self, text: str) -> Optional[Dict[str, str]]:
+        """Look up a text in the grounding map
+
+        Parameters
+        ----------
+        text : str
+            An agent text.
+
+        Returns
+        -------
+        dict or None
+            INDRA style db_refs dictionary for the text as in
+            :func:`famplex.load.load_grounding_map`, or None if the text is
+            not in the grounding map or is explicitly ungrounded.
+        """
+        rows = self._query(_GROUNDING, (text,))
+        if not rows or rows[0][0] is None:
+            return None
+        db_refs = {'TEXT': text}
+        db_refs.update(rows)
+        return db_refs
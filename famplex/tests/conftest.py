@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path_factory, monkeypatch):
+    """Keep graph snapshots written by tests out of the user's cache"""
+    import famplex.locations
+    path = str(tmp_path_factory.getbasetemp() / 'famplex_cache')
+    monkeypatch.setattr(famplex.locations, 'CACHE_PATH', path)
+    monkeypatch.setenv('FAMPLEX_CACHE_PATH', path)
+    return path
@@ -1,9 +1,15 @@
+import json
+
 import pytest
 
 from famplex import child_terms, parent_terms, ancestral_terms, \
     descendant_terms, individual_members, isa, partof, refinement_of, \
     dict_representation, equivalences, reverse_equivalences, in_famplex, \
-    root_terms
+    root_terms, isa_many, partof_many, refinement_of_many, all_root_terms, \
+    iter_json_representation, common_ancestors, lowest_common_ancestors, \
+    refinement_pairs, ground, ground_many, ground_fuzzy, strip_gene_prefix, \
+    strip_gene_prefixes, grounding_texts, translate, translate_many, \
+    expand_to, child_map
 
 
 @pytest.mark.parametrize('test_input,expected',
@@ -292,6 +298,20 @@ def test_refinement_of(test_input, expected):
     assert refinement_of(*test_input) == expected
 
 
+@pytest.mark.parametrize('many,single', [(isa_many, isa),
+                                         (partof_many, partof),
+                                         (refinement_of_many, refinement_of)])
+def test_relation_many(many, single):
+    terms = [('HGNC', 'ESR1'), ('FPLX', 'ESR'), ('HGNC', 'SCN8A'),
+             ('FPLX', 'SCN'), ('HGNC', 'PRKAB1'), ('FPLX', 'AMPK_A2B1G1'),
+             ('FPLX', 'AMPK'), ('HGNC', 'DAP3'),
+             ('FPLX', 'Mitochondrial_Ribosome'), ('FPLX', 'MEK'),
+             ('HGNC', 'GENE')]
+    pairs = [(term1, term2) for term1 in terms for term2 in terms]
+    assert many(pairs) == [single(*term1, *term2) for term1, term2 in pairs]
+    assert many([]) == []
+
+
 @pytest.mark.parametrize('test_input,expected',
                          # Estrogen Receptor Family
                          [(('FPLX', 'ESR'),
@@ -325,6 +345,67 @@ def test_dict_representation_raises():
         dict_representation('FPLX', 'Complex')
 
 
+def _recursive_dict_representation(namespace, id_):
+    from famplex.api import _get_graph
+    return {(namespace, id_):
+            [(_recursive_dict_representation(ns2, id2), rel)
+             for ns2, id2, rel in _get_graph().child_edges(namespace, id_)]}
+
+
+def _dict_to_json_tree(tree, relation=None):
+    [((namespace, id_), children)] = tree.items()
+    out = {'namespace': namespace, 'id': id_}
+    if relation is not None:
+        out['relation'] = relation
+    out['children'] = None if children is None else \
+        [_dict_to_json_tree(child, rel) for child, rel in children]
+    return out
+
+
+def test_dict_representation_all_roots():
+    for root in all_root_terms():
+        assert dict_representation(*root) == \
+            _recursive_dict_representation(*root)
+
+
+def test_dict_representation_shares_subtrees():
+    tree = dict_representation('FPLX', 'AMPK')
+    complexes = [child for child, rel in tree[('FPLX', 'AMPK')]
+                 if rel == 'isa']
+    subunits = {}
+    for complex_ in complexes:
+        for subtree, _ in list(complex_.values())[0]:
+            subunits.setdefault(list(subtree)[0], []).append(subtree)
+    assert all(len(set(map(id, trees))) == 1 for trees in subunits.values())
+
+
+def test_dict_representation_limits():
+    assert dict_representation('FPLX', 'MAP2K', max_depth=0) == \
+        {('FPLX', 'MAP2K'): None}
+    assert dict_representation('FPLX', 'MAP2K', max_depth=1) == \
+        {('FPLX', 'MAP2K'): [({('FPLX', 'MEK'): None}, 'isa'),
+                             ({('HGNC', 'MAP2K3'): []}, 'isa'),
+                             ({('HGNC', 'MAP2K4'): []}, 'isa'),
+                             ({('HGNC', 'MAP2K5'): []}, 'isa'),
+                             ({('HGNC', 'MAP2K6'): []}, 'isa'),
+                             ({('HGNC', 'MAP2K7'): []}, 'isa')]}
+    assert dict_representation('FPLX', 'MAP2K', max_nodes=7) == \
+        dict_representation('FPLX', 'MAP2K', max_depth=1)
+    assert dict_representation('FPLX', 'MAP2K', max_nodes=9) == \
+        dict_representation('FPLX', 'MAP2K')
+
+
+@pytest.mark.parametrize('test_input,limits',
+                         [(('FPLX', 'AMPK'), {}),
+                          (('FPLX', 'MAP2K'), {'max_depth': 1}),
+                          (('FPLX', 'MAP2K'), {'max_nodes': 3}),
+                          (('HGNC', 'ESR1'), {})])
+def test_iter_json_representation(test_input, limits):
+    text = ''.join(iter_json_representation(*test_input, **limits))
+    assert json.loads(text) == \
+        _dict_to_json_tree(dict_representation(*test_input, **limits))
+
+
 def test_equivalences():
     expected = [('MESH', 'D011948'), ('NCIT', 'C17065')]
     assert set(expected) <= set(equivalences('TCR'))
@@ -343,3 +424,242 @@ def test_equivalences_raises():
                           (('MESH', 'D000067496'), [])])
 def test_reverse_equivalences(test_input, expected):
     assert reverse_equivalences(*test_input) == expected
+
+
+@pytest.mark.parametrize('test_input,expected',
+                         [(('MESH', 'D011948', 'NCIT'), ['C17065']),
+                          (('MESH', 'D011948', 'FPLX'), ['TCR']),
+                          (('FPLX', 'TCR', 'MESH'), ['D011948']),
+                          (('FPLX', 'TCR', 'FPLX'), ['TCR']),
+                          (('FPLX', 'Complex', 'FPLX'), []),
+                          (('MESH', 'D000067496', 'NCIT'), [])])
+def test_translate(test_input, expected):
+    assert translate(*test_input) == expected
+
+
+def test_translate_many():
+    assert translate_many('MESH', ['D011948', 'D000067496', 'D011948'],
+                          'NCIT') == [['C17065'], [], ['C17065']]
+
+
+@pytest.fixture
+def hgnc_uniprot_map(tmp_path, monkeypatch):
+    import famplex.api
+    import famplex.load
+    path = tmp_path / 'hgnc_uniprot_map.csv'
+    path.write_text('MAPK1,6871,P28482\r\nMAPK3,6877,P27361\r\n'
+                    'PRKAA1,9376,Q13131\r\nPRKAA2,9377,\r\n'
+                    'H4C7,4787,P62805\r\n')
+    monkeypatch.setattr(famplex.load, 'HGNC_UNIPROT_PATH', str(path))
+    monkeypatch.setattr(famplex.api, '_child_maps', {})
+
+
+@pytest.mark.parametrize('test_input,expected',
+                         [(('UP', 'ERK'), ['P27361', 'P28482']),
+                          (('HGNC', 'ERK'), ['MAPK1', 'MAPK3']),
+                          (('UP', 'AMPK_alpha'), ['Q13131']),
+                          (('UP', 'Histone_H4'), ['P62805']),
+                          (('HGNC', 'Histone_H4'), ['H4C7'])])
+def test_expand_to(hgnc_uniprot_map, test_input, expected):
+    assert expand_to(*test_input) == expected
+
+
+def test_expand_to_raises(hgnc_uniprot_map):
+    with pytest.raises(ValueError):
+        expand_to('UP', 'Complex')
+    with pytest.raises(ValueError):
+        expand_to('MESH', 'ERK')
+
+
+def test_expand_to_shipped_table():
+    assert expand_to('UP', 'ERK') == ['P27361', 'P28482']
+    assert expand_to('UP', 'AMPK_alpha') == ['P54646', 'Q13131']
+    assert expand_to('HGNC', 'Histone_H4') == \
+        sorted(id_ for ns, id_ in individual_members('FPLX', 'Histone_H4')
+               if ns == 'HGNC')
+
+
+def test_child_map(hgnc_uniprot_map):
+    children = child_map('HGNC')
+    assert children['ERK'] == ['MAPK1', 'MAPK3']
+    for fplx_id, members in list(children.items())[:200]:
+        if not in_famplex('FPLX', fplx_id):
+            assert members == []
+            continue
+        assert members == sorted(
+            {id_ for ns, id_ in individual_members('FPLX', fplx_id)
+             if ns == 'HGNC'} |
+            {'H4C7' for ns, id_ in individual_members('FPLX', fplx_id)
+             if (ns, id_) == ('UP', 'P62805')})
+
+
+def test_graph_is_built_lazily(monkeypatch):
+    import famplex.api
+    monkeypatch.setattr(famplex.api, '_famplex_graph', None)
+    assert in_famplex('FPLX', 'AMPK')
+    assert famplex.api._famplex_graph is not None
+
+
+def test_warm_up():
+    import famplex.api
+    famplex.api.warm_up(closure=True)
+    assert famplex.api._get_graph().closure_stats is not None
+    assert refinement_of('HGNC', 'PRKAA1', 'FPLX', 'AMPK')
+    famplex.api.warm_up(grounding=True)
+    assert famplex.api._grounding_index is not None
+
+
+def test_traversal_cache(monkeypatch):
+    import famplex.api
+    # The original cache is restored however the test ends
+    monkeypatch.setattr(famplex.api, '_cached_traverse_terms',
+                        famplex.api._cached_traverse_terms)
+    famplex.api.set_traversal_cache_size(2)
+    info = famplex.api.traversal_cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (0, 0, 2)
+    terms = ancestral_terms('HGNC', 'ESR1')
+    terms.append(('FPLX', 'MEK'))
+    assert ancestral_terms('HGNC', 'ESR1') == [('FPLX', 'ESR')]
+    assert famplex.api.traversal_cache_info().hits == 1
+    descendant_terms('FPLX', 'ESR')
+    descendant_terms('FPLX', 'ESR', ['isa'])
+    info = famplex.api.traversal_cache_info()
+    assert (info.misses, info.currsize) == (3, 2)
+    famplex.api.clear_traversal_cache()
+    assert famplex.api.traversal_cache_info().currsize == 0
+
+
+@pytest.mark.parametrize('terms,rel_types,expected',
+                         [([('HGNC', 'HRAS'), ('HGNC', 'KRAS')], None,
+                           [('FPLX', 'RAS')]),
+                          ([('HGNC', 'HRAS')], None, [('HGNC', 'HRAS')]),
+                          ([('HGNC', 'HRAS'), ('FPLX', 'RAS')], None,
+                           [('FPLX', 'RAS')]),
+                          ([('HGNC', 'PRKAA1'), ('HGNC', 'PRKAB1')], None,
+                           [('FPLX', 'AMPK_A1B1G1'),
+                            ('FPLX', 'AMPK_A1B1G2'),
+                            ('FPLX', 'AMPK_A1B1G3')]),
+                          ([('HGNC', 'PRKAA1'), ('HGNC', 'PRKAB1')],
+                           ['isa'], []),
+                          ([('HGNC', 'ESR1'), ('HGNC', 'HRAS')], None, [])])
+def test_lowest_common_ancestors(terms, rel_types, expected):
+    assert lowest_common_ancestors(terms, rel_types) == expected
+
+
+def test_common_ancestors():
+    assert common_ancestors([('HGNC', 'SCN8A'), ('HGNC', 'SCN5A')]) == \
+        [('FPLX', 'Sodium_voltage_gated_channel_alpha_subunits'),
+         ('FPLX', 'SCN'), ('FPLX', 'Sodium_channels'),
+         ('FPLX', 'Cation_channels'), ('FPLX', 'Voltage_gated_ion_channels')]
+    for term in [('HGNC', 'PRKAA1'), ('FPLX', 'AMPK_alpha')]:
+        assert set(common_ancestors([term])) == \
+            set(ancestral_terms(*term)) | {term}
+
+
+@pytest.mark.parametrize('terms', [[], [('HGNC', 'GENE')],
+                                   [('HGNC', 'HRAS'), ('HGNC', 'GENE')]])
+def test_common_ancestors_raises(terms):
+    with pytest.raises(ValueError):
+        common_ancestors(terms)
+    with pytest.raises(ValueError):
+        lowest_common_ancestors(terms)
+
+
+@pytest.mark.parametrize('rel_types,single', [(None, refinement_of),
+                                              (['isa'], isa),
+                                              (['partof'], partof)])
+@pytest.mark.parametrize('processes', [None, 2])
+def test_refinement_pairs(rel_types, single, processes):
+    terms = [('HGNC', 'ESR1'), ('FPLX', 'ESR'), ('HGNC', 'PRKAB1'),
+             ('FPLX', 'AMPK_A2B1G1'), ('FPLX', 'AMPK'), ('HGNC', 'GENE'),
+             ('HGNC', 'PRKAA1'), ('FPLX', 'AMPK_alpha'), ('HGNC', 'ESR1'),
+             ('HGNC', 'DAP3'), ('FPLX', 'Mitochondrial_Ribosome')]
+    expected = [(i, j) for i, term1 in enumerate(terms)
+                for j, term2 in enumerate(terms)
+                if i != j and single(*term1, *term2)]
+    assert refinement_pairs(terms, rel_types, processes=processes) == \
+        expected
+    assert refinement_pairs([]) == []
+
+
+def test_hot_reload(tmp_path, monkeypatch):
+    import shutil
+    import famplex.api
+    import famplex.load
+    import famplex.locations
+    monkeypatch.setattr(famplex.locations, 'CACHE_PATH', str(tmp_path))
+    path = str(tmp_path / 'relations.csv')
+    shutil.copy(famplex.load.RELATIONS_PATH, path)
+    monkeypatch.setattr(famplex.load, 'RELATIONS_PATH', path)
+    monkeypatch.setattr(famplex.api, '_famplex_graph', None)
+    assert ancestral_terms('HGNC', 'PRKAA1')
+    famplex.api.enable_hot_reload()
+    try:
+        old_graph = famplex.api._get_graph()
+        with open(path, 'w') as f:
+            f.write('HGNC,HRAS,isa,FPLX,RAS\r\n')
+        assert 'relations' in famplex.load.resource_registry.refresh()
+        assert famplex.api._get_graph() is not old_graph
+        assert not in_famplex('HGNC', 'PRKAA1')
+        assert ancestral_terms('HGNC', 'HRAS') == [('FPLX', 'RAS')]
+    finally:
+        famplex.api.disable_hot_reload()
+        famplex.api.clear_traversal_cache()
+
+
+def test_hot_reload_keeps_graph_on_error(tmp_path, monkeypatch):
+    import shutil
+    import famplex.api
+    import famplex.load
+    import famplex.locations
+    monkeypatch.setattr(famplex.locations, 'CACHE_PATH', str(tmp_path))
+    path = str(tmp_path / 'relations.csv')
+    shutil.copy(famplex.load.RELATIONS_PATH, path)
+    monkeypatch.setattr(famplex.load, 'RELATIONS_PATH', path)
+    monkeypatch.setattr(famplex.api, '_famplex_graph', None)
+    famplex.api.enable_hot_reload()
+    try:
+        # Files changing before the graph is first used do not build it
+        with open(path, 'a') as f:
+            f.write('HGNC,HRAS,isa,FPLX,RAS\r\n')
+        assert famplex.load.resource_registry.refresh() == ['relations']
+        assert famplex.api._famplex_graph is None
+        old_graph = famplex.api._get_graph()
+        with open(path, 'w') as f:
+            f.write('FPLX,A,isa,FPLX,B\r\nFPLX,B,isa,FPLX,A\r\n')
+        assert famplex.load.resource_registry.refresh() == ['relations']
+        assert famplex.api._get_graph() is old_graph
+        assert in_famplex('HGNC', 'PRKAA1')
+        with open(path, 'w') as f:
+            f.write('HGNC,HRAS,isa,FPLX,RAS\r\n')
+        assert famplex.load.resource_registry.refresh() == ['relations']
+        assert famplex.api._get_graph() is not old_graph
+        assert not in_famplex('HGNC', 'PRKAA1')
+    finally:
+        famplex.api.disable_hot_reload()
+        famplex.api.clear_traversal_cache()
+
+
+def test_ground():
+    assert ground('AKT') == {'TEXT': 'AKT', 'FPLX': 'AKT'}
+    assert ground('tnf-alpha')['UP'] == 'P01375'
+    assert ground_many(['AKT', 'tnf-alpha']) == [ground('AKT'),
+                                                 ground('tnf-alpha')]
+
+
+def test_ground_fuzzy():
+    assert ground_fuzzy('AKT') == [(ground('AKT'), 0)]
+    assert 'AMPK' in [db_refs['TEXT'] for db_refs, _ in ground_fuzzy('AMPKs')]
+
+
+def test_strip_gene_prefix():
+    assert strip_gene_prefix('GST-AKT1') == ('AKT1', 'experimental context')
+    assert strip_gene_prefixes(['GST-AKT1', 'AKT1']) == \
+        [('AKT1', 'experimental context'), ('AKT1', None)]
+
+
+def test_grounding_texts():
+    texts = grounding_texts('FPLX', 'AKT')
+    assert 'Akt' in texts and 'AKT' in texts
+    assert all(ground(text)['FPLX'] == 'AKT' for text in texts)
+    assert grounding_texts('HGNC', 'GENE') == []
@@ -0,0 +1,312 @@
+import os
+
+import pytest
+
+from famplex.graph import FamplexGraph
+
+
+graph = FamplexGraph()
+closure_graph = FamplexGraph(closure=True)
+
+
+@pytest.mark.parametrize('relation_types',
+                         [['isa'], ['partof'], ['isa', 'partof'], []])
+def test_closure_relation_matches_traversal(relation_types):
+    nodes = list(graph._root_class_mapping)
+    for node in nodes:
+        ancestors = set(graph.traverse(node, relation_types, 'up'))
+        for other in graph.root_terms(*node) + [node, ('HGNC', 'ESR1')]:
+            expected = other in ancestors
+            assert closure_graph.relation(*node, *other,
+                                          relation_types) == expected
+            assert graph.relation(*node, *other, relation_types) == expected
+
+
+@pytest.mark.parametrize('relation_types',
+                         [['isa'], ['partof'], ['isa', 'partof']])
+def test_relation_many(relation_types):
+    nodes = list(graph._root_class_mapping)[:200] + [('HGNC', 'GENE')]
+    pairs = [(node, root) for node in nodes
+             for root in graph.root_classes[:50] + [node]]
+    expected = [graph.relation(*node1, *node2, relation_types)
+                for node1, node2 in pairs]
+    assert graph.relation_many(pairs, relation_types) == expected
+    assert closure_graph.relation_many(pairs, relation_types) == expected
+
+
+def test_closure_stats():
+    assert graph.closure_stats is None
+    stats = closure_graph.closure_stats
+    assert set(stats) == {'build_time', 'memory', 'num_pairs'}
+    assert stats['num_pairs'] > 0
+    assert stats['memory'] > 0
+
+
+compact_graph = FamplexGraph(compact=True)
+
+
+@pytest.mark.parametrize('relation_types',
+                         [['isa'], ['partof'], ['isa', 'partof']])
+@pytest.mark.parametrize('direction', ['up', 'down'])
+def test_compact_traverse_matches_dict(relation_types, direction):
+    for node in graph._root_class_mapping:
+        assert list(compact_graph.traverse(node, relation_types,
+                                           direction)) == \
+            list(graph.traverse(node, relation_types, direction))
+
+
+def test_compact_edges_match_dict():
+    for node in graph._root_class_mapping:
+        assert compact_graph.parent_edges(*node) == graph.parent_edges(*node)
+        assert compact_graph.child_edges(*node) == graph.child_edges(*node)
+    assert compact_graph.root_classes == graph.root_classes
+    with pytest.raises(ValueError):
+        compact_graph.parent_edges('HGNC', 'GENE')
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_snapshot_cache(tmp_path, monkeypatch, compact):
+    from famplex import locations, snapshot
+    monkeypatch.setattr(locations, 'CACHE_PATH', str(tmp_path))
+    built = FamplexGraph(compact=compact, cache=True)
+    path = snapshot.snapshot_path(snapshot.resources_hash(), compact)
+    assert (tmp_path / path).exists()
+    loaded = FamplexGraph(compact=compact, cache=True)
+    assert loaded.root_classes == built.root_classes
+    assert loaded._root_class_mapping == built._root_class_mapping
+    assert loaded._equivalences == built._equivalences
+    for node in graph._root_class_mapping:
+        assert loaded.parent_edges(*node) == graph.parent_edges(*node)
+        assert list(loaded.traverse(node, ['isa', 'partof'], 'down')) == \
+            list(graph.traverse(node, ['isa', 'partof'], 'down'))
+    with pytest.raises(ValueError):
+        loaded.root_terms('HGNC', 'GENE')
+
+
+def test_snapshot_invalidated_by_resource_change(tmp_path, monkeypatch):
+    from famplex import locations, snapshot
+    monkeypatch.setattr(locations, 'CACHE_PATH', str(tmp_path))
+    FamplexGraph(cache=True)
+    key = snapshot.resources_hash()
+    assert snapshot.load_snapshot(key, False) is not None
+    assert snapshot.load_snapshot('0' * 64, False) is None
+    (tmp_path / 'garbage').write_bytes(b'not a pickle')
+    monkeypatch.setattr(snapshot, 'snapshot_path',
+                        lambda key, compact: str(tmp_path / 'garbage'))
+    assert snapshot.load_snapshot(key, False) is None
+
+
+def test_snapshot_removes_outdated_snapshots(tmp_path, monkeypatch):
+    from famplex import locations, snapshot
+    monkeypatch.setattr(locations, 'CACHE_PATH', str(tmp_path))
+    version = snapshot.SNAPSHOT_VERSION
+    old = ['famplex_graph_v%d_dict_%s.pickle' % (version - 1, 'a' * 64),
+           'famplex_graph_v%d_compact_%s.pickle' % (version - 1, 'a' * 64),
+           'famplex_graph_v%d_dict_%s.pickle' % (version, 'b' * 64)]
+    kept = ['famplex_graph_v%d_compact_%s.pickle' % (version, 'c' * 64),
+            'other.pickle']
+    for name in old + kept:
+        (tmp_path / name).write_bytes(b'')
+    FamplexGraph(cache=True)
+    current = os.path.basename(snapshot.snapshot_path(
+        snapshot.resources_hash(), False))
+    assert sorted(os.listdir(tmp_path)) == sorted(kept + [current])
+
+
+def test_mapped_graph(tmp_path):
+    path = str(tmp_path / 'famplex.graph')
+    graph.write_mapped(path)
+    mapped = FamplexGraph(mapped_path=path, closure=True)
+    assert mapped.root_classes == graph.root_classes
+    for node in graph._root_class_mapping:
+        assert mapped.in_famplex(*node)
+        assert mapped.root_terms(*node) == graph.root_terms(*node)
+        assert mapped.parent_edges(*node) == graph.parent_edges(*node)
+        assert mapped.child_edges(*node) == graph.child_edges(*node)
+        assert list(mapped.traverse(node, ['isa'], 'up')) == \
+            list(graph.traverse(node, ['isa'], 'up'))
+    for fplx_id, equivs in graph._equivalences.items():
+        assert mapped.equivalences(fplx_id) == equivs
+        for equiv in equivs:
+            assert mapped.reverse_equivalences(*equiv) == \
+                graph.reverse_equivalences(*equiv)
+    assert not mapped.in_famplex('HGNC', 'GENE')
+    assert not mapped.in_famplex('MESH', 'D011948')
+    assert mapped.reverse_equivalences('HGNC', 'GENE') == []
+    assert mapped.relation('HGNC', 'PRKAB1', 'FPLX', 'AMPK_A2B1G1',
+                           ['partof'])
+    for fplx_id in list(graph._equivalences)[:50]:
+        assert mapped.translate('FPLX', fplx_id, 'MESH') == \
+            graph.translate('FPLX', fplx_id, 'MESH')
+
+
+@pytest.mark.parametrize('namespace_from,namespace_to',
+                         [('BEL', 'HGNC_GROUP'), ('MESH', 'NCIT'),
+                          ('FPLX', 'IP'), ('PF', 'FPLX')])
+def test_translate_matches_equivalences(namespace_from, namespace_to):
+    ids = {id_ for equivs in graph._equivalences.values()
+           for ns, id_ in equivs if ns == namespace_from} \
+        if namespace_from != 'FPLX' else set(graph._equivalences)
+    ids = sorted(ids) + ['UNKNOWN']
+    for id_, translated in zip(ids, graph.translate_many(namespace_from, ids,
+                                                         namespace_to)):
+        if namespace_from == 'FPLX':
+            fplx_ids = [id_] if id_ in graph._equivalences else []
+        else:
+            fplx_ids = graph.reverse_equivalences(namespace_from, id_)
+        expected = set()
+        for fplx_id in fplx_ids:
+            expected.update([fplx_id] if namespace_to == 'FPLX' else
+                            [other for ns, other
+                             in graph.equivalences(fplx_id)
+                             if ns == namespace_to])
+        assert set(translated) == expected
+        assert len(translated) == len(expected)
+        assert graph.translate(namespace_from, id_, namespace_to) == \
+            translated
+
+
+def test_mapped_graph_round_trip(tmp_path):
+    path = str(tmp_path / 'famplex.graph')
+    graph.write_mapped(path)
+    mapped = FamplexGraph(mapped_path=path)
+    assert set(mapped._root_class_mapping) == set(graph._root_class_mapping)
+    assert set(mapped._equivalences) == set(graph._equivalences)
+    copy_path = str(tmp_path / 'copy.graph')
+    mapped.write_mapped(copy_path)
+    copy = FamplexGraph(mapped_path=copy_path)
+    assert copy.root_classes == graph.root_classes
+    for node in graph._root_class_mapping:
+        assert copy.root_terms(*node) == graph.root_terms(*node)
+        assert copy.parent_edges(*node) == graph.parent_edges(*node)
+        assert copy.child_edges(*node) == graph.child_edges(*node)
+    for fplx_id, equivs in graph._equivalences.items():
+        assert copy.equivalences(fplx_id) == equivs
+        for equiv in equivs:
+            assert copy.reverse_equivalences(*equiv) == \
+                graph.reverse_equivalences(*equiv)
+
+
+def test_mapped_graph_rejects_other_files(tmp_path):
+    path = tmp_path / 'other'
+    path.write_bytes(b'\x00' * 1024)
+    with pytest.raises(ValueError):
+        FamplexGraph(mapped_path=str(path))
+
+
+@pytest.mark.parametrize('relation_types',
+                         [['isa'], ['partof'], ['isa', 'partof']])
+def test_individual_members_matches_traversal(relation_types):
+    for node in graph._root_class_mapping:
+        expected = []
+        for descendant in list(graph.traverse(node, relation_types,
+                                              'down'))[1:]:
+            if not [edge for edge in graph.child_edges(*descendant)
+                    if edge[2] in relation_types]:
+                expected.append(descendant)
+        expected.sort(key=lambda x: (x[0].lower(), x[1].lower()))
+        assert graph.individual_members(*node, relation_types) == expected
+
+
+def test_root_class_mapping_matches_traversal():
+    expected = {}
+    for root in graph.root_classes:
+        for node in graph.traverse(root, ['isa', 'partof'], 'down'):
+            expected.setdefault(node, []).append(root)
+    for node, roots in expected.items():
+        assert graph.root_terms(*node) == \
+            sorted(roots, key=lambda x: (x[0].lower(), x[1].lower()))
+
+
+def _write_resources(directory, monkeypatch, relations, entities):
+    import csv
+    import famplex.load
+    for name, rows in [('relations.csv', relations),
+                       ('entities.csv', [[entity] for entity in entities]),
+                       ('equivalences.csv', [])]:
+        path = str(directory / name)
+        with open(path, 'w') as f:
+            csv.writer(f, lineterminator='\r\n').writerows(rows)
+        monkeypatch.setattr(famplex.load, name.split('.')[0].upper() +
+                            '_PATH', path)
+
+
+def _root_class_mapping_time(graph):
+    """Return the best of several timings of building root_class_mapping"""
+    import time
+    from famplex.graph import _root_class_mapping
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        _root_class_mapping(graph._reverse_graph, graph._graph,
+                            graph.root_classes)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_build_scaled_relations(tmp_path, monkeypatch):
+    from famplex.load import load_entities, load_relations
+    relations, entities = load_relations(), load_entities()
+    copies = 10
+
+    def rename(ns, id_, k):
+        return id_ + '_copy%d' % k if ns == 'FPLX' else id_
+
+    scaled_relations = [[ns1, rename(ns1, id1, k), rel, ns2,
+                         rename(ns2, id2, k)]
+                        for k in range(copies)
+                        for ns1, id1, rel, ns2, id2 in relations]
+    scaled_entities = [rename('FPLX', entity, k) for k in range(copies)
+                       for entity in entities]
+    _write_resources(tmp_path, monkeypatch, scaled_relations,
+                     scaled_entities)
+    scaled = FamplexGraph()
+    # Building the mapping scales about linearly with the size of the
+    # relations. The margin allows for timing noise but not for quadratic
+    # growth, which would make the ratio about copies ** 2.
+    assert _root_class_mapping_time(scaled) < \
+        3 * copies * _root_class_mapping_time(graph)
+    assert len(scaled.root_classes) == copies * len(graph.root_classes)
+    for ns, id_ in [('HGNC', 'SCN8A'), ('FPLX', 'AMPK_alpha')]:
+        roots = {root for k in range(copies)
+                 for root in scaled.root_terms(ns, rename(ns, id_, k))}
+        assert roots == {('FPLX', rename('FPLX', root_id, k))
+                         for k in range(copies)
+                         for _, root_id in graph.root_terms(ns, id_)}
+
+
+def test_build_detects_cycles(tmp_path, monkeypatch):
+    relations = [['HGNC', 'A1', 'isa', 'FPLX', 'A'],
+                 ['FPLX', 'A', 'isa', 'FPLX', 'B'],
+                 ['FPLX', 'B', 'partof', 'FPLX', 'C'],
+                 ['FPLX', 'C', 'isa', 'FPLX', 'A'],
+                 ['FPLX', 'C', 'isa', 'FPLX', 'D']]
+    _write_resources(tmp_path, monkeypatch, relations, ['A', 'B', 'C', 'D'])
+    with pytest.raises(ValueError) as excinfo:
+        FamplexGraph()
+    message = str(excinfo.value)
+    assert 'cycle' in message
+    assert 'FPLX:A' in message and 'FPLX:B' in message and \
+        'FPLX:C' in message
+
+
+def test_depth():
+    assert graph.depth('FPLX', 'Voltage_gated_ion_channels') == 0
+    assert graph.depth('HGNC', 'ESR1') == 1
+    assert graph.depth('HGNC', 'SCN8A') == 4
+    assert graph.depth('FPLX', 'Protease') == 0
+    for node in graph._root_class_mapping:
+        parents = graph.parent_edges(*node)
+        assert graph.depth(*node) == \
+            max((graph.depth(ns, id_) + 1 for ns, id_, _ in parents),
+                default=0)
+    with pytest.raises(ValueError):
+        graph.depth('HGNC', 'GENE')
+
+
+def test_lowest_common_ancestors_with_closure():
+    terms = [('HGNC', 'PRKAA1'), ('HGNC', 'PRKAB1'), ('HGNC', 'PRKAG1')]
+    for relation_types in [['isa'], ['partof'], ['isa', 'partof']]:
+        assert closure_graph.lowest_common_ancestors(terms,
+                                                     relation_types) == \
+            graph.lowest_common_ancestors(terms, relation_types)
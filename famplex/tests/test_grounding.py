@@ -0,0 +1,116 @@
+import pytest
+
+from famplex.grounding import GroundingIndex, normalize_text
+from famplex.load import load_grounding_map
+
+
+grounding_map = load_grounding_map()
+index = GroundingIndex(grounding_map)
+
+
+@pytest.mark.parametrize('texts',
+                         [['TNF-α', 'TNF alpha', 'TNFα', 'tnf_Alpha',
+                           'TNF–alpha'],
+                          ['AMPKα1', 'AMPK-alpha1', 'ampk alpha 1'],
+                          ['Σ', 'σ', 'ς', 'sigma'],
+                          ['λ', 'lambda']])
+def test_normalize_text(texts):
+    assert len({normalize_text(text) for text in texts}) == 1
+
+
+def test_exact_texts():
+    for text, db_refs in grounding_map.items():
+        assert index.ground(text) is db_refs
+
+
+@pytest.mark.parametrize('text,expected',
+                         [('tnf-alpha', {'UP': 'P01375'}),
+                          ('AMPK-ALPHA1', {'UP': 'Q13131'}),
+                          ('akt', {'FPLX': 'AKT'}),
+                          ('If_this_is_ever_a_real_text', None)])
+def test_normalized_texts(text, expected):
+    db_refs = index.ground(text)
+    if expected is None:
+        assert db_refs is None
+    else:
+        assert {ns: id_ for ns, id_ in db_refs.items()
+                if ns != 'TEXT'} == expected
+
+
+def test_ambiguous_texts():
+    gmap = {'ABL': {'TEXT': 'ABL', 'FPLX': 'ABL_family'},
+            'Abl': {'TEXT': 'Abl', 'UP': 'P00519'},
+            'Akt': {'TEXT': 'Akt', 'FPLX': 'AKT'},
+            'AKT': {'TEXT': 'AKT', 'FPLX': 'AKT'}}
+    gindex = GroundingIndex(gmap)
+    assert gindex.ground('Abl') is gmap['Abl']
+    assert gindex.ground('abl') is None
+    assert gindex.ground('akt')['FPLX'] == 'AKT'
+    assert gindex.index_stats['num_keys'] == 1
+    assert gindex.index_stats['num_ambiguous'] == 1
+
+
+def test_ground_many():
+    texts = ['AKT', 'tnf-alpha', 'AKT', 'If_this_is_ever_a_real_text']
+    assert index.ground_many(texts) == [index.ground(text)
+                                        for text in texts]
+    assert index.ground_many([]) == []
+
+
+def test_index_stats():
+    stats = index.index_stats
+    assert 0 < stats['num_keys'] <= len(grounding_map)
+    assert 0 < stats['memory'] < stats['map_memory']
+
+
+@pytest.mark.parametrize('text,max_distance,expected',
+                         [('AMPKs', 1, 'AMPK'), ('Aktt', 1, 'Akt'),
+                          ('Akt-1', 1, 'Akt1'), ('AKT', 1, 'AKT'),
+                          ('AMPKss', 2, 'AMPK')])
+def test_ground_fuzzy(text, max_distance, expected):
+    candidates = index.ground_fuzzy(text, max_distance)
+    assert expected in [db_refs['TEXT'] for db_refs, _ in candidates]
+    distances = [distance for _, distance in candidates]
+    assert distances == sorted(distances)
+    assert all(distance <= max_distance for distance in distances)
+
+
+def test_ground_fuzzy_matches_brute_force():
+    from famplex.grounding import _bounded_levenshtein
+    keys = {normalize_text(text): db_refs
+            for text, db_refs in grounding_map.items()}
+    for text in ['AMPKs', 'Ab', 'xyzzy', 'ERK 12', 'p38MAPKs', 'P13K']:
+        for max_distance in [1, 2]:
+            query = normalize_text(text)
+            expected = sorted(
+                (index._normalized[key]['TEXT'],
+                 _bounded_levenshtein(query, key, max_distance))
+                for key, db_refs in keys.items()
+                if db_refs and key in index._normalized and
+                _bounded_levenshtein(query, key, max_distance) <=
+                max_distance)
+            found = index.ground_fuzzy(text, max_distance, limit=None)
+            if found and found[0][1] == 0:
+                continue
+            assert sorted((db_refs['TEXT'], distance)
+                          for db_refs, distance in found) == expected
+
+
+def test_ground_fuzzy_ungrounded():
+    gindex = GroundingIndex({'AKT': {'TEXT': 'AKT', 'FPLX': 'AKT'},
+                             'AKTs': None})
+    assert gindex.ground_fuzzy('AKTs') == []
+    assert gindex.ground_fuzzy('AKTt') == [({'TEXT': 'AKT', 'FPLX': 'AKT'},
+                                            1)]
+
+
+def test_texts():
+    expected = {}
+    for text, db_refs in grounding_map.items():
+        for ns, id_ in (db_refs or {}).items():
+            if ns != 'TEXT':
+                expected.setdefault((ns, id_), []).append(text)
+    for (ns, id_), texts in expected.items():
+        assert index.texts(ns, id_) == texts
+    assert 'AMPK' in index.texts('FPLX', 'AMPK')
+    assert index.texts('FPLX', 'If_this_is_ever_a_real_family') == []
@@ -1,4 +1,8 @@
-from famplex.load import load_grounding_map
+from famplex.load import load_grounding_map, load_entities, \
+    load_relations, load_equivalences, load_descriptions, \
+    load_gene_prefixes, iter_grounding_map, iter_entities, iter_relations, \
+    iter_equivalences, iter_descriptions, iter_gene_prefixes, Relation, \
+    Equivalence, GenePrefix
 
 
 def test_load_grounding_map():
@@ -6,3 +10,90 @@ def test_load_grounding_map():
     for text, db_refs in gm.items():
         assert db_refs['TEXT'] == text
         assert '' not in db_refs
+
+
+def test_iter_grounding_map():
+    assert dict(iter_grounding_map()) == load_grounding_map()
+
+
+def test_iter_loaders_match_load_loaders():
+    assert list(iter_entities()) == load_entities()
+    assert [list(row) for row in iter_relations()] == load_relations()
+    assert [list(row) for row in iter_equivalences()] == load_equivalences()
+    assert [list(row) for row in iter_descriptions()] == load_descriptions()
+    assert [list(row) for row in iter_gene_prefixes()] == \
+        load_gene_prefixes()[1:]
+
+
+def test_iter_typed_rows():
+    relation = next(iter_relations())
+    assert isinstance(relation, Relation)
+    assert relation.relation in ('isa', 'partof')
+    equivalence = next(iter_equivalences())
+    assert isinstance(equivalence, Equivalence)
+    assert equivalence.fplx_id in set(iter_entities())
+    prefix = next(iter_gene_prefixes())
+    assert isinstance(prefix, GenePrefix)
+    assert '{Gene name}' in prefix.pattern
+
+
+def test_resource_registry_reloads_changed_files(tmp_path, monkeypatch):
+    import os
+    import famplex.load
+    from famplex.registry import ResourceRegistry
+    path = str(tmp_path / 'entities.csv')
+    with open(path, 'w') as f:
+        f.write('A\r\n')
+    monkeypatch.setattr(famplex.load, 'ENTITIES_PATH', path)
+    calls = []
+    registry = ResourceRegistry()
+    registry.register('entities', lambda: famplex.load.ENTITIES_PATH,
+                      lambda: calls.append(1) or load_entities())
+    changes = []
+    registry.add_listener(changes.append)
+    assert registry.get('entities') == ['A']
+    assert registry.get('entities') is registry.get('entities')
+    assert len(calls) == 1
+    # A new modification time with unchanged content does not reparse
+    os.utime(path, ns=(0, 0))
+    assert registry.refresh() == []
+    assert registry.get('entities') == ['A']
+    assert len(calls) == 1
+    with open(path, 'w') as f:
+        f.write('A\r\nB\r\n')
+    assert registry.refresh() == ['entities']
+    assert changes == [['entities']]
+    assert registry.get('entities') == ['A', 'B']
+    assert len(calls) == 2
+
+
+def test_resource_registry_retries_failed_listeners(tmp_path, caplog):
+    from famplex.registry import ResourceRegistry
+    path = tmp_path / 'entities.csv'
+    path.write_text('A\r\n')
+    registry = ResourceRegistry()
+    registry.register('entities', str(path), lambda: path.read_text())
+    failures = [ValueError('bad file')]
+    changes = []
+
+    def failing_listener(names):
+        if failures:
+            raise failures.pop()
+    registry.add_listener(failing_listener)
+    registry.add_listener(changes.append)
+    assert registry.refresh() == []
+    path.write_text('A\r\nB\r\n')
+    assert registry.refresh() == ['entities']
+    assert 'bad file' in caplog.text
+    # Other listeners are still notified, and the change is reported again
+    # since a listener failed.
+    assert changes == [['entities']]
+    assert registry.refresh() == ['entities']
+    assert changes == [['entities'], ['entities']]
+    assert registry.refresh() == []
+
+
+def test_load_cached():
+    assert load_entities(cached=True) == load_entities()
+    assert load_entities(cached=True) is load_entities(cached=True)
+    assert load_grounding_map(cached=True) == load_grounding_map()
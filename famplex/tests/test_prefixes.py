@@ -0,0 +1,61 @@
+import pytest
+
+from famplex.load import GenePrefix, iter_gene_prefixes
+from famplex.prefixes import GenePrefixStripper
+
+
+stripper = GenePrefixStripper()
+
+
+@pytest.mark.parametrize('text,expected',
+                         [('GST-AKT1', ('AKT1', 'experimental context')),
+                          ('shRNA-AKT1', ('AKT1', 'inhibition')),
+                          ('sh-AKT1', ('AKT1', 'inhibition')),
+                          ('AKT1 siRNA', ('AKT1', 'inhibition')),
+                          ('pAKT', ('AKT', 'protein state')),
+                          ('phospho-ERK', ('ERK', 'protein state')),
+                          ('hTERT', ('TERT', 'species')),
+                          ('mmu-miR-21', ('miR-21', 'species')),
+                          ('KRAS-G12D', ('KRAS', 'protein state')),
+                          ('mutKRASG12D', ('KRAS', 'protein state')),
+                          ('AKT1 mRNA', ('AKT1', 'mrna grounding')),
+                          ('Lenti-AKT', ('AKT', 'experimental context')),
+                          ('wild-type p53', ('p53', 'experimental context')),
+                          ('p53', ('p53', None)),
+                          ('hnRNP', ('hnRNP', None)),
+                          ('PKD', ('PKD', None)),
+                          ('GST-', ('GST-', None)),
+                          ('AKT1', ('AKT1', None)),
+                          ('DGKD', ('DGKD', None)),
+                          ('hCG', ('hCG', None)),
+                          ('AKT1KD', ('AKT1', 'inhibition')),
+                          ('', ('', None))])
+def test_strip(text, expected):
+    assert stripper.strip(text) == expected
+
+
+def test_every_pattern_strips():
+    for pattern, category, _ in iter_gene_prefixes():
+        text = pattern.strip().replace('{Gene name}', 'AKT1').\
+            replace('{microRNA name}', 'miR-21').replace('{mutation}', 'E17K')
+        core, found = stripper.strip(text)
+        assert core in ('AKT1', 'miR-21')
+        assert found is not None
+
+
+def test_custom_patterns():
+    custom = GenePrefixStripper([GenePrefix('x-{Gene name}', 'a', ''),
+                                 GenePrefix('{Gene name}-y', 'b', '')])
+    assert custom.strip('x-AKT1') == ('AKT1', 'a')
+    assert custom.strip('AKT1-y') == ('AKT1', 'b')
+    assert custom.strip('GST-AKT1') == ('GST-AKT1', None)
+    custom = GenePrefixStripper([GenePrefix('x-{Gene name}', 'a', '')],
+                                known_names=['x-AKT1'])
+    assert custom.strip('x-AKT1') == ('x-AKT1', None)
+    assert custom.strip('x-AKT2') == ('AKT2', 'a')
+
+
+def test_strip_many():
+    texts = ['GST-AKT1', 'AKT1', 'GST-AKT1', 'pAKT']
+    assert stripper.strip_many(texts) == [stripper.strip(text)
+                                          for text in texts]
@@ -0,0 +1,59 @@
+import pytest
+
+from famplex.load import load_grounding_map
+from famplex.scanner import GroundingScanner, scan_corpus
+
+
+gmap = {'he': {'TEXT': 'he', 'HGNC': 'HE'},
+        'she': {'TEXT': 'she', 'HGNC': 'SHE'},
+        'hers': {'TEXT': 'hers', 'HGNC': 'HERS'},
+        'his': None,
+        'is': {'TEXT': 'is', 'HGNC': 'IS'}}
+scanner = GroundingScanner(gmap)
+
+
+def _spans(document, **kwargs):
+    return [(start, end, text) for start, end, text, _
+            in scanner.scan(document, **kwargs)]
+
+
+def _naive_spans(document, texts):
+    return sorted((start, start + len(text), text) for text in texts
+                  for start in range(len(document))
+                  if document.startswith(text, start))
+
+
+@pytest.mark.parametrize('document', ['ushers', 'his hers she', '', 'h',
+                                      'shehishers'])
+def test_all_matches(document):
+    texts = [text for text, db_refs in gmap.items() if db_refs]
+    assert _spans(document, longest=False, word_boundaries=False) == \
+        _naive_spans(document, texts)
+
+
+def test_longest_and_word_boundaries():
+    assert _spans('ushers', word_boundaries=False) == [(1, 4, 'she')]
+    assert _spans('ushers') == []
+    assert _spans('she, hers') == [(0, 3, 'she'), (5, 9, 'hers')]
+    # Explicitly ungrounded texts hide the texts within them
+    assert _spans('his', word_boundaries=False) == []
+    assert _spans('his', longest=False, word_boundaries=False) == \
+        [(1, 3, 'is')]
+
+
+def test_grounding_map_scan():
+    famplex_scanner = GroundingScanner(load_grounding_map())
+    document = 'Akt and NF-kappaB p65 phosphorylate TNF-α but not pAkt.'
+    spans = list(famplex_scanner.scan(document))
+    assert [text for _, _, text, _ in spans] == ['Akt', 'NF-kappaB p65',
+                                                 'TNF-α']
+    for start, end, text, db_refs in spans:
+        assert document[start:end] == text
+        assert db_refs['TEXT'] == text
+
+
+def test_scan_corpus():
+    documents = ['ushers', 'she, hers', '', 'his is'] * 10
+    assert list(scan_corpus(iter(documents), processes=2, chunksize=3,
+                            grounding_map=gmap)) == \
+        list(scanner.scan_many(documents))
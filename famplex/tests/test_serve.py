@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+from famplex import ancestral_terms, equivalences, ground
+from famplex.serve import RequestError, handle_query, serve
+
+
+def test_handle_query():
+    assert handle_query('/in_famplex', {'terms': [['FPLX', 'AMPK'],
+                                                  ['HGNC', 'GENE']]}) == \
+        {'results': [True, False]}
+    assert handle_query('/ancestral_terms',
+                        {'terms': [['HGNC', 'PRKAA1'], ['HGNC', 'GENE']],
+                         'relation_types': ['isa']}) == \
+        {'results': [ancestral_terms('HGNC', 'PRKAA1', ['isa']), None]}
+    assert handle_query('/refinement_of',
+                        {'pairs': [[['HGNC', 'PRKAA1'], ['FPLX', 'AMPK']],
+                                   [['FPLX', 'AMPK'], ['HGNC', 'PRKAA1']]]}) \
+        == {'results': [True, False]}
+    assert handle_query('/equivalences', {'ids': ['AMPK'],
+                                          'namespaces': ['BEL']}) == \
+        {'results': [equivalences('AMPK', ['BEL'])]}
+    assert handle_query('/ground', {'texts': ['AKT', 'tnf-alpha']}) == \
+        {'results': [ground('AKT'), ground('tnf-alpha')]}
+
+
+@pytest.mark.parametrize('path,payload,status',
+                         [('/unknown', {}, 404),
+                          ('/in_famplex', [], 400),
+                          ('/in_famplex', {'terms': [['FPLX']]}, 400),
+                          ('/ancestral_terms',
+                           {'terms': [], 'relation_types': 'isa'}, 400),
+                          ('/ground', {'texts': [1]}, 400)])
+def test_handle_query_errors(path, payload, status):
+    with pytest.raises(RequestError) as err:
+        handle_query(path, payload)
+    assert err.value.status == status
+
+
+async def _request(reader, writer, method, path, body=None):
+    content = b'' if body is None else json.dumps(body).encode('utf-8')
+    writer.write(('%s %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n' %
+                  (method, path, len(content))).encode('ascii') + content)
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, value = line.decode('ascii').split(':', 1)
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, json.loads(body)
+
+
+def test_serve():
+    async def run():
+        started = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(serve(port=0,
+                                           ready=started.set_result))
+        server = await started
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        # Several requests on one keep-alive connection
+        responses = [
+            await _request(reader, writer, 'GET', '/health'),
+            await _request(reader, writer, 'POST', '/in_famplex',
+                           {'terms': [['FPLX', 'AMPK']]}),
+            await _request(reader, writer, 'POST', '/unknown', {}),
+            await _request(reader, writer, 'GET', '/in_famplex'),
+            await _request(reader, writer, 'POST', '/ground',
+                           {'texts': ['AKT']})]
+        writer.close()
+        task.cancel()
+        return responses
+    responses = asyncio.run(run())
+    assert responses[0] == (200, {'status': 'ok'})
+    assert responses[1] == (200, {'results': [True]})
+    assert responses[2][0] == 404
+    assert responses[3][0] == 405
+    assert responses[4] == (200, {'results': [ground('AKT')]})
+
+
+def test_serve_hides_internal_errors(monkeypatch, caplog):
+    import famplex.serve
+
+    def fail(payload):
+        raise RuntimeError('secret detail')
+    monkeypatch.setitem(famplex.serve._ENDPOINTS, '/in_famplex', fail)
+
+    async def run():
+        started = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(serve(port=0,
+                                           ready=started.set_result))
+        server = await started
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        response = await _request(reader, writer, 'POST', '/in_famplex',
+                                  {'terms': []})
+        writer.close()
+        task.cancel()
+        return response
+    status, body = asyncio.run(run())
+    assert status == 500
+    assert 'secret detail' not in json.dumps(body)
+    assert 'secret detail' in caplog.text
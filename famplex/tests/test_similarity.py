@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from famplex.similarity import FamilyMatch, MemberIndex
+
+
+def _random_families(rng, num_families, universe):
+    return {'F%d' % k: rng.sample(universe, rng.randint(0, 12))
+            for k in range(num_families)}
+
+
+def _brute_force(families, members, min_jaccard, min_containment):
+    query = set(members)
+    matches = []
+    for family_id, family in families.items():
+        family = set(family)
+        overlap = len(query & family)
+        if not overlap:
+            continue
+        jaccard = overlap / float(len(query | family))
+        containment = overlap / float(len(query))
+        if jaccard >= min_jaccard and containment >= min_containment:
+            matches.append(FamilyMatch(family_id, jaccard, containment,
+                                       overlap))
+    matches.sort(key=lambda m: (-m.jaccard, -m.containment, m.fplx_id))
+    return matches
+
+
+@pytest.mark.parametrize('min_jaccard,min_containment',
+                         [(0.0, 0.0), (0.5, 0.0), (1.0, 0.0), (0.0, 0.75),
+                          (0.3, 0.5), (1 / 3, 0.0)])
+def test_match_matches_brute_force(min_jaccard, min_containment):
+    rng = random.Random(0)
+    universe = ['P%d' % k for k in range(60)]
+    families = _random_families(rng, 200, universe)
+    index = MemberIndex(families)
+    queries = _random_families(rng, 200, universe)
+    queries['subset'] = families['F1'][:3]
+    queries['unknown'] = ['X1', 'X2'] + families['F2']
+    for members in queries.values():
+        assert index.match(members, min_jaccard, min_containment) == \
+            _brute_force(families, members, min_jaccard, min_containment)
+    expected = {query_id: _brute_force(families, members, min_jaccard,
+                                       min_containment)
+                for query_id, members in queries.items()}
+    assert index.match_many(queries, min_jaccard, min_containment) == \
+        {query_id: matches for query_id, matches in expected.items()
+         if matches}
+
+
+def test_match():
+    index = MemberIndex({'A': ['P1', 'P2'], 'B': ['P1', 'P2', 'P3'],
+                         'C': []})
+    assert len(index) == 2
+    assert index.match(['P1', 'P2']) == \
+        [FamilyMatch('A', 1.0, 1.0, 2), FamilyMatch('B', 2 / 3, 1.0, 2)]
+    assert index.match(['P1', 'P2'], min_jaccard=1.0) == \
+        [FamilyMatch('A', 1.0, 1.0, 2)]
+    assert index.match(['P3', 'P4'], min_containment=0.5) == \
+        [FamilyMatch('B', 0.25, 0.5, 1)]
+    assert index.match(['P4']) == []
+    assert index.match([]) == []
+
+
+def test_default_families():
+    index = MemberIndex()
+    assert index.match(['P27361', 'P28482'], min_jaccard=1.0) == \
+        [FamilyMatch('ERK', 1.0, 1.0, 2)]
+    index = MemberIndex(namespace='HGNC')
+    assert index.match(['MAPK1', 'MAPK3'], min_jaccard=1.0) == \
+        [FamilyMatch('ERK', 1.0, 1.0, 2)]
@@ -0,0 +1,61 @@
+import pytest
+
+from famplex.graph import FamplexGraph
+from famplex.load import load_grounding_map
+from famplex.store import FamplexStore, write_store
+
+
+graph = FamplexGraph()
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('store') / 'famplex.sqlite')
+    write_store(path, graph)
+    with FamplexStore(path) as store:
+        yield store
+
+
+def test_store_matches_graph(store):
+    assert store.root_classes == graph.root_classes
+    terms = list(graph._root_class_mapping) + [('HGNC', 'GENE')]
+    for ns, id_ in terms:
+        assert store.in_famplex(ns, id_) == graph.in_famplex(ns, id_)
+        assert store.reverse_equivalences(ns, id_) == \
+            graph.reverse_equivalences(ns, id_)
+        for method in ['parent_edges', 'child_edges', 'root_terms']:
+            try:
+                expected = getattr(graph, method)(ns, id_)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    getattr(store, method)(ns, id_)
+            else:
+                assert getattr(store, method)(ns, id_) == expected
+        if ns == 'FPLX' and graph.in_famplex(ns, id_):
+            assert store.equivalences(id_) == graph.equivalences(id_)
+    with pytest.raises(ValueError):
+        store.equivalences('GENE')
+
+
+@pytest.mark.parametrize('relation_types', [['isa'], ['partof'],
+                                            ['isa', 'partof'], []])
+def test_store_relation(store, relation_types):
+    terms = [('HGNC', 'PRKAA1'), ('FPLX', 'AMPK_alpha'), ('FPLX', 'AMPK'),
+             ('HGNC', 'ESR1'), ('FPLX', 'ESR'), ('HGNC', 'GENE')]
+    for term1 in terms:
+        for term2 in terms:
+            assert store.relation(*term1, *term2, relation_types) == \
+                graph.relation(*term1, *term2, relation_types)
+
+
+def test_store_ground(store):
+    for text, db_refs in load_grounding_map().items():
+        assert store.ground(text) == db_refs
+    assert store.ground('If_this_is_ever_a_real_text') is None
+
+
+def test_store_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.sqlite'
+    path.write_bytes(b'not a database' * 100)
+    with pytest.raises(ValueError):
+        FamplexStore(str(path))
@@ -1,11 +1,7 @@
 import re
 import sys
 import csv
-from indra.statements import Agent
-from indra.databases import hgnc_client
-from indra.databases import uniprot_client
-from indra.tools.expand_families import Expander
-from indra.preassembler.hierarchy_manager import hierarchies
+from famplex.api import child_map
 
 import common
 
@@ -63,25 +59,7 @@ def load_entity_list(filename):
 
 def get_child_map():
     """Get dictionary mapping FPLX IDs to Uniprot IDs of all children."""
-    entities = common.load_entity_list('../entities.csv')
-
-    be_agents = [Agent(be_id, db_refs={'FPLX': be_id})
-                 for be_id in entities]
-    ex = Expander(hierarchies)
-    child_map = {}
-    for be_agent in be_agents:
-        children = ex.get_children(be_agent)
-        children_up_ids = []
-        for child_ns, child_id in children:
-            if child_ns == 'HGNC':
-                hgnc_id = hgnc_client.get_hgnc_id(child_id)
-                up_id = hgnc_client.get_uniprot_id(hgnc_id)
-                children_up_ids.append(up_id)
-            else:
-                print("Unhandled NS: %s %s" % (child_ns, child_id))
-                continue
-        child_map[be_agent.name] = list(set(children_up_ids))
-    return child_map
+    return child_map('UP')
 
 
 def jaccard_index(a, b):
@@ -1,10 +1,7 @@
 import json
 from collections import defaultdict
-from indra.statements import Agent
-from indra.databases import hgnc_client
-from indra.tools.expand_families import Expander
-from indra.preassembler.hierarchy_manager import hierarchies
 from indra.databases import uniprot_client
+from famplex.similarity import MemberIndex
 
 import common
 
@@ -70,29 +67,19 @@ def load_uniprot(filename):
 
 def get_mappings(be_child_map, ip_family_members, uniprot_ids,
                  jaccard_cutoff=1.):
+    index = MemberIndex(be_child_map)
     mappings = defaultdict(list)
     up_set = set(uniprot_ids)
-    for be_id, be_children in be_child_map.items():
-        print("Mapping %s" % be_id)
-        # Skip empty sets
-        be_set = set(be_children)
-        if not be_set:
-            continue
-        for ip_id, ip_info in ip_family_members.items():
-            ip_name = ip_info['name']
-            members = ip_info['members']
-            ip_set = set(members).intersection(up_set)
-            # Skip empty sets
-            if not ip_set:
-                continue
-            jacc = common.jaccard_index(be_set, ip_set)
-            if jacc >= jaccard_cutoff:
-                mapping = {'id': ip_id, 'name': ip_name,
-                           'members': list(ip_set), 'jaccardIndex': jacc,
-                           'equivalence': 'IP,%s,%s' % (ip_id, be_id)}
-                mappings[be_id].append(mapping)
-        if be_id in mappings:
-            mappings[be_id].sort(key=lambda d: d['jaccardIndex'], reverse=True)
+    for ip_id, ip_info in ip_family_members.items():
+        ip_name = ip_info['name']
+        ip_set = set(ip_info['members']).intersection(up_set)
+        for match in index.match(ip_set, min_jaccard=jaccard_cutoff):
+            mapping = {'id': ip_id, 'name': ip_name,
+                       'members': list(ip_set), 'jaccardIndex': match.jaccard,
+                       'equivalence': 'IP,%s,%s' % (ip_id, match.fplx_id)}
+            mappings[match.fplx_id].append(mapping)
+    for map_list in mappings.values():
+        map_list.sort(key=lambda d: d['jaccardIndex'], reverse=True)
     return mappings
 
 
@@ -3,6 +3,7 @@ import json
 import requests
 from functools import lru_cache
 from collections import defaultdict
+from famplex.similarity import MemberIndex
 
 import common
 
@@ -180,28 +181,18 @@ def get_rx_family_members(up_ids, cache_file=None):
 
 def get_mappings(be_child_map, rx_family_members, jaccard_cutoff=1.):
     """Find matches between FPLX and Reactome families/complexes."""
+    index = MemberIndex(be_child_map)
     mappings = defaultdict(list)
-    for be_id, be_children in be_child_map.items():
-        # Skip empty sets
-        be_set = set(be_children)
-        if not be_set:
-            continue
-        for rx_id, rx_info in rx_family_members.items():
-            rx_name = rx_info['name']
-            rx_type = rx_info['type']
-            rx_set = set(rx_info['members'])
-            # Skip empty sets
-            if not rx_set:
-                continue
-            jacc = common.jaccard_index(be_set, rx_set)
-            if jacc >= jaccard_cutoff:
-                mapping = {'reactomeId': rx_id, 'reactomeType': rx_type,
-                           'reactomeName': rx_name,
-                           'reactomeMembers': list(rx_set),
-                           'jaccardIndex': jacc}
-                mappings[be_id].append(mapping)
-        if be_id in mappings:
-            mappings[be_id].sort(key=lambda d: d['jaccardIndex'], reverse=True)
+    for rx_id, rx_info in rx_family_members.items():
+        rx_set = set(rx_info['members'])
+        for match in index.match(rx_set, min_jaccard=jaccard_cutoff):
+            mapping = {'reactomeId': rx_id, 'reactomeType': rx_info['type'],
+                       'reactomeName': rx_info['name'],
+                       'reactomeMembers': list(rx_set),
+                       'jaccardIndex': match.jaccard}
+            mappings[match.fplx_id].append(mapping)
+    for map_list in mappings.values():
+        map_list.sort(key=lambda d: d['jaccardIndex'], reverse=True)
     return mappings
 
 
@@ -1,6 +1,7 @@
 """Propose mappings between FamPlex and Signor families based on members."""
 import csv
 from collections import namedtuple, defaultdict
+from famplex.similarity import MemberIndex
 import common
 
 
@@ -17,31 +18,21 @@ def get_signor_pf_map(pf_filename):
 
 
 def get_mappings(fplx_child_map, signor_pf_map, jaccard_cutoff=1.):
+    index = MemberIndex(fplx_child_map)
     mappings = defaultdict(list)
     for signor_id, signor_info in signor_pf_map.items():
         signor_name = signor_info[0]
         signor_set = set(signor_info[1])
-        # Skip empty sets
-        if not signor_set:
-            continue
-        for fplx_id, fplx_children in fplx_child_map.items():
-            # Skip empty sets
-            fplx_set = set(fplx_children)
-            if not fplx_set:
-                continue
-            jacc = common.jaccard_index(fplx_set, signor_set)
-            if jacc >= jaccard_cutoff:
-                mapping = {'signorId': signor_id,
-                           'signorName': signor_name,
-                           'signorMembers': list(signor_set),
-                           'fplxId': fplx_id,
-                           'fplxMembers': list(fplx_set),
-                           'eqEntry': 'SIGNOR,%s,%s' % (signor_id, fplx_id),
-                           'jaccardIndex': jacc}
-                mappings[signor_id].append(mapping)
-        if signor_id in mappings:
-            mappings[signor_id].sort(key=lambda d: d['jaccardIndex'],
-                                     reverse=True)
+        for match in index.match(signor_set, min_jaccard=jaccard_cutoff):
+            mapping = {'signorId': signor_id,
+                       'signorName': signor_name,
+                       'signorMembers': list(signor_set),
+                       'fplxId': match.fplx_id,
+                       'fplxMembers': list(fplx_child_map[match.fplx_id]),
+                       'eqEntry': 'SIGNOR,%s,%s' % (signor_id,
+                                                    match.fplx_id),
+                       'jaccardIndex': match.jaccard}
+            mappings[signor_id].append(mapping)
     return mappings
 
 
@@ -35,12 +35,14 @@ setup(name='famplex',
                          'famplex.belns',
                          'famplex_groundings.tsv',
                          'famplex.obo',
-                         'hgnc_symbol_map.csv']},
+                         'hgnc_symbol_map.csv',
+                         'hgnc_uniprot_map.csv']},
       data_files=[(os.path.join(package_relative_path, 'resources'),
                    ['entities.csv', 'equivalences.csv', 'grounding_map.csv',
                     'relations.csv', 'gene_prefixes.csv',
                     'descriptions.csv']),
                   (os.path.join(package_relative_path, 'exports'),
                    ['export/famplex.belns', 'export/famplex_groundings.tsv',
-                    'export/famplex.obo', 'export/hgnc_symbol_map.csv'])],
+                    'export/famplex.obo', 'export/hgnc_symbol_map.csv',
+                    'export/hgnc_uniprot_map.csv'])],
       include_package_data=True)
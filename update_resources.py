@@ -23,5 +23,5 @@ if __name__ == '__main__':
         shutil.copy(os.path.join(HERE, resource), RESOURCES_PATH)
     print('Copying exports from top level into FamPlex package.')
     for export in ['famplex.belns', 'famplex.obo', 'hgnc_symbol_map.csv',
-                   'famplex_groundings.tsv']:
+                   'hgnc_uniprot_map.csv', 'famplex_groundings.tsv']:
         shutil.copy(os.path.join(HERE, 'export', export), EXPORT_PATH)